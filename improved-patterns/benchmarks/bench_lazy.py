@@ -0,0 +1,185 @@
+"""
+惰性属性微基准
+
+用法(在 improved-patterns 目录下运行):
+    python -m benchmarks.bench_lazy
+    python -m benchmarks.bench_lazy --reads 1000000 --objects 100000 --json
+
+场景:
+    cached  缓存命中后的读取开销(每次读取的纳秒数)
+    first   新对象上首次访问(计算 + 写缓存)的开销
+
+对照组:
+    plain attribute          普通实例属性,读取开销的下限
+    functools.cached_property
+    reference lazy_property  ../reference/python-patterns 中的实现(文件存在时)
+    legacy LazyProperty      旧版写法: hasattr + getattr,缓存在 "_" + 属性名
+"""
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import timeit
+from typing import Dict, List
+
+from patterns.creational.lazy_evaluation import (
+    LazyProperty,
+    SlotLazyProperty,
+    ThreadSafeLazyProperty,
+)
+
+REFERENCE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "reference", "python-patterns",
+    "patterns", "creational", "lazy_evaluation.py",
+)
+
+
+def _load_reference(path: str):
+    """从文件路径加载参考实现的模块,文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location("reference_lazy_evaluation", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class LegacyLazyProperty:
+    """对照组: 旧版 LazyProperty(每次访问都经过 __get__,hasattr + getattr)"""
+
+    def __init__(self, func):
+        self.func = func
+        self.attr_name = f"_{func.__name__}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if not hasattr(obj, self.attr_name):
+            setattr(obj, self.attr_name, self.func(obj))
+        return getattr(obj, self.attr_name)
+
+
+def _make_variants(reference) -> Dict[str, type]:
+    """
+    为每种实现建一个只有 value 属性的类
+
+    用装饰器语法定义: 参考实现按函数名(而不是属性名)缓存
+    """
+
+    class Plain:
+        def __init__(self):
+            self.value = 42
+
+    class UsesLazy:
+        @LazyProperty
+        def value(self):
+            return 42
+
+    class UsesThreadSafe:
+        @ThreadSafeLazyProperty
+        def value(self):
+            return 42
+
+    class UsesSlot:
+        __slots__ = ("_value",)
+
+        @SlotLazyProperty
+        def value(self):
+            return 42
+
+    class UsesCached:
+        @functools.cached_property
+        def value(self):
+            return 42
+
+    class UsesLegacy:
+        @LegacyLazyProperty
+        def value(self):
+            return 42
+
+    variants = {
+        "plain attribute": Plain,
+        "LazyProperty": UsesLazy,
+        "ThreadSafeLazyProperty": UsesThreadSafe,
+        "SlotLazyProperty": UsesSlot,
+        "functools.cached_property": UsesCached,
+    }
+    if reference is not None:
+
+        class UsesReference:
+            @reference.lazy_property
+            def value(self):
+                return 42
+
+        variants["reference lazy_property"] = UsesReference
+    variants["legacy LazyProperty"] = UsesLegacy
+    return variants
+
+
+def bench_cached(cls: type, reads: int) -> float:
+    """缓存命中后每次读取的耗时(纳秒)"""
+    obj = cls()
+    obj.value
+    timings = timeit.repeat("obj.value", globals={"obj": obj}, number=reads, repeat=5)
+    return min(timings) / reads * 1e9
+
+
+def bench_first(cls: type, objects: int) -> float:
+    """新对象上首次访问的耗时(纳秒,已扣除创建对象的开销)"""
+    objs = [cls() for _ in range(objects)]
+    it = iter(objs)
+    # 每轮访问一个新对象,减去只取下一个对象的耗时
+    total = timeit.timeit("next(it).value", globals={"it": it}, number=objects)
+    it = iter(objs)
+    base = timeit.timeit("next(it)", globals={"it": it}, number=objects)
+    return max(total - base, 0.0) / objects * 1e9
+
+
+def run(reads: int, objects: int, reference_path: str) -> List[Dict]:
+    """运行所有实现"""
+    reference = _load_reference(reference_path)
+    results = []
+    for label, cls in _make_variants(reference).items():
+        first = bench_first(cls, objects) if label != "plain attribute" else None
+        results.append({
+            "variant": label,
+            "cached_ns": bench_cached(cls, reads),
+            "first_ns": first,
+        })
+    return results
+
+
+def _print_table(results: List[Dict], reference_loaded: bool) -> None:
+    baseline = results[0]["cached_ns"]
+    print(f"{'variant':<28}{'cached(ns)':>12}{'vs plain':>10}{'first(ns)':>12}")
+    print("-" * 62)
+    for r in results:
+        first = "-" if r["first_ns"] is None else f"{r['first_ns']:.1f}"
+        print(
+            f"{r['variant']:<28}{r['cached_ns']:>12.1f}"
+            f"{r['cached_ns'] / baseline:>9.2f}x{first:>12}"
+        )
+    if not reference_loaded:
+        print("(未找到参考实现,跳过 reference lazy_property)")
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="惰性属性微基准")
+    parser.add_argument("--reads", type=int, default=1000000, help="缓存命中读取次数")
+    parser.add_argument("--objects", type=int, default=100000, help="首次访问的对象数")
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="参考实现文件路径")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.reads, args.objects, args.reference)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results, os.path.exists(args.reference))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,603 @@
+"""
+对象池性能基准
+
+用法(在 improved-patterns 目录下运行):
+    python -m benchmarks.bench_pool burst
+    python -m benchmarks.bench_pool burst --threads 1 4 16 --cost 0.05 --json
+    python -m benchmarks.bench_pool contention --threads 1 4 16 64
+    python -m benchmarks.bench_pool strategy --threads 1 4 --size 16
+    python -m benchmarks.bench_pool suite --cost 0.001 --output baseline.json
+    python -m benchmarks.bench_pool suite --cost 0.001 --baseline baseline.json
+
+场景:
+    burst       冷启动突发: N 个线程同时从空池获取对象,比较锁内创建与锁外创建的获取延迟
+    contention  竞争: N 个线程反复获取/释放,比较共享队列、线程本地缓存与分片(对照组)的吞吐量
+    strategy    空闲对象选取策略: 比较 FIFO 与 LIFO 的对象复用分布和吞吐量
+    suite       回归基准套件: 无竞争、竞争、冷启动、超出容量的突发、大量超时五类负载,
+                输出吞吐量和获取延迟分位数(JSON),可与基线比较,退化时返回非零退出码
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import queue
+import statistics
+import sys
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from patterns.creational.pool import ObjectPool, PoolableObject
+
+
+class FakeResource(PoolableObject):
+    """创建开销可配置的假资源"""
+
+    def __init__(self, cost: float = 0.0):
+        self.in_use = False
+        if cost:
+            time.sleep(cost)
+
+    def reset(self) -> None:
+        self.in_use = False
+
+
+class SerialCreationPool(ObjectPool):
+    """对照组: 在全局锁内串行创建对象(旧版 acquire 的行为)"""
+
+    def __init__(self, *args, **kwargs):
+        self._serial_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _create_reserved(self, *args, **kwargs) -> PoolableObject:
+        with self._serial_lock:
+            return super()._create_reserved(*args, **kwargs)
+
+
+class ShardedPool:
+    """
+    对照组: 把容量平均拆分到多个独立的 ObjectPool 子池
+
+    线程首次访问时轮流绑定一个本地分片,本地分片没有空闲对象时从兄弟分片窃取,
+    都没有时在本地分片上等待。只实现基准需要的 acquire/release
+    """
+
+    def __init__(
+        self, factory: Callable[[], PoolableObject], min_size: int, max_size: int,
+        shards: int
+    ):
+        sizes = zip(_split_evenly(min_size, shards), _split_evenly(max_size, shards))
+        self.shards = [ObjectPool(factory, low, high) for low, high in sizes]
+        self._owners: Dict[int, ObjectPool] = {}
+        self._local = threading.local()
+        self._next_home = itertools.count()
+
+    def acquire(self) -> PoolableObject:
+        home = getattr(self._local, "home", None)
+        if home is None:
+            home = self._local.home = next(self._next_home) % len(self.shards)
+        count = len(self.shards)
+        for create in (False, True):
+            for offset in range(count):
+                shard = self.shards[(home + offset) % count]
+                obj = shard.try_acquire(create=create)
+                if obj is not None:
+                    self._owners[id(obj)] = shard
+                    return obj
+        shard = self.shards[home]
+        obj = shard.acquire()
+        self._owners[id(obj)] = shard
+        return obj
+
+    def release(self, obj: PoolableObject) -> None:
+        self._owners.pop(id(obj)).release(obj)
+
+
+def _split_evenly(total: int, parts: int) -> List[int]:
+    """把 total 尽量平均地拆成 parts 份"""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def make_pool(pool_cls: Callable[..., ObjectPool], **kwargs) -> ObjectPool:
+    """创建对象池并屏蔽构造时的打印输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pool_cls(**kwargs)
+
+
+def bench_burst(pool_cls: Callable[..., ObjectPool], threads: int, cost: float) -> Dict:
+    """
+    冷启动突发场景
+
+    Args:
+        pool_cls: 对象池类
+        threads: 并发获取的线程数
+        cost: 每次创建对象的耗时(秒)
+
+    Returns:
+        延迟统计(秒)
+    """
+    pool = make_pool(
+        pool_cls, factory=lambda: FakeResource(cost), min_size=0, max_size=threads
+    )
+    start_barrier = threading.Barrier(threads)
+    latencies: List[float] = []
+    latencies_lock = threading.Lock()
+
+    def worker():
+        start_barrier.wait()
+        begin = time.perf_counter()
+        pool.acquire()
+        elapsed = time.perf_counter() - begin
+        with latencies_lock:
+            latencies.append(elapsed)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    wall_begin = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - wall_begin
+
+    return {
+        "pool": pool_cls.__name__,
+        "threads": threads,
+        "cost": cost,
+        "wall": wall,
+        "mean": statistics.mean(latencies),
+        "max": max(latencies),
+    }
+
+
+def bench_contention(label: str, pool: Any, threads: int, ops: int) -> Dict:
+    """
+    竞争场景: 每个线程反复获取/释放 ops 次
+
+    Args:
+        label: 结果中的池名称
+        pool: 待测对象池(容量不小于线程数,测的是锁竞争而不是等待)
+        threads: 线程数
+        ops: 每个线程的获取/释放次数
+
+    Returns:
+        吞吐量统计
+    """
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        start_barrier.wait()
+        for _ in range(ops):
+            pool.release(pool.acquire())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    start_barrier.wait()
+    begin = time.perf_counter()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - begin
+
+    return {
+        "pool": label,
+        "threads": threads,
+        "ops": threads * ops,
+        "wall": wall,
+        "ops_per_sec": threads * ops / wall,
+    }
+
+
+def contention_pools(threads: int, shards: int) -> Dict[str, Any]:
+    """竞争场景参与比较的池配置"""
+    return {
+        "ObjectPool": make_pool(
+            ObjectPool, factory=FakeResource, min_size=threads, max_size=threads
+        ),
+        "ObjectPool+cache": make_pool(
+            ObjectPool, factory=FakeResource, min_size=threads, max_size=threads,
+            thread_cache_size=1
+        ),
+        "ShardedPool": make_pool(
+            ShardedPool, factory=FakeResource, min_size=threads, max_size=threads,
+            shards=min(shards, threads)
+        ),
+    }
+
+
+def bench_strategy(strategy: str, threads: int, ops: int, size: int) -> Dict:
+    """
+    选取策略场景: 池中有 size 个空闲对象,threads 个线程反复获取/释放
+
+    线程数小于池大小时,FIFO 会轮流使用全部对象,LIFO 只反复使用少数几个
+
+    Returns:
+        吞吐量和复用分布统计(hot_90 为覆盖 90% 借出次数所需的最少对象数)
+    """
+    pool = make_pool(
+        ObjectPool, factory=FakeResource, min_size=size, max_size=size,
+        strategy=strategy
+    )
+    result = bench_contention(strategy, pool, threads, ops)
+
+    uses = sorted((record.uses for record in pool._records.values()), reverse=True)
+    total = sum(uses)
+    covered = 0
+    hot = 0
+    for count in uses:
+        if covered >= 0.9 * total:
+            break
+        covered += count
+        hot += 1
+    result.update({
+        "size": size,
+        "touched": sum(1 for count in uses if count),
+        "hot_90": hot,
+        "max_share": uses[0] / total,
+        "uses_stdev": statistics.pstdev(uses),
+    })
+    return result
+
+
+def run_strategy(thread_counts: List[int], ops: int, size: int) -> List[Dict]:
+    """对每个线程数分别运行 FIFO 与 LIFO"""
+    results = []
+    for threads in thread_counts:
+        for strategy in ("fifo", "lifo"):
+            results.append(bench_strategy(strategy, threads, ops, size))
+    return results
+
+
+def run_contention(thread_counts: List[int], ops: int, shards: int) -> List[Dict]:
+    """对每个线程数分别运行各池配置"""
+    results = []
+    for threads in thread_counts:
+        for label, pool in contention_pools(threads, shards).items():
+            results.append(bench_contention(label, pool, threads, ops))
+    return results
+
+
+def run_burst(thread_counts: List[int], cost: float) -> List[Dict]:
+    """对每个线程数分别运行串行创建与并发创建两组"""
+    results = []
+    for threads in thread_counts:
+        for pool_cls in (SerialCreationPool, ObjectPool):
+            results.append(bench_burst(pool_cls, threads, cost))
+    return results
+
+
+def _print_contention_table(results: List[Dict]) -> None:
+    print(f"{'pool':<24}{'threads':>8}{'ops':>10}{'wall(ms)':>12}{'ops/s':>14}")
+    print("-" * 68)
+    for r in results:
+        print(
+            f"{r['pool']:<24}{r['threads']:>8}{r['ops']:>10}"
+            f"{r['wall'] * 1000:>12.1f}{r['ops_per_sec']:>14,.0f}"
+        )
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """延迟分位数(秒)"""
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(q: float) -> float:
+        return ordered[min(last, int(q * len(ordered)))]
+
+    return {
+        "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": ordered[last]
+    }
+
+
+def run_workers(
+    threads: int, body: Callable[[List[float]], None]
+) -> Tuple[float, List[float]]:
+    """
+    同时启动 threads 个线程执行 body,body 把每次获取的延迟追加到传入的列表
+
+    Returns:
+        (墙钟时间, 全部延迟样本)
+    """
+    start_barrier = threading.Barrier(threads + 1)
+    samples: List[List[float]] = [[] for _ in range(threads)]
+
+    def worker(out: List[float]) -> None:
+        start_barrier.wait()
+        body(out)
+
+    workers = [threading.Thread(target=worker, args=(out,)) for out in samples]
+    for t in workers:
+        t.start()
+    start_barrier.wait()
+    begin = time.perf_counter()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - begin
+    return wall, [x for out in samples for x in out]
+
+
+def _suite_result(
+    workload: str, threads: int, wall: float, samples: List[float], **extra: Any
+) -> Dict:
+    result = {
+        "workload": workload,
+        "threads": threads,
+        "ops": len(samples),
+        "wall": wall,
+        "ops_per_sec": len(samples) / wall,
+    }
+    result.update(percentiles(samples))
+    result.update(extra)
+    return result
+
+
+def bench_uncontended(ops: int, cost: float) -> Dict:
+    """无竞争: 单线程反复获取/释放同一个对象"""
+    pool = make_pool(
+        ObjectPool, factory=lambda: FakeResource(cost), min_size=1, max_size=1
+    )
+
+    def body(out: List[float]) -> None:
+        for _ in range(ops):
+            begin = time.perf_counter()
+            obj = pool.acquire()
+            out.append(time.perf_counter() - begin)
+            pool.release(obj)
+
+    wall, samples = run_workers(1, body)
+    return _suite_result("uncontended", 1, wall, samples)
+
+
+def bench_contended(threads: int, ops: int, cost: float) -> Dict:
+    """竞争: 线程数是对象数的两倍,反复获取/释放,获取延迟包含等待"""
+    size = max(1, threads // 2)
+    pool = make_pool(
+        ObjectPool, factory=lambda: FakeResource(cost), min_size=size, max_size=size
+    )
+
+    def body(out: List[float]) -> None:
+        for _ in range(ops):
+            begin = time.perf_counter()
+            obj = pool.acquire()
+            out.append(time.perf_counter() - begin)
+            pool.release(obj)
+
+    wall, samples = run_workers(threads, body)
+    return _suite_result("contended", threads, wall, samples, size=size)
+
+
+def bench_cold_start(threads: int, cost: float) -> Dict:
+    """冷启动: 空池上 threads 个线程同时获取,每个获取都要调用工厂"""
+    pool = make_pool(
+        ObjectPool, factory=lambda: FakeResource(cost), min_size=0, max_size=threads
+    )
+
+    def body(out: List[float]) -> None:
+        begin = time.perf_counter()
+        pool.acquire()
+        out.append(time.perf_counter() - begin)
+
+    wall, samples = run_workers(threads, body)
+    return _suite_result("cold_start", threads, wall, samples)
+
+
+def bench_overflow_burst(threads: int, max_size: int, hold: float, cost: float) -> Dict:
+    """超出容量的突发: threads 个线程争抢 max_size 个对象,每个持有 hold 秒"""
+    pool = make_pool(
+        ObjectPool, factory=lambda: FakeResource(cost), min_size=0, max_size=max_size
+    )
+
+    def body(out: List[float]) -> None:
+        begin = time.perf_counter()
+        obj = pool.acquire()
+        out.append(time.perf_counter() - begin)
+        time.sleep(hold)
+        pool.release(obj)
+
+    wall, samples = run_workers(threads, body)
+    return _suite_result("overflow_burst", threads, wall, samples, max_size=max_size)
+
+
+def bench_timeout_heavy(threads: int, ops: int, timeout: float, cost: float) -> Dict:
+    """
+    大量超时: 2 个对象、threads 个线程,持有时间是超时的两倍,多数获取以超时结束
+
+    额外报告超时比例和超时获取相对 timeout 的最大超出量
+    """
+    pool = make_pool(
+        ObjectPool, factory=lambda: FakeResource(cost), min_size=2, max_size=2
+    )
+    timeouts: List[float] = []
+    timeouts_lock = threading.Lock()
+
+    def body(out: List[float]) -> None:
+        for _ in range(ops):
+            begin = time.perf_counter()
+            try:
+                obj = pool.acquire(timeout=timeout)
+            except queue.Empty:
+                elapsed = time.perf_counter() - begin
+                out.append(elapsed)
+                with timeouts_lock:
+                    timeouts.append(elapsed)
+                continue
+            out.append(time.perf_counter() - begin)
+            time.sleep(timeout * 2)
+            pool.release(obj)
+
+    wall, samples = run_workers(threads, body)
+    overshoot = max((t - timeout for t in timeouts), default=0.0)
+    return _suite_result(
+        "timeout_heavy", threads, wall, samples,
+        timeout_rate=len(timeouts) / len(samples), timeout_overshoot=overshoot
+    )
+
+
+def run_suite(
+    thread_counts: List[int], ops: int, cost: float, timeout: float
+) -> List[Dict]:
+    """依次运行五类负载"""
+    results = [bench_uncontended(ops, cost)]
+    for threads in thread_counts:
+        results.append(bench_contended(threads, ops // threads or 1, cost))
+    for threads in thread_counts:
+        results.append(bench_cold_start(threads, cost))
+    for threads in thread_counts:
+        results.append(bench_overflow_burst(threads * 2, threads, cost * 4, cost))
+    results.append(bench_timeout_heavy(max(thread_counts), 10, timeout, cost))
+    return results
+
+
+def compare_to_baseline(
+    results: List[Dict], baseline: List[Dict], tolerance: float
+) -> List[str]:
+    """
+    与基线比较,吞吐量下降或 p99 延迟上升超过 tolerance(比例)视为退化
+
+    Returns:
+        退化描述,没有退化时为空列表
+    """
+    previous = {(r["workload"], r["threads"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r["workload"], r["threads"]))
+        if old is None:
+            continue
+        label = f"{r['workload']}[threads={r['threads']}]"
+        if r["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{label} ops/s {old['ops_per_sec']:,.0f} -> {r['ops_per_sec']:,.0f}"
+            )
+        if r["p99"] > old["p99"] * (1 + tolerance):
+            regressions.append(
+                f"{label} p99 {old['p99'] * 1000:.3f}ms -> {r['p99'] * 1000:.3f}ms"
+            )
+    return regressions
+
+
+def _print_suite_table(results: List[Dict]) -> None:
+    print(
+        f"{'workload':<16}{'threads':>8}{'ops':>8}{'ops/s':>12}"
+        f"{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}"
+    )
+    print("-" * 84)
+    for r in results:
+        print(
+            f"{r['workload']:<16}{r['threads']:>8}{r['ops']:>8}"
+            f"{r['ops_per_sec']:>12,.0f}"
+            f"{r['p50'] * 1000:>10.3f}{r['p90'] * 1000:>10.3f}"
+            f"{r['p99'] * 1000:>10.3f}{r['max'] * 1000:>10.3f}"
+        )
+
+
+def _print_strategy_table(results: List[Dict]) -> None:
+    print(
+        f"{'strategy':<10}{'threads':>8}{'size':>6}{'touched':>9}{'hot_90':>8}"
+        f"{'max_share':>11}{'ops/s':>14}"
+    )
+    print("-" * 66)
+    for r in results:
+        print(
+            f"{r['pool']:<10}{r['threads']:>8}{r['size']:>6}"
+            f"{r['touched']:>9}{r['hot_90']:>8}"
+            f"{r['max_share']:>11.1%}{r['ops_per_sec']:>14,.0f}"
+        )
+
+
+def _print_table(results: List[Dict]) -> None:
+    print(f"{'pool':<20}{'threads':>8}{'mean(ms)':>12}{'max(ms)':>12}{'wall(ms)':>12}")
+    print("-" * 64)
+    for r in results:
+        print(
+            f"{r['pool']:<20}{r['threads']:>8}"
+            f"{r['mean'] * 1000:>12.1f}{r['max'] * 1000:>12.1f}"
+            f"{r['wall'] * 1000:>12.1f}"
+        )
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="对象池性能基准")
+    sub = parser.add_subparsers(dest="scenario", required=True)
+
+    burst = sub.add_parser("burst", help="冷启动突发获取")
+    burst.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    burst.add_argument("--cost", type=float, default=0.05, help="单次创建耗时(秒)")
+    burst.add_argument("--json", action="store_true", help="输出 JSON")
+
+    contention = sub.add_parser("contention", help="多线程获取/释放吞吐量")
+    contention.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    contention.add_argument("--ops", type=int, default=20000, help="每个线程的操作次数")
+    contention.add_argument("--shards", type=int, default=8, help="分片池的分片数上限")
+    contention.add_argument("--json", action="store_true", help="输出 JSON")
+
+    strategy = sub.add_parser("strategy", help="FIFO/LIFO 复用分布与吞吐量")
+    strategy.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    strategy.add_argument("--ops", type=int, default=20000, help="每个线程的操作次数")
+    strategy.add_argument("--size", type=int, default=16, help="池中的对象数")
+    strategy.add_argument("--json", action="store_true", help="输出 JSON")
+
+    suite = sub.add_parser("suite", help="回归基准套件(五类负载,输出延迟分位数)")
+    suite.add_argument("--threads", type=int, nargs="+", default=[2, 4, 8, 16])
+    suite.add_argument("--ops", type=int, default=20000, help="获取/释放类负载的总操作次数")
+    suite.add_argument("--cost", type=float, default=0.001, help="单次创建耗时(秒)")
+    suite.add_argument("--timeout", type=float, default=0.005, help="超时负载的获取超时(秒)")
+    suite.add_argument("--json", action="store_true", help="输出 JSON")
+    suite.add_argument("--output", help="把 JSON 结果写入文件(可作为之后的基线)")
+    suite.add_argument("--baseline", help="与之前 --output 保存的结果比较")
+    suite.add_argument("--tolerance", type=float, default=0.25, help="允许的退化比例")
+
+    args = parser.parse_args(argv)
+    if args.scenario == "suite":
+        return _run_suite_command(args)
+    if args.scenario == "burst":
+        results = run_burst(args.threads, args.cost)
+        printer = _print_table
+    elif args.scenario == "strategy":
+        results = run_strategy(args.threads, args.ops, args.size)
+        printer = _print_strategy_table
+    else:
+        results = run_contention(args.threads, args.ops, args.shards)
+        printer = _print_contention_table
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        printer(results)
+
+
+def _run_suite_command(args: argparse.Namespace) -> int:
+    """suite 子命令: 运行、保存、与基线比较"""
+    results = run_suite(args.threads, args.ops, args.cost, args.timeout)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "cost": args.cost,
+            "timeout": args.timeout,
+            "ops": args.ops,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_suite_table(results)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"退化: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+单例性能基准
+
+用法(在 improved-patterns 目录下运行):
+    python -m benchmarks.bench_singleton read
+    python -m benchmarks.bench_singleton read --threads 1 4 8 --ops 200000 --json
+    python -m benchmarks.bench_singleton init --threads 16
+
+场景:
+    read  初始化完成后反复获取实例,比较 SingletonMeta(各作用域)的无锁读取
+          与加锁/双重检查写法的开销
+    init  多个线程同时首次获取实例,统计 __init__ 实际执行的次数
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Callable, Dict, List
+
+from patterns.creational.singleton import SingletonMeta
+
+
+class LockedSingleton:
+    """对照组: 每次获取都加锁"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+class DoubleCheckedSingleton:
+    """对照组: 旧版 Singleton 的写法(双重检查锁定 + __init__ 中的 hasattr 检查)"""
+
+    _instance = None
+    _lock = threading.Lock()
+    init_calls = 0
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, cost: float = 0.0):
+        if not hasattr(self, '_initialized'):
+            type(self).init_calls += 1
+            if cost:
+                time.sleep(cost)
+            self._initialized = True
+
+
+class MetaSingleton(metaclass=SingletonMeta):
+    """SingletonMeta 实现"""
+
+    init_calls = 0
+
+    def __init__(self, cost: float = 0.0):
+        type(self).init_calls += 1
+        if cost:
+            time.sleep(cost)
+
+
+class ThreadScoped(metaclass=SingletonMeta, scope="thread"):
+    """SingletonMeta thread 作用域"""
+
+
+class ContextScoped(metaclass=SingletonMeta, scope="context"):
+    """SingletonMeta context 作用域"""
+
+
+_MODULE_INSTANCE = object()
+
+
+def module_global() -> object:
+    """基线: 直接读取模块级变量"""
+    return _MODULE_INSTANCE
+
+
+READ_VARIANTS: Dict[str, Callable[[], object]] = {
+    "module global": module_global,
+    "SingletonMeta": MetaSingleton,
+    "scope=thread": ThreadScoped,
+    "scope=context": ContextScoped,
+    "double-checked": DoubleCheckedSingleton,
+    "locked": LockedSingleton,
+}
+
+
+def bench_read(label: str, get: Callable[[], object], threads: int, ops: int) -> Dict:
+    """
+    读取场景: 实例已建好,每个线程调用 get() ops 次
+
+    Returns:
+        每次获取的平均耗时(纳秒)和总吞吐量
+    """
+    get()
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        start_barrier.wait()
+        for _ in range(ops):
+            get()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    start_barrier.wait()
+    begin = time.perf_counter()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - begin
+
+    return {
+        "variant": label,
+        "threads": threads,
+        "ops": threads * ops,
+        "ns_per_op": wall / (threads * ops) * 1e9,
+        "ops_per_sec": threads * ops / wall,
+    }
+
+
+def bench_init(cls: type, threads: int, cost: float) -> Dict:
+    """
+    初始化场景: threads 个线程同时首次获取实例
+
+    Returns:
+        __init__ 执行次数与得到的不同实例数
+    """
+    if isinstance(cls, SingletonMeta):
+        cls.reset_instance()
+    else:
+        cls._instance = None
+    cls.init_calls = 0
+    start_barrier = threading.Barrier(threads)
+    instances: List[object] = []
+
+    def worker():
+        start_barrier.wait()
+        instances.append(cls(cost))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    begin = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - begin
+
+    return {
+        "variant": cls.__name__,
+        "threads": threads,
+        "init_calls": cls.init_calls,
+        "distinct_instances": len({id(i) for i in instances}),
+        "wall": wall,
+    }
+
+
+def run_read(thread_counts: List[int], ops: int) -> List[Dict]:
+    """对每个线程数分别运行各写法"""
+    return [
+        bench_read(label, get, threads, ops)
+        for threads in thread_counts
+        for label, get in READ_VARIANTS.items()
+    ]
+
+
+def run_init(thread_counts: List[int], cost: float) -> List[Dict]:
+    """对每个线程数分别比较旧写法与 SingletonMeta"""
+    return [
+        bench_init(cls, threads, cost)
+        for threads in thread_counts
+        for cls in (DoubleCheckedSingleton, MetaSingleton)
+    ]
+
+
+def _print_read_table(results: List[Dict]) -> None:
+    print(f"{'variant':<18}{'threads':>8}{'ops':>10}{'ns/op':>10}{'ops/s':>14}")
+    print("-" * 60)
+    for r in results:
+        print(
+            f"{r['variant']:<18}{r['threads']:>8}{r['ops']:>10}"
+            f"{r['ns_per_op']:>10.1f}{r['ops_per_sec']:>14,.0f}"
+        )
+
+
+def _print_init_table(results: List[Dict]) -> None:
+    print(
+        f"{'variant':<24}{'threads':>8}{'__init__':>10}"
+        f"{'instances':>11}{'wall(ms)':>10}"
+    )
+    print("-" * 63)
+    for r in results:
+        print(
+            f"{r['variant']:<24}{r['threads']:>8}{r['init_calls']:>10}"
+            f"{r['distinct_instances']:>11}{r['wall'] * 1000:>10.1f}"
+        )
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="单例性能基准")
+    sub = parser.add_subparsers(dest="scenario", required=True)
+
+    read = sub.add_parser("read", help="初始化后的获取开销")
+    read.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    read.add_argument("--ops", type=int, default=200000, help="每个线程的获取次数")
+    read.add_argument("--json", action="store_true", help="输出 JSON")
+
+    init = sub.add_parser("init", help="并发首次获取时 __init__ 的执行次数")
+    init.add_argument("--threads", type=int, nargs="+", default=[2, 8, 32])
+    init.add_argument("--cost", type=float, default=0.01, help="__init__ 耗时(秒)")
+    init.add_argument("--json", action="store_true", help="输出 JSON")
+
+    args = parser.parse_args(argv)
+    if args.scenario == "read":
+        results = run_read(args.threads, args.ops)
+        printer = _print_read_table
+    else:
+        results = run_init(args.threads, args.cost)
+        printer = _print_init_table
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        printer(results)
+
+
+if __name__ == "__main__":
+    main()
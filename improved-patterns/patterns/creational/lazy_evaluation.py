@@ -14,83 +14,990 @@ Python 实现说明:
     使用属性(property)实现延迟初始化
     使用生成器(generator)实现惰性序列
     使用装饰器封装惰性行为
+    LazyProperty 把结果写入实例字典的同名键,之后的访问不再经过描述符
+    SlotLazyProperty 用于 __slots__ 类,结果存放在预留的槽中
+    ThreadSafeLazyProperty 保证并发的首次访问只计算一次,invalidate() 丢弃缓存
+    DependencyTrackingMixin 在惰性属性依赖的属性被重新赋值或原地修改时使其失效
+    StreamingStats 对迭代器单遍计算统计量和近似分位数,可合并,DataReport 可以从生成器构建
+    安装了 NumPy 时,array.array/ndarray 等数值缓冲区走零拷贝的向量化路径
 """
+import array
+import collections.abc
+import itertools
+import math
+import operator
+import threading
 import time
-from typing import Callable, Any, Iterator, Optional
+import weakref
+from typing import (
+    Callable, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+)
 from functools import wraps
 
+from patterns.creational.singleton import SingletonMeta
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖,没有时使用纯 Python 实现
+    np = None
+
 
 # 惰性属性装饰器
 class LazyProperty:
-    """惰性属性装饰器"""
+    """
+    惰性属性装饰器
+
+    结果写入实例字典中与属性同名的键。LazyProperty 是非数据描述符,
+    实例字典优先,所以之后的访问就是普通的实例属性读取,不再调用 __get__
+    """
 
-    def __init__(self, func: Callable):
+    def __init__(self, func: Optional[Callable] = None, depends_on: Iterable[str] = ()):
         """
         初始化惰性属性
 
         Args:
-            func: 计算属性值的函数
+            func: 计算属性值的函数;省略时用作带参数的装饰器:
+                  @LazyProperty(depends_on=("data",))
+            depends_on: 计算所依赖的属性名,配合 DependencyTrackingMixin 自动失效
         """
+        self.depends_on = tuple(depends_on)
+        self.func: Optional[Callable] = None
+        self.name: Optional[str] = None
+        if func is not None:
+            self._bind(func)
+
+    def __call__(self, func: Callable) -> "LazyProperty":
+        """带参数的装饰器形式: 绑定计算函数"""
+        if self.func is not None:
+            raise TypeError(f"惰性属性 {self.name!r} 已经绑定了计算函数")
+        self._bind(func)
+        return self
+
+    def _bind(self, func: Callable) -> None:
         self.func = func
-        self.attr_name = f"_{func.__name__}"
+        self.name = func.__name__
+        wraps(func)(self)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
 
     def __get__(self, obj: Any, objtype: Any = None) -> Any:
-        """获取属性值,首次访问时计算"""
+        """首次访问时计算并缓存(缓存命中时不会调用到这里)"""
         if obj is None:
             return self
 
-        # 检查是否已缓存
-        if not hasattr(obj, self.attr_name):
-            # 首次访问,计算并缓存
+        value = self.func(obj)
+        obj.__dict__[self.name] = value
+        return value
+
+    def invalidate(self, obj: Any) -> None:
+        """丢弃 obj 上的缓存值,下次访问重新计算"""
+        obj.__dict__.pop(self.name, None)
+
+
+class SlotLazyProperty(LazyProperty):
+    """
+    适用于 __slots__ 类的惰性属性
+
+    __slots__ 类的实例没有 __dict__,结果存放在类预留的槽中,
+    槽名默认为 "_" + 属性名:
+
+        class Point:
+            __slots__ = ("x", "y", "_norm")
+
+            @SlotLazyProperty
+            def norm(self):
+                return math.hypot(self.x, self.y)
+
+    槽中的值无法绕过描述符直接读取,缓存命中时仍会调用一次 __get__
+    """
+
+    def __init__(
+        self,
+        func: Optional[Callable] = None,
+        slot: Optional[str] = None,
+        depends_on: Iterable[str] = (),
+    ):
+        """
+        初始化惰性属性
+
+        Args:
+            func: 计算属性值的函数
+            slot: 存放结果的槽名,默认为 "_" + 属性名
+            depends_on: 计算所依赖的属性名
+        """
+        super().__init__(func, depends_on)
+        self.slot = slot
+        self._get_slot = self._set_slot = self._del_slot = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        super().__set_name__(owner, name)
+        if self.slot is None:
+            self.slot = f"_{name}"
+        member = None
+        for klass in owner.__mro__:
+            if self.slot in klass.__dict__:
+                member = klass.__dict__[self.slot]
+                break
+        if member is None or not hasattr(member, "__set__"):
+            raise TypeError(
+                f"{owner.__name__}.__slots__ 中需要预留槽 {self.slot!r} "
+                f"来缓存惰性属性 {name!r}"
+            )
+        # attrgetter 是 C 实现的,比调用 member.__get__ 少一层方法包装
+        self._get_slot = operator.attrgetter(self.slot)
+        self._set_slot = member.__set__
+        self._del_slot = member.__delete__
+
+    def __get__(self, obj: Any, objtype: Any = None) -> Any:
+        """读取槽中缓存的值,槽为空时计算并写入"""
+        if obj is None:
+            return self
+        try:
+            return self._get_slot(obj)
+        except AttributeError:
             value = self.func(obj)
-            setattr(obj, self.attr_name, value)
+            self._set_slot(obj, value)
+            return value
+
+    def invalidate(self, obj: Any) -> None:
+        """清空 obj 上的槽,下次访问重新计算"""
+        try:
+            self._del_slot(obj)
+        except AttributeError:
+            pass
+
+
+# 缓存中没有值的标记(属性值本身可能是 None)
+_MISSING = object()
+
+
+class _Computation:
+    """某个实例上正在进行的一次计算"""
+
+    __slots__ = ("lock", "waiters", "generation")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = 0  # 正在计算或等待这次计算的线程数
+        self.generation = 0  # 每次 invalidate 加一,计算开始后变过的结果不写入缓存
+
+
+class ThreadSafeLazyProperty(LazyProperty):
+    """
+    线程安全的惰性属性
+
+    与 LazyProperty 一样缓存在实例字典中,缓存命中时不经过 __get__。
+    首次访问时,同一实例的并发读取者在该实例、该属性专属的锁上等待同一次计算;
+    计算抛出异常时不缓存,下一个读取者重新计算
+    """
+
+    def __init__(self, func: Optional[Callable] = None, depends_on: Iterable[str] = ()):
+        super().__init__(func, depends_on)
+        self._guard = threading.Lock()  # 只保护 _computing 的短临界区
+        self._computing: Dict[int, _Computation] = {}
+
+    def __get__(self, obj: Any, objtype: Any = None) -> Any:
+        """首次访问时计算并缓存(缓存命中时不会调用到这里)"""
+        if obj is None:
+            return self
+
+        cache = obj.__dict__
+        key = id(obj)  # 计算期间 obj 一直被引用,id 不会被复用
+        with self._guard:
+            value = cache.get(self.name, _MISSING)
+            if value is not _MISSING:
+                return value
+            computation = self._computing.get(key)
+            if computation is None:
+                computation = self._computing[key] = _Computation()
+            computation.waiters += 1
+
+        try:
+            with computation.lock:
+                value = cache.get(self.name, _MISSING)
+                if value is _MISSING:
+                    with self._guard:
+                        generation = computation.generation
+                    value = self.func(obj)
+                    with self._guard:
+                        if computation.generation == generation:
+                            cache[self.name] = value
+                return value
+        finally:
+            with self._guard:
+                computation.waiters -= 1
+                if computation.waiters == 0:
+                    del self._computing[key]
+
+    def invalidate(self, obj: Any) -> None:
+        """
+        丢弃 obj 上的缓存值,下次访问重新计算
+
+        正在进行的计算结果不会写入缓存;在此之后才开始的计算(包括之前在等待的读取者)照常缓存
+        """
+        with self._guard:
+            obj.__dict__.pop(self.name, None)
+            computation = self._computing.get(id(obj))
+            if computation is not None:
+                computation.generation += 1
 
-        return getattr(obj, self.attr_name)
+
+def invalidate(obj: Any, name: str) -> None:
+    """
+    丢弃 obj 上惰性属性 name 的缓存值,下次访问时重新计算
+
+    obj 使用 DependencyTrackingMixin 时,依赖 name 的惰性属性一并失效
+
+    Raises:
+        AttributeError: 类上没有名为 name 的惰性属性
+    """
+    descriptor = getattr(type(obj), name, None)
+    if not isinstance(descriptor, LazyProperty):
+        raise AttributeError(f"{type(obj).__name__} 没有名为 {name!r} 的惰性属性")
+    descriptor.invalidate(obj)
+    if isinstance(obj, DependencyTrackingMixin):
+        obj._invalidate_dependents(name)
+
+
+# 依赖跟踪
+class DependencyTrackingMixin:
+    """
+    依赖跟踪混入类: 惰性属性依赖的属性改变时自动使其失效
+
+    惰性属性用 depends_on 声明依赖的属性名(可以是普通属性,也可以是其他惰性属性):
+
+        class Report(DependencyTrackingMixin):
+            @ThreadSafeLazyProperty(depends_on=("data",))
+            def summary(self): ...
+
+            @LazyProperty(depends_on=("summary",))
+            def headline(self): ...
+
+    - 依赖的属性被重新赋值或删除时,依赖它的惰性属性(包括间接依赖)失效
+    - 赋给被依赖属性的 list/dict 会包装成 ObservableList/ObservableDict(复制一份),
+      之后通过该属性原地修改(append、update、下标赋值等)同样会使依赖它的惰性属性失效。
+      复制后属性不再是调用方传入的那个对象,修改调用方手里的原列表不会使缓存失效;
+      需要共享同一个容器时,直接赋值 ObservableList/ObservableDict(不会再复制)
+    - 只有受影响的惰性属性会在下次访问时重新计算
+
+    容器内部元素的修改(如 report.data[0].append(...))无法察觉
+    """
+
+    __slots__ = ()
+
+    # 属性名 -> 依赖它的惰性属性名(已展开间接依赖),类创建时计算
+    _lazy_dependents: Dict[str, Tuple[str, ...]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        direct: Dict[str, List[str]] = {}
+        seen = set()
+        for klass in cls.__mro__:
+            for name, attr in vars(klass).items():
+                if name in seen:
+                    continue
+                seen.add(name)
+                if isinstance(attr, LazyProperty):
+                    for dep in attr.depends_on:
+                        direct.setdefault(dep, []).append(name)
+
+        closure: Dict[str, Tuple[str, ...]] = {}
+        for dep in direct:
+            found: List[str] = []
+            stack = list(direct[dep])
+            while stack:
+                name = stack.pop()
+                if name not in found:
+                    found.append(name)
+                    stack.extend(direct.get(name, ()))
+            closure[dep] = tuple(found)
+        cls._lazy_dependents = closure
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in self._lazy_dependents:
+            super().__setattr__(name, value)
+            return
+        super().__setattr__(name, _observe(value, self, name))
+        self._invalidate_dependents(name)
+
+    def __delattr__(self, name: str) -> None:
+        super().__delattr__(name)
+        if name in self._lazy_dependents:
+            self._invalidate_dependents(name)
+
+    def _invalidate_dependents(self, name: str) -> None:
+        """使依赖 name 的惰性属性(包括间接依赖)失效"""
+        cls = type(self)
+        for prop in self._lazy_dependents.get(name, ()):
+            getattr(cls, prop).invalidate(self)
+
+
+def _mutator(method: Callable) -> Callable:
+    """包装容器的修改方法: 修改成功后通知关心该容器的对象"""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    return wrapper
+
+
+class _Observable:
+    """可观察容器的公共部分: 记录引用该容器的 (对象, 属性名),修改时通知"""
+
+    __slots__ = ()
+
+    def _watch(self, owner: Any, name: str) -> None:
+        # 同一个 (对象, 属性名) 只登记一次: 反复赋值同一个容器(如 obj.items += [...])
+        # 不会让观察者越积越多
+        watchers = [(ref, n) for ref, n in self._watchers if ref() is not None]
+        if not any(n == name and ref() is owner for ref, n in watchers):
+            watchers.append((weakref.ref(owner), name))
+        self._watchers = watchers
+
+    def _changed(self) -> None:
+        for ref, name in self._watchers:
+            owner = ref()
+            # 属性已经指向别的值时,旧容器的修改与该对象无关
+            if owner is not None and getattr(owner, name, None) is self:
+                owner._invalidate_dependents(name)
+
+
+class ObservableList(_Observable, list):
+    """原地修改时通知依赖方的 list"""
+
+    __slots__ = ("_watchers",)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._watchers: List[Tuple[weakref.ref, str]] = []
+
+    def __reduce__(self):
+        # 复制和序列化时不带上观察者
+        return type(self), (list(self),)
+
+    __setitem__ = _mutator(list.__setitem__)
+    __delitem__ = _mutator(list.__delitem__)
+    __iadd__ = _mutator(list.__iadd__)
+    __imul__ = _mutator(list.__imul__)
+    append = _mutator(list.append)
+    extend = _mutator(list.extend)
+    insert = _mutator(list.insert)
+    pop = _mutator(list.pop)
+    remove = _mutator(list.remove)
+    clear = _mutator(list.clear)
+    sort = _mutator(list.sort)
+    reverse = _mutator(list.reverse)
+
+
+class ObservableDict(_Observable, dict):
+    """原地修改时通知依赖方的 dict"""
+
+    __slots__ = ("_watchers",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._watchers: List[Tuple[weakref.ref, str]] = []
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    __setitem__ = _mutator(dict.__setitem__)
+    __delitem__ = _mutator(dict.__delitem__)
+    pop = _mutator(dict.pop)
+    popitem = _mutator(dict.popitem)
+    clear = _mutator(dict.clear)
+    update = _mutator(dict.update)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+def _observe(value: Any, owner: Any, name: str) -> Any:
+    """把赋给被依赖属性的 list/dict 包装成可观察容器"""
+    if type(value) is list:
+        value = ObservableList(value)
+    elif type(value) is dict:
+        value = ObservableDict(value)
+    elif not isinstance(value, _Observable):
+        return value
+    value._watch(owner, name)
+    return value
+
+
+# 流式统计
+class QuantileSketch:
+    """
+    近似分位数草图(DDSketch 的简化版)
+
+    按对数间隔分桶: 桶 k 覆盖 (gamma^(k-1), gamma^k],gamma = (1+a)/(1-a)。
+    估计值相对误差不超过 relative_accuracy,桶数只随数据的数量级增长。
+    两个草图按桶相加即可合并。绝对值小于 min_value 的值计入零桶
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        """
+        Args:
+            relative_accuracy: 分位数估计的相对误差上限
+            min_value: 能区分的最小绝对值
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy 必须在 (0, 1) 之间")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _key(self, x: float) -> int:
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        """桶的代表值,与桶内任意值的相对误差不超过 relative_accuracy"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, x: float) -> None:
+        """加入一个值"""
+        if x > self.min_value:
+            store = self.positive
+        elif x < -self.min_value:
+            store, x = self.negative, -x
+        else:
+            self.zero += 1
+            self.count += 1
+            return
+        key = self._key(x)
+        store[key] = store.get(key, 0) + 1
+        self.count += 1
+
+    def add_array(self, values: "np.ndarray") -> None:
+        """向量化地加入一个 NumPy 数组(需要 NumPy)"""
+        values = values.astype(np.float64, copy=False)
+        positive = values[values > self.min_value]
+        negative = -values[values < -self.min_value]
+        for store, part in ((self.positive, positive), (self.negative, negative)):
+            if not part.size:
+                continue
+            keys = np.ceil(np.log(part) / self._log_gamma).astype(np.int64)
+            low = int(keys.min())
+            # 桶号相对最小桶号的偏移做 bincount,O(n) 且不需要排序
+            counts = np.bincount(keys - low)
+            for offset in np.flatnonzero(counts).tolist():
+                key = low + offset
+                store[key] = store.get(key, 0) + int(counts[offset])
+        self.zero += values.size - positive.size - negative.size
+        self.count += values.size
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """把 other 的计数合并进来(两者的 relative_accuracy 必须相同)"""
+        if other.gamma != self.gamma:
+            raise ValueError("只能合并 relative_accuracy 相同的草图")
+        for mine, theirs in ((self.positive, other.positive),
+                             (self.negative, other.negative)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估计 q 分位数
+
+        Args:
+            q: 0 到 1 之间
+
+        Returns:
+            估计值,没有数据时返回 None
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q 必须在 [0, 1] 之间")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # 从小到大: 负数桶按 key 从大到小,然后零桶,然后正数桶按 key 从小到大
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """依次给出每个桶的代表值和计数(不保证顺序)"""
+        for key, n in self.negative.items():
+            yield -self._value(key), n
+        if self.zero:
+            yield 0.0, self.zero
+        for key, n in self.positive.items():
+            yield self._value(key), n
+
+
+def _numeric_buffer(values: Any) -> Optional["np.ndarray"]:
+    """
+    NumPy 可用且 values 是数值缓冲区(ndarray、array.array、memoryview)时,
+    返回共享同一块内存的一维 ndarray(不复制),否则返回 None
+    """
+    if np is None:
+        return None
+    if isinstance(values, np.ndarray):
+        arr = values
+    elif isinstance(values, (array.array, memoryview)):
+        arr = np.asarray(memoryview(values))
+    else:
+        return None
+    if arr.dtype.kind not in "iuf":
+        return None
+    return arr.reshape(-1)
+
+
+def histogram(
+    values: Iterable[float],
+    bins: int = 10,
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+) -> List[Tuple[float, float, int]]:
+    """
+    等宽直方图
+
+    数值缓冲区在 NumPy 可用时用 np.histogram 计算,否则逐个遍历。
+    落在 [lo, hi] 之外的值不计入;最后一个桶包含 hi
+
+    Args:
+        values: 数值序列
+        bins: 桶数
+        lo, hi: 范围,默认为数据的最小/最大值(需要额外遍历一次)
+
+    Returns:
+        [(桶下界, 桶上界, 计数), ...]
+    """
+    arr = _numeric_buffer(values)
+    if lo is None or hi is None:
+        if arr is not None:
+            if not arr.size:
+                return []
+            lo = arr.min().item() if lo is None else lo
+            hi = arr.max().item() if hi is None else hi
+        else:
+            values = list(values)
+            if not values:
+                return []
+            lo = min(values) if lo is None else lo
+            hi = max(values) if hi is None else hi
+
+    width = (hi - lo) / bins
+    edges = [lo + i * width for i in range(bins)] + [hi]
+    if arr is not None and width:
+        counts = np.histogram(arr, bins=bins, range=(lo, hi))[0].tolist()
+    elif arr is not None:
+        # 只有一个取值时 np.histogram 会自行扩大范围,这里全部计入第一个桶
+        counts = [int(np.count_nonzero(arr == lo))] + [0] * (bins - 1)
+    else:
+        counts = [0] * bins
+        for x in values:
+            if lo <= x <= hi:
+                i = int((x - lo) / width) if width else 0
+                counts[min(i, bins - 1)] += 1
+    return [(edges[i], edges[i + 1], counts[i]) for i in range(bins)]
+
+
+def _same_total(a: Any, b: Any) -> bool:
+    """两次求和的结果是否相同(都是 NaN 也算相同)"""
+    return a == b or (a != a and b != b)
+
+
+class StreamingStats:
+    """
+    单遍流式统计
+
+    一次遍历任意可迭代对象,计算 count/sum/mean/min/max/variance
+    (Welford 算法,数值稳定)和近似分位数(QuantileSketch),不保留数据本身。
+    多个部分结果可以用 merge 合并,便于分块或并行统计:
+
+        parts = [StreamingStats.of(chunk) for chunk in chunks]
+        total = functools.reduce(StreamingStats.merge, parts, StreamingStats())
+
+    list、tuple 等序列已经在内存中,不逐个遍历(也就不是单遍): sum、min、max 和平方差和
+    各用内建函数在 C 中遍历一次,分位数草图推迟到第一次需要分位数时再遍历一次建立。
+    在此之前只保留序列的引用;建立草图时发现序列的长度或总和变了,抛出 ValueError
+    """
+
+    # 向量化路径每次处理的元素数,限制临时数组的大小
+    CHUNK = 1 << 20
+    # 序列路径计算平方差和时每块的元素数,限制参照点列表的大小
+    SEQUENCE_CHUNK = 1 << 16
+
+    def __init__(
+        self, relative_accuracy: Optional[float] = 0.01, vectorize: bool = True
+    ):
+        """
+        Args:
+            relative_accuracy: 分位数草图的相对误差;None 表示不估计分位数
+            vectorize: NumPy 可用时,数值缓冲区是否走向量化路径
+        """
+        self.vectorize = vectorize
+        self.count = 0
+        self.sum = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # 与均值之差的平方和
+        self.min: Any = None
+        self.max: Any = None
+        self._sketch = (
+            QuantileSketch(relative_accuracy) if relative_accuracy is not None else None
+        )
+        # 已计入统计量、尚未计入草图的序列,以及加入时的长度和总和
+        self._unsketched: List[Tuple[Sequence, int, Any]] = []
+        self._sketch_lock = threading.Lock()
+
+    @property
+    def sketch(self) -> Optional[QuantileSketch]:
+        """
+        分位数草图,访问时先把尚未计入的序列补进去;关闭分位数估计时为 None
+
+        Raises:
+            ValueError: 尚未计入的序列在加入之后被修改过(长度或总和变了)
+        """
+        if self._unsketched:
+            with self._sketch_lock:
+                for values, n, total in self._unsketched:
+                    if len(values) != n or not _same_total(sum(values), total):
+                        raise ValueError(
+                            "序列在加入 StreamingStats 之后被修改,分位数已不可信"
+                        )
+                for values, _, _ in self._unsketched:
+                    collections.deque(map(self._sketch.add, values), maxlen=0)
+                # 全部计入后再清空,其他线程看到空列表时草图已经是完整的
+                self._unsketched = []
+        return self._sketch
+
+    @classmethod
+    def of(cls, values: Iterable[float], **kwargs) -> "StreamingStats":
+        """遍历一次 values 并返回统计结果"""
+        return cls(**kwargs).add_all(values)
+
+    def add(self, x: float) -> None:
+        """加入一个值"""
+        self._add_iterable((x,))
+
+    def add_all(self, values: Iterable[float]) -> "StreamingStats":
+        """
+        把 values 计入统计量
+
+        - 数值缓冲区(array.array、ndarray 等)且 NumPy 可用时,不复制数据,按块向量化计算
+        - 序列(list、tuple 等)用内建函数在 C 中计算,分位数草图推迟到需要时建立
+        - 其他可迭代对象(如生成器)逐个遍历一次
+
+        Returns:
+            self,便于链式调用
+        """
+        arr = _numeric_buffer(values) if self.vectorize else None
+        if arr is not None:
+            for start in range(0, arr.size, self.CHUNK):
+                self._add_array(arr[start:start + self.CHUNK])
+        elif isinstance(values, collections.abc.Sequence):
+            self._add_sequence(values)
+        else:
+            self._add_iterable(values)
+        return self
+
+    def _add_sequence(self, values: Sequence) -> None:
+        """
+        加入一个已在内存中的序列: 每一遍都是内建函数的 C 循环
+
+        平方差和按块用 math.dist 计算(到均值点的欧氏距离的平方),与两遍法一样数值稳定;
+        参照点列表和每块的切片最多 SEQUENCE_CHUNK 个元素,额外内存与数据量无关
+        """
+        n = len(values)
+        if not n:
+            return
+        total = sum(values)
+        mean = total / n
+        step = self.SEQUENCE_CHUNK
+        reference = [mean] * min(n, step)
+        it = iter(values)
+        m2 = 0.0
+        for _ in range(0, n, step):
+            part = tuple(itertools.islice(it, step))
+            point = reference if len(part) == len(reference) else reference[:len(part)]
+            m2 += math.dist(part, point) ** 2
+        self._merge_moments(n, total, mean, m2, min(values), max(values))
+        if self._sketch is not None:
+            self._unsketched.append((values, n, total))
+
+    def _add_iterable(self, values: Iterable[float]) -> None:
+        """逐个遍历 values,用 Welford 算法更新统计量"""
+        # 循环内只用局部变量,结束后再写回
+        count, total, mean, m2 = self.count, self.sum, self.mean, self._m2
+        lo, hi = self.min, self.max
+        sketch_add = self._sketch.add if self._sketch is not None else None
+        for x in values:
+            count += 1
+            total += x
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+            if lo is None or x < lo:
+                lo = x
+            if hi is None or x > hi:
+                hi = x
+            if sketch_add is not None:
+                sketch_add(x)
+        self.count, self.sum, self.mean, self._m2 = count, total, mean, m2
+        self.min, self.max = lo, hi
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """
+        把另一个部分结果合并进来(Chan 等人的并行方差合并公式)
+
+        Returns:
+            self
+        """
+        if self.sketch is not None:
+            if other.sketch is None:
+                raise ValueError("不能把没有分位数草图的结果合并进有草图的结果")
+            self.sketch.merge(other.sketch)
+        self._merge_moments(
+            other.count, other.sum, other.mean, other._m2, other.min, other.max
+        )
+        return self
+
+    def _add_array(self, chunk: "np.ndarray") -> None:
+        """向量化地加入一块数据: 先算出这块的统计量,再与已有结果合并"""
+        n = chunk.size
+        if not n:
+            return
+        # 整数求和用 int64 累加,避免小整数类型溢出
+        total = chunk.sum(dtype=np.int64 if chunk.dtype.kind in "iu" else np.float64)
+        mean = chunk.mean(dtype=np.float64)
+        m2 = float(np.square(chunk - mean).sum())
+        self._merge_moments(
+            n, total.item(), float(mean), m2, chunk.min().item(), chunk.max().item()
+        )
+        if self._sketch is not None:
+            self._sketch.add_array(chunk)
+
+    def _merge_moments(self, count, total, mean, m2, lo, hi) -> None:
+        """合并另一部分的计数、和、均值、平方差和与极值"""
+        if not count:
+            return
+        if not self.count:
+            self.mean, self._m2 = mean, m2
+            self.min, self.max = lo, hi
+        else:
+            n = self.count + count
+            delta = mean - self.mean
+            self._m2 += m2 + delta * delta * self.count * count / n
+            self.mean += delta * count / n
+            self.min = min(self.min, lo)
+            self.max = max(self.max, hi)
+        self.count += count
+        self.sum += total
+
+    @property
+    def variance(self) -> float:
+        """总体方差"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """总体标准差"""
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        近似 q 分位数,结果限制在 [min, max] 内(q=0/1 时就是精确的最小/最大值)
+
+        Raises:
+            ValueError: 创建时关闭了分位数估计
+        """
+        if self.sketch is None:
+            raise ValueError("创建时 relative_accuracy=None,没有分位数草图")
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+    def histogram(self, bins: int = 10) -> List[Tuple[float, float, int]]:
+        """
+        由分位数草图估计 [min, max] 上的等宽直方图(不需要原始数据)
+
+        每个草图桶的计数整体计入其代表值所在的直方图桶,
+        桶边界附近的值可能被计入相邻的桶(相对误差在 relative_accuracy 以内)
+
+        Raises:
+            ValueError: 创建时关闭了分位数估计
+        """
+        if self.sketch is None:
+            raise ValueError("创建时 relative_accuracy=None,没有分位数草图")
+        if not self.count:
+            return []
+        lo, hi = self.min, self.max
+        width = (hi - lo) / bins
+        counts = [0] * bins
+        for value, n in self.sketch.buckets():
+            value = min(max(value, lo), hi)
+            i = int((value - lo) / width) if width else 0
+            counts[min(i, bins - 1)] += n
+        edges = [lo + i * width for i in range(bins)] + [hi]
+        return [(edges[i], edges[i + 1], counts[i]) for i in range(bins)]
+
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        result = {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "variance": self.variance,
+        }
+        if self.sketch is not None:
+            for q in (0.5, 0.9, 0.99):
+                result[f"p{int(q * 100)}"] = self.quantile(q)
+        return result
 
 
 # 示例类 - 数据报告
-class DataReport:
-    """数据报告类,使用惰性属性"""
+class DataReport(DependencyTrackingMixin):
+    """
+    数据报告类,使用惰性属性
+
+    summary、quantiles、visualization 和 histogram 依赖 stats,stats 依赖 data:
+    重新赋值或原地修改 data 后,下次访问时重新计算。
+    from_iterable 从生成器构建报告,单遍统计,不保留全部数据
+    """
+
+    # 可视化显示的值的个数
+    PREVIEW = 10
+    # 直方图的桶数
+    BINS = 10
+    # from_iterable 构建时得到的统计结果(没有原始数据时 stats 的来源)
+    _streamed: Optional[StreamingStats] = None
 
     def __init__(self, data: list):
         """
         初始化报告
 
         Args:
-            data: 原始数据
+            data: 原始数据;也可以是 array.array 或 NumPy 数组,
+                  NumPy 可用时统计和直方图直接在其内存上向量化计算
         """
+        self._head: List[float] = []
         self.data = data
         print(f"报告初始化,数据量: {len(data)}")
 
-    @LazyProperty
+    @classmethod
+    def from_iterable(cls, values: Iterable[float]) -> "DataReport":
+        """
+        从任意可迭代对象(如生成器)构建报告
+
+        只遍历一次,统计量在遍历时流式计算,只保留前 PREVIEW 个值用于可视化;
+        报告的 data 为 None,stats 失效后仍使用构建时的统计结果
+
+        Args:
+            values: 数值序列
+        """
+        it = iter(values)
+        head = list(itertools.islice(it, cls.PREVIEW))
+        stats = StreamingStats().add_all(head).add_all(it)
+
+        report = cls.__new__(cls)
+        report._head = head
+        report._streamed = stats
+        report.data = None
+        print(f"报告初始化(流式),数据量: {stats.count}")
+        return report
+
+    @ThreadSafeLazyProperty(depends_on=("data",))
+    def stats(self) -> StreamingStats:
+        """统计 data(惰性);流式构建的报告没有原始数据,沿用构建时的结果"""
+        if self.data is None and self._streamed is not None:
+            return self._streamed
+        return StreamingStats.of(self.data)
+
+    @ThreadSafeLazyProperty(depends_on=("stats",))
     def summary(self) -> dict:
         """计算统计摘要(惰性)"""
         print("  计算统计摘要...")
         time.sleep(0.5)  # 模拟耗时计算
 
+        stats = self.stats
+        if not stats.count:
+            return {"total": 0, "sum": 0, "avg": 0, "max": 0, "min": 0, "variance": 0.0}
         return {
-            "total": len(self.data),
-            "sum": sum(self.data),
-            "avg": sum(self.data) / len(self.data) if self.data else 0,
-            "max": max(self.data) if self.data else 0,
-            "min": min(self.data) if self.data else 0,
+            "total": stats.count,
+            "sum": stats.sum,
+            "avg": stats.sum / stats.count,
+            "max": stats.max,
+            "min": stats.min,
+            "variance": stats.variance,
         }
 
-    @LazyProperty
+    @ThreadSafeLazyProperty(depends_on=("stats",))
+    def quantiles(self) -> dict:
+        """
+        近似分位数 p50/p90/p99(惰性)
+
+        内存中的 data 到这时才建立分位数草图,只要 summary 时不付出这部分开销
+        """
+        stats = self.stats
+        if not stats.count:
+            return {"p50": 0, "p90": 0, "p99": 0}
+        return {f"p{int(q * 100)}": stats.quantile(q) for q in (0.5, 0.9, 0.99)}
+
+    @ThreadSafeLazyProperty(depends_on=("stats",))
     def visualization(self) -> str:
         """生成可视化(惰性)"""
         print("  生成可视化...")
         time.sleep(0.3)  # 模拟耗时操作
 
         # 简单的条形图
-        max_val = max(self.data) if self.data else 1
+        max_val = self.stats.max if self.stats.count else 1
+        head = self._head if self.data is None else self.data[:self.PREVIEW]
         chart = []
-        for i, val in enumerate(self.data[:10]):  # 只显示前10个
+        for i, val in enumerate(head):  # 只显示前10个
             bar = "█" * int((val / max_val) * 20)
             chart.append(f"{i:2d}: {bar} ({val})")
 
         return "\n".join(chart)
 
+    @ThreadSafeLazyProperty(depends_on=("stats",))
+    def histogram(self) -> List[Tuple[float, float, int]]:
+        """
+        数据在 [min, max] 上的等宽直方图(惰性)
+
+        有原始数据时精确计算;流式构建的报告由分位数草图估计
+        """
+        stats = self.stats
+        if self.data is None:
+            return stats.histogram(self.BINS)
+        if not stats.count:
+            return []
+        return histogram(self.data, self.BINS, stats.min, stats.max)
+
 
 # 惰性序列生成器
 class LazySequence:
@@ -132,10 +1039,12 @@ class LazySequence:
 
 
 # 延迟初始化的资源类
-class HeavyResource:
-    """重量级资源类"""
+class HeavyResource(metaclass=SingletonMeta):
+    """
+    重量级资源类
 
-    _instance: Optional['HeavyResource'] = None
+    由 SingletonMeta 保证只初始化一次,因此可以交给 warm_up_singletons 在启动时预热
+    """
 
     def __init__(self):
         """初始化(延迟)"""
@@ -145,13 +1054,9 @@ class HeavyResource:
 
     @classmethod
     def get_instance(cls) -> 'HeavyResource':
-        """获取实例(延迟初始化)"""
-        if cls._instance is None:
-            print("首次访问,创建实例")
-            cls._instance = cls()
-        else:
-            print("复用已存在的实例")
-        return cls._instance
+        """获取实例(延迟初始化,实例由 SingletonMeta 缓存)"""
+        print("复用已存在的实例" if cls.initialized else "首次访问,创建实例")
+        return cls()
 
 
 def main():
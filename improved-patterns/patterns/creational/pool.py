@@ -11,14 +11,44 @@
     - 需要提高性能和资源利用率
 
 Python 实现说明:
-    使用队列管理可用对象
+    使用双端队列 + 条件变量管理可用对象
     提供获取(acquire)和释放(release)方法
     支持自动扩展和收缩
+    扩容时只在锁内预留名额,耗时的对象创建在锁外并发进行
+    支持空闲超时、最大生命周期、最大使用次数策略,后台线程定期收缩到 min_size
+    可选的线程本地缓存让线程复用自己刚释放的对象,绕过共享队列
+    可选的后台重置线程让 release 立即返回,对象重置、校验通过后才重新可借
+    可选的 PoolMetrics 记录等待/持有/创建耗时直方图和利用率时间线,未启用时没有开销
+    可选的 PoolAutoSizer 根据等待时间和空闲比例在上下限之间自动调整有效容量
+    等待者按优先级和截止时间排队,释放的对象直接交给优先级最高且未过期的等待者
+    acquire_many/release_many 整批只加一次锁,批量获取要么全部拿到要么不拿,避免批任务互相死锁
+    空闲对象默认先进先出(FIFO),可选后进先出(LIFO)让冷对象在空闲回收中老化淘汰
+    工厂失败后创建改为单飞并指数退避,连续失败时熔断器快速失败,避免故障期间的重连风暴
+    ProcessCapacity 用共享内存信号量限制预 fork 多进程的对象总数,池在 fork 后的子进程中自动重建
+    可选的延迟预热: 构造函数立即返回,后台并发创建 min_size 个对象,并按 spare 提前备好空闲对象
+    KeyedObjectPool 按键(如 (host, port))分组,同时受单键上限和全局上限约束
+    AsyncObjectPool 为 asyncio 提供不阻塞事件循环的对应实现
 """
+import asyncio
+import bisect
+import collections
+import heapq
+import contextlib
+import inspect
+import itertools
+import math
+import multiprocessing
+import os
 import queue
 import threading
 import time
-from typing import Any, Callable, Optional
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional,
+    Sequence, Set, Tuple, Union
+)
 from abc import ABC, abstractmethod
 
 
@@ -31,96 +61,2339 @@ class PoolableObject(ABC):
         """重置对象状态,准备被复用"""
         pass
 
+    def close(self) -> None:
+        """对象被池淘汰时调用,释放底层资源(默认无操作)"""
+        pass
+
+    def validate(self) -> bool:
+        """检查对象是否仍然可用,返回 False 的对象会被池丢弃(默认总是可用)"""
+        return True
+
+
+# 具体的可池化对象 - 数据库连接
+class DatabaseConnection(PoolableObject):
+    """数据库连接(模拟)"""
+
+    _id_counter = 0
+    _lock = threading.Lock()
+
+    def __init__(self, host: str = "localhost", port: int = 5432):
+        """
+        初始化数据库连接
+
+        Args:
+            host: 数据库主机
+            port: 数据库端口
+        """
+        with DatabaseConnection._lock:
+            DatabaseConnection._id_counter += 1
+            self.id = DatabaseConnection._id_counter
+
+        self.host = host
+        self.port = port
+        self.in_use = False
+        self.closed = False
+        self.query_count = 0
+
+        # 模拟创建连接的开销
+        print(f"  创建连接 #{self.id} (耗时操作...)")
+        time.sleep(0.1)  # 模拟连接时间
+
+    def execute(self, query: str) -> str:
+        """
+        执行查询
+
+        Args:
+            query: SQL 查询
+
+        Returns:
+            查询结果
+        """
+        self.query_count += 1
+        return f"连接 #{self.id} 执行: {query}"
+
+    def reset(self) -> None:
+        """重置连接状态"""
+        self.in_use = False
+        self.query_count = 0
+
+    def close(self) -> None:
+        """关闭连接"""
+        self.closed = True
+        print(f"  关闭连接 #{self.id}")
+
+    def validate(self) -> bool:
+        """检查连接是否仍然可用"""
+        return not self.closed
+
+    def __str__(self) -> str:
+        status = "使用中" if self.in_use else "空闲"
+        return f"Connection #{self.id} [{status}] (查询数: {self.query_count})"
+
+
+# 池指标
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class LatencyHistogram:
+    """固定桶边界的耗时直方图(秒),分位数按桶内线性插值估算"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            buckets: 递增的桶上界,超过最后一个上界的值落入溢出桶
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """记录一次观测值(调用方负责加锁)"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        估算分位数
+
+        Args:
+            q: 分位点,取值 0~1
+
+        Returns:
+            估算值,没有观测值时返回 0
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= target:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                fraction = (target - cumulative) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+    def to_prometheus(self, name: str, help_text: str) -> List[str]:
+        """导出为 Prometheus 文本格式的行(桶计数为累计值)"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class PoolMetrics:
+    """
+    对象池指标
+
+    记录获取等待时间、持有时间、创建耗时三个直方图,超时次数、峰值借出数,
+    以及环形缓冲区中的利用率采样时间线。传给 ObjectPool(metrics=...) 后生效,
+    池未配置指标时不做任何计时
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        timeline_size: int = 600,
+        sample_interval: float = 1.0
+    ):
+        """
+        初始化指标
+
+        Args:
+            buckets: 直方图桶上界(秒)
+            timeline_size: 时间线最多保留的采样点数
+            sample_interval: 时间线两次采样的最小间隔(秒)
+        """
+        self.wait_time = LatencyHistogram(buckets)
+        self.hold_time = LatencyHistogram(buckets)
+        self.create_time = LatencyHistogram(buckets)
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.sample_interval = sample_interval
+        self.timeline: Deque[Tuple[float, int, int]] = collections.deque(
+            maxlen=timeline_size
+        )
+        self._next_sample = 0.0
+        self._holds: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def _reinit_after_fork(self) -> None:
+        """子进程: 重建锁,父进程借出的对象与本进程无关"""
+        self._lock = threading.Lock()
+        self._holds.clear()
+        self.in_use = 0
+
+    def _maybe_sample_locked(self, now: float, total: int) -> None:
+        """距上次采样超过间隔时记录一个 (时间戳, 借出数, 总数) 采样点"""
+        if now >= self._next_sample:
+            self._next_sample = now + self.sample_interval
+            self.timeline.append((time.time(), self.in_use, total))
+
+    def on_acquire(self, obj: Any, wait: float, total: int) -> None:
+        """记录一次成功获取"""
+        self.on_acquire_many((obj,), wait, total)
+
+    def on_acquire_many(self, objs: Sequence[Any], wait: float, total: int) -> None:
+        """记录一次批量获取(整批共用一个等待时间,只加一次锁)"""
+        now = time.monotonic()
+        with self._lock:
+            self.wait_time.observe(wait)
+            for obj in objs:
+                self._holds[id(obj)] = now
+            self.in_use += len(objs)
+            if self.in_use > self.peak_in_use:
+                self.peak_in_use = self.in_use
+            self._maybe_sample_locked(now, total)
+
+    def on_release(self, obj: Any, total: int) -> None:
+        """记录一次释放"""
+        self.on_release_many((obj,), total)
+
+    def on_release_many(self, objs: Sequence[Any], total: int) -> None:
+        """记录一次批量释放(只加一次锁)"""
+        now = time.monotonic()
+        with self._lock:
+            released = 0
+            for obj in objs:
+                acquired_at = self._holds.pop(id(obj), None)
+                if acquired_at is None:
+                    continue
+                self.hold_time.observe(now - acquired_at)
+                released += 1
+            if not released:
+                return
+            self.in_use -= released
+            self._maybe_sample_locked(now, total)
+
+    def on_create(self, elapsed: float) -> None:
+        """记录一次对象创建耗时"""
+        with self._lock:
+            self.create_time.observe(elapsed)
+
+    def on_timeout(self) -> None:
+        """记录一次获取超时"""
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        with self._lock:
+            return {
+                "acquire_wait": self.wait_time.to_dict(),
+                "hold": self.hold_time.to_dict(),
+                "create": self.create_time.to_dict(),
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "timeline": [
+                    {"time": ts, "in_use": in_use, "total": total}
+                    for ts, in_use, total in self.timeline
+                ],
+            }
+
+    def to_prometheus(self, prefix: str = "object_pool") -> str:
+        """导出为 Prometheus 文本格式"""
+        with self._lock:
+            lines: List[str] = []
+            lines += self.wait_time.to_prometheus(
+                f"{prefix}_acquire_wait_seconds", "获取对象的等待时间"
+            )
+            lines += self.hold_time.to_prometheus(
+                f"{prefix}_hold_seconds", "对象被借出的持有时间"
+            )
+            lines += self.create_time.to_prometheus(
+                f"{prefix}_create_seconds", "创建对象的耗时"
+            )
+            lines += [
+                f"# HELP {prefix}_timeouts_total 获取超时次数",
+                f"# TYPE {prefix}_timeouts_total counter",
+                f"{prefix}_timeouts_total {self.timeouts}",
+                f"# HELP {prefix}_in_use 当前借出的对象数",
+                f"# TYPE {prefix}_in_use gauge",
+                f"{prefix}_in_use {self.in_use}",
+                f"# HELP {prefix}_peak_in_use 借出对象数的峰值",
+                f"# TYPE {prefix}_peak_in_use gauge",
+                f"{prefix}_peak_in_use {self.peak_in_use}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+# 自适应容量控制
+class PoolAutoSizer:
+    """
+    对象池容量自适应控制器(AIMD)
+
+    每个周期观察获取等待时间和空闲比例,在 [min_size, max_size] 内调整池的有效容量:
+    - 出现等待(或有线程阻塞)时加性增大容量
+    - 空闲比例过高时乘性缩小容量,并淘汰多余的空闲对象
+    - 用借出数的指数平滑加趋势外推预测下一周期的需求,提前创建对象
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = 1.0,
+        wait_threshold: float = 0.005,
+        idle_threshold: float = 0.5,
+        increase_step: int = 1,
+        decrease_factor: float = 0.75,
+        smoothing: float = 0.3,
+        headroom: float = 0.2,
+        initial_size: Optional[int] = None
+    ):
+        """
+        初始化控制器
+
+        Args:
+            interval: 调整周期(秒),为 None 时不启动后台线程,需手动调用 tick()
+            wait_threshold: 周期内最大获取等待时间超过该值(秒)视为容量不足
+            idle_threshold: 空闲对象占比超过该值视为容量过剩
+            increase_step: 每次加性增大的对象数
+            decrease_factor: 每次乘性缩小的比例
+            smoothing: 借出数指数平滑系数(0~1,越大越灵敏)
+            headroom: 在预测需求之上预留的比例
+            initial_size: 初始有效容量,默认等于 max_size
+        """
+        self.interval = interval
+        self.wait_threshold = wait_threshold
+        self.idle_threshold = idle_threshold
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.initial_size = initial_size
+        self.predicted_demand = 0.0
+        self.last_decision = "hold"
+        self.decisions = {"increase": 0, "decrease": 0, "hold": 0}
+        self._max_wait = 0.0
+        self._pool_ref: Optional["weakref.ref"] = None
+        self._stop = threading.Event()
+
+    def attach(self, pool: "ObjectPool") -> None:
+        """绑定对象池(由 ObjectPool 构造时调用),设置初始容量并启动后台线程"""
+        if self._pool_ref is not None:
+            raise ValueError("PoolAutoSizer 只能绑定一个对象池")
+        self._pool_ref = weakref.ref(pool)
+        if self.initial_size is not None:
+            pool.set_target_size(self.initial_size)
+        self._start()
+
+    def _start(self) -> None:
+        """启动后台线程(fork 后的子进程中重新调用)"""
+        if self.interval is not None:
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._run, name="ObjectPool-autosizer", daemon=True
+            ).start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.tick():
+                return
+
+    def stop(self) -> None:
+        """停止后台线程"""
+        self._stop.set()
+
+    def record_wait(self, wait: float) -> None:
+        """记录一次获取等待时间(只保留周期内的最大值)"""
+        if wait > self._max_wait:
+            self._max_wait = wait
+
+    def tick(self) -> bool:
+        """
+        执行一次调整
+
+        Returns:
+            绑定的池已被回收时返回 False
+        """
+        pool = self._pool_ref() if self._pool_ref is not None else None
+        if pool is None:
+            return False
+
+        stats = pool.get_stats()
+        in_use = stats["in_use"]
+        idle = stats["available"] + stats["cached"]
+        waited, self._max_wait = self._max_wait, 0.0
+
+        previous = self.predicted_demand
+        self.predicted_demand = (
+            self.smoothing * in_use + (1 - self.smoothing) * previous
+        )
+        # 按平滑值的变化趋势外推一个周期
+        forecast = max(0.0, 2 * self.predicted_demand - previous)
+        wanted = min(pool.max_size, math.ceil(forecast * (1 + self.headroom)))
+
+        target = pool.target_size
+        if waited > self.wait_threshold or stats["waiting"]:
+            decision = "increase"
+            target = min(pool.max_size, target + self.increase_step)
+        elif stats["total"] and idle / stats["total"] > self.idle_threshold:
+            decision = "decrease"
+            target = max(pool.min_size, in_use, int(target * self.decrease_factor))
+        else:
+            decision = "hold"
+        target = max(target, wanted)
+
+        self.last_decision = decision
+        self.decisions[decision] += 1
+        pool.set_target_size(target)
+        if target < stats["total"]:
+            pool.shrink_idle(target)
+        pool._replenish(min(wanted, target))
+        return True
+
+    def to_dict(self) -> dict:
+        """导出控制器状态"""
+        return {
+            "predicted_demand": self.predicted_demand,
+            "last_decision": self.last_decision,
+            "decisions": dict(self.decisions),
+        }
+
+
+# 对象创建熔断
+class FactoryUnavailable(RuntimeError):
+    """工厂暂不可用: 熔断器处于退避期,或共享的创建尝试失败(__cause__ 为工厂抛出的异常)"""
+
+
+class _Flight:
+    """一次共享的创建尝试,其他调用方等待它的结果"""
+
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class CreationBreaker:
+    """
+    对象创建熔断器
+
+    工厂正常时创建可以并发进行;一旦失败:
+    - 单飞: 同一时刻只有一个调用方真正调用工厂,其余调用方共享它的结果,
+      失败时一起以 FactoryUnavailable 失败,成功后恢复并发创建
+    - 连续失败达到 failure_threshold 次后熔断打开,在退避期内所有创建立即失败,
+      退避时间从 backoff_base 起每次失败翻倍,不超过 backoff_max
+    - 退避期结束后放行一次探测(半开),成功则关闭熔断器
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff_base: float = 0.1,
+        backoff_max: float = 30.0
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 打开熔断器所需的连续失败次数
+            backoff_base: 第一次打开时的退避时间(秒)
+            backoff_max: 退避时间上限(秒)
+        """
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failures = 0  # 连续失败次数
+        self.rejected = 0  # 退避期内被拒绝的创建次数
+        self.last_error: Optional[BaseException] = None
+        self._retry_at = 0.0
+        self._flight: Optional[_Flight] = None
+        self._lock = threading.Lock()
+
+    def _reinit_after_fork(self) -> None:
+        """子进程: 重建锁,丢弃 fork 时可能正在进行的共享尝试"""
+        self._lock = threading.Lock()
+        self._flight = None
+
+    def _state_locked(self, now: float) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "open" if now < self._retry_at else "half_open"
+
+    @property
+    def state(self) -> str:
+        """
+        closed(连续失败未达阈值)、open(退避期,快速失败)或 half_open(退避结束,等待探测)
+
+        closed 状态下出现过失败时创建已改为单飞,见 single_flight
+        """
+        with self._lock:
+            return self._state_locked(time.monotonic())
+
+    @property
+    def single_flight(self) -> bool:
+        """是否处于单飞模式(最近一次创建失败,尚未成功过)"""
+        return self.failures > 0
+
+    def call(
+        self, factory: Callable[[], Any], deadline: Optional[float] = None
+    ) -> Any:
+        """
+        经熔断器调用工厂
+
+        Args:
+            factory: 工厂函数
+            deadline: 共享别人的创建尝试时最多等到的时刻(time.monotonic()),
+                None 表示一直等待;自己调用工厂时不受它限制
+
+        Raises:
+            FactoryUnavailable: 熔断器打开,或共享的创建尝试失败
+            queue.Empty: 共享的创建尝试到 deadline 仍未结束
+        """
+        while True:
+            with self._lock:
+                if not self.failures:
+                    flight = None
+                    leader = True
+                else:
+                    if time.monotonic() < self._retry_at:
+                        self.rejected += 1
+                        raise FactoryUnavailable("对象创建熔断中") from self.last_error
+                    flight = self._flight
+                    leader = flight is None
+                    if leader:
+                        flight = self._flight = _Flight()
+
+            if leader:
+                return self._attempt(factory, flight)
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            if not flight.done.wait(remaining):
+                raise queue.Empty
+            if flight.error is not None:
+                raise FactoryUnavailable("共享的创建尝试失败") from flight.error
+            # 探测成功,工厂已恢复,自己重新创建
+
+    def _attempt(self, factory: Callable[[], Any], flight: Optional[_Flight]) -> Any:
+        """实际调用工厂并更新状态,flight 不为 None 时把结果通知给共享它的调用方"""
+        try:
+            obj = factory()
+        except BaseException as exc:
+            with self._lock:
+                self.failures += 1
+                self.last_error = exc
+                if self.failures >= self.failure_threshold:
+                    exponent = self.failures - self.failure_threshold
+                    backoff = min(self.backoff_base * 2 ** exponent, self.backoff_max)
+                    self._retry_at = time.monotonic() + backoff
+                if flight is not None:
+                    flight.error = exc
+                    self._flight = None
+            if flight is not None:
+                flight.done.set()
+            raise
+
+        with self._lock:
+            self.failures = 0
+            self.last_error = None
+            self._retry_at = 0.0
+            if flight is not None:
+                self._flight = None
+        if flight is not None:
+            flight.done.set()
+        return obj
+
+    def to_dict(self) -> dict:
+        """导出状态"""
+        with self._lock:
+            now = time.monotonic()
+            error = self.last_error
+            return {
+                "state": self._state_locked(now),
+                "single_flight": bool(self.failures),
+                "consecutive_failures": self.failures,
+                "retry_in": max(self._retry_at - now, 0.0) if self.failures else 0.0,
+                "rejected": self.rejected,
+                "last_error": None if error is None else repr(error),
+            }
+
+
+# fork 后需要在子进程中重建状态的对象(ObjectPool、ProcessCapacity)
+_FORK_AWARE: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+# 跨进程容量令牌
+class ProcessCapacity:
+    """
+    跨进程共享的对象容量令牌(预 fork 多进程服务器)
+
+    每个对象(包括正在创建的)占用一个令牌,令牌来自共享内存中的有界信号量,
+    因此所有 fork 出的工作进程加起来的对象数不超过 max_total。
+    必须在 fork 之前(主进程中)创建;子进程继承同一个信号量,
+    但不继承父进程持有的令牌计数。
+
+    注意: 进程被强制杀死时它持有的令牌不会归还,需要由进程管理器重启整个进程组
+    """
+
+    def __init__(self, max_total: int, poll_interval: float = 0.05):
+        """
+        初始化容量令牌
+
+        Args:
+            max_total: 所有进程合计的最大对象数
+            poll_interval: 等待者检查其他进程是否归还了令牌的间隔(秒)
+        """
+        self.max_total = max_total
+        self.poll_interval = poll_interval
+        self._sem = multiprocessing.BoundedSemaphore(max_total)
+        self._held = 0  # 本进程持有的令牌数
+        self._lock = threading.Lock()
+        _FORK_AWARE.add(self)
+
+    def _reinit_after_fork(self) -> None:
+        """子进程: 令牌仍归父进程所有,本进程从零开始计数"""
+        self._held = 0
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> int:
+        """本进程持有的令牌数"""
+        return self._held
+
+    def try_take(self, n: int = 1) -> bool:
+        """非阻塞地取 n 个令牌,不足时一个也不取"""
+        taken = 0
+        while taken < n and self._sem.acquire(False):
+            taken += 1
+        if taken < n:
+            for _ in range(taken):
+                self._sem.release()
+            return False
+        with self._lock:
+            self._held += n
+        return True
+
+    def give(self, n: int = 1) -> None:
+        """归还 n 个令牌"""
+        with self._lock:
+            self._held -= n
+        for _ in range(n):
+            self._sem.release()
+
+    def available(self) -> Optional[int]:
+        """所有进程合计还剩的令牌数(平台不支持时返回 None)"""
+        try:
+            return self._sem.get_value()
+        except NotImplementedError:
+            return None
+
+    def to_dict(self) -> dict:
+        """导出状态"""
+        return {
+            "max_total": self.max_total,
+            "held": self._held,
+            "available": self.available(),
+        }
+
+
+def _reinit_after_fork() -> None:
+    """
+    os.register_at_fork 回调: 在子进程中重建所有仍存活的池和容量令牌
+
+    整个模块只注册这一个回调(注册后无法撤销),对象只登记在弱引用集合中,
+    被回收后自动移除,短命的池不会让回调越积越多
+    """
+    for target in list(_FORK_AWARE):
+        target._reinit_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+# 等待优先级
+class Priority(IntEnum):
+    """acquire 的优先级,数值越小越先被服务"""
+
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    BATCH = 3
+
+
+class DeadlineExceeded(queue.Empty):
+    """请求已错过截止时间(继承 queue.Empty,按超时处理的调用方无需改动)"""
+
+
+class _Waiter:
+    """
+    阻塞在 acquire/acquire_many 中的等待者
+
+    每个等待者有自己的条件变量(共享池锁),释放方把对象或创建名额
+    直接交给选中的等待者,只唤醒它一个;批量等待者一次拿到全部 need 份
+    """
+
+    __slots__ = ("need", "expires", "cond", "objs", "reserved", "active")
+
+    def __init__(self, lock: threading.Lock, need: int, expires: Optional[float]):
+        self.need = need
+        self.expires = expires  # 超时或截止时间中较早的一个,过后不再接收对象
+        self.cond = threading.Condition(lock)
+        self.objs: List[PoolableObject] = []
+        self.reserved = 0  # 分到的创建名额数
+        self.active = True  # 离开队列后置为 False,堆中的条目惰性删除
+
+    @property
+    def granted(self) -> bool:
+        return bool(self.objs) or self.reserved > 0
+
+
+# 池中对象的元数据
+class _PooledRecord:
+    """记录对象的创建时间、进入空闲的时间和借出次数"""
+
+    __slots__ = ("created_at", "idle_since", "uses")
+
+    def __init__(self, now: float, uses: int = 0):
+        self.created_at = now
+        self.idle_since = now
+        self.uses = uses
+
+
+# 线程本地缓存
+class _ThreadCache:
+    """单个线程缓存的空闲对象(类似内存分配器的 thread cache)"""
+
+    __slots__ = ("items", "spill", "__weakref__")
+
+    def __init__(self):
+        self.items: Deque[PoolableObject] = collections.deque()
+        self.spill: Optional[weakref.finalize] = None  # 线程退出时的溢出回调
+
+
+def _spill_thread_cache(pool_ref: "weakref.ref", items: Deque[PoolableObject]) -> None:
+    """线程退出时把缓存中的对象归还全局池(_put_idle 丢弃没有记录的对象)"""
+    pool = pool_ref()
+    if pool is None:
+        return
+    while True:
+        try:
+            obj = items.pop()
+        except IndexError:
+            return
+        pool._put_idle(obj)
+
+
+_STOP = object()  # 通知后台重置线程退出的标记
+
+
+def _reset_worker_loop(pool_ref: "weakref.ref", tasks: "queue.Queue") -> None:
+    """后台重置线程: 逐个重置、校验归还的对象"""
+    while True:
+        obj = tasks.get()
+        try:
+            if obj is _STOP:
+                return
+            pool = pool_ref()
+            if pool is None:
+                return
+            pool._finish_reset(obj)
+            del pool
+        finally:
+            tasks.task_done()
+
+
+def _reaper_loop(
+    pool_ref: "weakref.ref", stop: threading.Event, interval: float
+) -> None:
+    """后台回收线程: 只持有池的弱引用,池被回收后自动退出"""
+    while not stop.wait(interval):
+        pool = pool_ref()
+        if pool is None:
+            return
+        pool.evict_expired()
+        del pool
+
+
+# 对象池
+class ObjectPool:
+    """通用对象池"""
+
+    def __init__(
+        self,
+        factory: Callable[[], PoolableObject],
+        min_size: int = 2,
+        max_size: int = 10,
+        max_idle_time: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        max_uses: Optional[int] = None,
+        reap_interval: Optional[float] = None,
+        thread_cache_size: int = 0,
+        background_reset: bool = False,
+        validate_on_borrow: bool = False,
+        validate_while_idle: bool = False,
+        metrics: Optional[PoolMetrics] = None,
+        autosizer: Optional[PoolAutoSizer] = None,
+        strategy: str = "fifo",
+        breaker: Optional[CreationBreaker] = None,
+        capacity: Optional[ProcessCapacity] = None,
+        lazy_warmup: bool = False,
+        spare: int = 0
+    ):
+        """
+        初始化对象池
+
+        Args:
+            factory: 对象工厂函数
+            min_size: 最小池大小
+            max_size: 最大池大小
+            max_idle_time: 空闲超过该时长(秒)的对象会被回收,总数不低于 min_size
+            max_lifetime: 创建后超过该时长(秒)的对象会被回收并补足到 min_size
+            max_uses: 对象被借出该次数后,归还时直接淘汰
+            reap_interval: 后台回收线程的扫描间隔(秒),默认取上述时长中较小者的一半
+            thread_cache_size: 每个线程最多缓存的空闲对象数,0 表示不启用线程缓存
+            background_reset: 为 True 时 release 立即返回,由后台线程重置并校验对象
+            validate_on_borrow: 借出前调用 validate(),失败的对象被丢弃并重新获取
+            validate_while_idle: 回收线程每轮校验空闲对象(未设置时长策略时每 30 秒一轮)
+            metrics: 指标收集器,为 None 时不做任何计时
+            autosizer: 容量自适应控制器,在 [min_size, max_size] 内调整有效容量 target_size
+            strategy: 空闲对象的选取策略,"fifo" 轮流使用所有对象,
+                "lifo" 优先复用最近释放的对象,冷对象可被空闲回收淘汰
+            breaker: 对象创建熔断器,为 None 时使用默认参数的 CreationBreaker
+            capacity: 跨进程容量令牌,每个对象占用一个令牌,多个进程(或池)共享总上限
+            lazy_warmup: 为 True 时构造函数立即返回,由后台线程并发创建 min_size 个对象
+            spare: 在借出对象之外提前备好的空闲对象数,借出后在后台补足
+        """
+        if strategy not in ("fifo", "lifo"):
+            raise ValueError(f"未知的空闲对象策略: {strategy}")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+        self.max_uses = max_uses
+        self.thread_cache_size = thread_cache_size
+        self.background_reset = background_reset
+        self.validate_on_borrow = validate_on_borrow
+        self.validate_while_idle = validate_while_idle
+        self.metrics = metrics
+        self.autosizer = autosizer
+        self.strategy = strategy
+        self.breaker = breaker if breaker is not None else CreationBreaker()
+        self.capacity = capacity
+        self.lazy_warmup = lazy_warmup
+        self.spare = spare
+        self._lifo = strategy == "lifo"
+        self.target_size = max_size  # 有效容量上限,由 autosizer 调整
+        self._init_state()
+
+        # 预创建最小数量的对象
+        print(f"初始化对象池 (min={min_size}, max={max_size})")
+        if not lazy_warmup:
+            for _ in range(min_size):
+                self._create_object()
+        self._start_fill()
+
+        # 设置了时长策略或空闲校验时启动后台回收线程
+        limits = [t for t in (max_idle_time, max_lifetime) if t is not None]
+        if (limits or validate_while_idle) and reap_interval is None:
+            reap_interval = min(limits) / 2 if limits else 30.0
+        self._reap_interval = reap_interval if limits or validate_while_idle else None
+        self._start_workers()
+
+        if autosizer is not None:
+            autosizer.attach(self)
+            weakref.finalize(self, autosizer.stop)
+
+        # fork 后子进程不能沿用父进程的对象、锁和线程
+        _FORK_AWARE.add(self)
+
+    def _init_state(self) -> None:
+        """初始化(或在 fork 后的子进程中重置)对象和计数"""
+        self.size = 0  # 已创建的对象数 + 已预留但仍在创建中的名额
+        self._idle: Deque[PoolableObject] = collections.deque()
+        self._records: Dict[int, _PooledRecord] = {}
+        self._evictions = {
+            "idle": 0, "lifetime": 0, "uses": 0, "invalid": 0, "autosize": 0
+        }
+        self._creating = 0
+        self._resetting = 0
+        self._validating = 0
+        self._waiting = 0
+        self._warming = 0  # 后台预热/备用创建中的对象数
+        self._filler: Optional[ThreadPoolExecutor] = None
+        self._waiters: List[Tuple[int, float, int, _Waiter]] = []  # 按 (优先级, 截止时间) 排序的堆
+        self._waiter_seq = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._caches: "weakref.WeakSet[_ThreadCache]" = weakref.WeakSet()
+
+    def _start_workers(self) -> None:
+        """启动后台回收线程和后台重置线程(按配置)"""
+        self._reaper_stop = threading.Event()
+        if self._reap_interval is not None:
+            reaper = threading.Thread(
+                target=_reaper_loop,
+                args=(weakref.ref(self), self._reaper_stop, self._reap_interval),
+                name="ObjectPool-reaper",
+                daemon=True
+            )
+            reaper.start()
+            weakref.finalize(self, self._reaper_stop.set)
+
+        self._reset_tasks: Optional[queue.Queue] = None
+        if self.background_reset:
+            self._reset_tasks = queue.Queue()
+            worker = threading.Thread(
+                target=_reset_worker_loop,
+                args=(weakref.ref(self), self._reset_tasks),
+                name="ObjectPool-reset",
+                daemon=True
+            )
+            worker.start()
+            weakref.finalize(self, self._reset_tasks.put, _STOP)
+
+    def _reinit_after_fork(self) -> None:
+        """
+        fork 后的子进程: 丢弃从父进程继承的对象并重建锁和后台线程
+
+        继承来的对象不调用 close(),它们的底层资源(如套接字)仍由父进程使用;
+        它们占用的令牌也仍归父进程。子进程的对象按需重新创建。
+        继承来的线程缓存先被清空并撤销溢出回调,否则它们被回收时会把父进程的对象
+        溢出到子进程新的空闲队列中
+        """
+        for cache in list(self._caches):
+            cache.spill.detach()
+            cache.items.clear()
+        self._init_state()
+        self.breaker._reinit_after_fork()
+        if self.metrics is not None:
+            self.metrics._reinit_after_fork()
+        self._start_workers()
+        if self.autosizer is not None:
+            self.autosizer._start()
+
+    def _call_factory(self, deadline: Optional[float] = None) -> PoolableObject:
+        """经熔断器调用工厂,共享别人的创建尝试时最多等到 deadline"""
+        return self.breaker.call(self._timed_factory, deadline)
+
+    def _timed_factory(self) -> PoolableObject:
+        """调用工厂,启用指标时记录创建耗时"""
+        if self.metrics is None:
+            return self.factory()
+        start = time.perf_counter()
+        obj = self.factory()
+        self.metrics.on_create(time.perf_counter() - start)
+        return obj
+
+    def _add_size_locked(self, n: int) -> bool:
+        """
+        增加 n 个名额(需持有锁);设置了跨进程容量时需要同时拿到 n 个令牌
+
+        Returns:
+            令牌不足时返回 False,名额不变
+        """
+        if n and self.capacity is not None and not self.capacity.try_take(n):
+            return False
+        self.size += n
+        return True
+
+    def _sub_size_locked(self, n: int) -> None:
+        """归还 n 个名额及对应的令牌(需持有锁)"""
+        self.size -= n
+        if n and self.capacity is not None:
+            self.capacity.give(n)
+
+    def _create_object(self) -> Optional[PoolableObject]:
+        """创建新对象并加入池中,跨进程容量已满时跳过并返回 None"""
+        with self._lock:
+            if not self._add_size_locked(1):
+                return None
+            self._creating += 1
+        obj = self._create_reserved(uses=0)
+        self._put_idle(obj)
+        return obj
+
+    def _start_fill(self) -> int:
+        """
+        在后台并发创建对象,补足 min_size 和空闲备用数 spare
+
+        名额在锁内一次预留,创建交给线程池并发进行,建好的对象直接交给等待者或放入空闲队列
+
+        Returns:
+            本次启动的创建数
+        """
+        with self._lock:
+            want = max(
+                self.min_size - self.size,
+                self.spare - len(self._idle) - self._warming,
+                0
+            )
+            count = 0
+            while (
+                count < want and self.size < self.target_size
+                and self._add_size_locked(1)
+            ):
+                count += 1
+            if not count:
+                return 0
+            self._warming += count
+            self._creating += count
+            if self._filler is None:
+                self._filler = ThreadPoolExecutor(
+                    max_workers=min(32, max(self.min_size, self.spare, 1)),
+                    thread_name_prefix="ObjectPool-warmup"
+                )
+            filler = self._filler
+        for _ in range(count):
+            filler.submit(self._create_warm)
+        return count
+
+    def _create_warm(self) -> None:
+        """线程池中: 为预热名额创建一个对象,失败时留待按需创建或下一轮补足"""
+        try:
+            obj = self._create_reserved(uses=0)
+        except Exception:
+            with self._lock:
+                self._warming -= 1
+                self._wake_waiters_locked()
+            return
+        with self._lock:
+            self._warming -= 1
+            self._put_idle_locked(obj)
+
+    def _create_reserved(
+        self,
+        uses: int = 1,
+        deadline: Optional[float] = None,
+        request_deadline: Optional[float] = None
+    ) -> PoolableObject:
+        """
+        为已预留的名额创建对象(在锁外调用)
+
+        工厂调用失败或等待共享的创建尝试超时时归还名额,名额转交给下一个等待者
+
+        Args:
+            uses: 新对象的初始借出次数(直接交给调用方时为 1)
+            deadline: 等待的截止时刻(超时与请求截止时间中较早的一个)
+            request_deadline: 请求本身的截止时间,用于区分异常类型
+
+        Raises:
+            DeadlineExceeded: 等待共享的创建尝试时到了请求截止时间
+            queue.Empty: 等待共享的创建尝试超时
+        """
+        try:
+            obj = self._call_factory(deadline)
+        except BaseException as exc:
+            with self._lock:
+                self._sub_size_locked(1)
+                self._creating -= 1
+                self._wake_waiters_locked()
+            if (
+                isinstance(exc, queue.Empty) and request_deadline is not None
+                and request_deadline <= time.monotonic()
+            ):
+                raise DeadlineExceeded from None
+            raise
+
+        with self._lock:
+            self._creating -= 1
+            self._records[id(obj)] = _PooledRecord(time.monotonic(), uses)
+        return obj
+
+    def _lifetime_expired(self, record: _PooledRecord, now: float) -> bool:
+        """对象是否已超过最大生命周期"""
+        return (
+            self.max_lifetime is not None
+            and now - record.created_at >= self.max_lifetime
+        )
+
+    def _retire_locked(self, obj: PoolableObject, reason: str) -> None:
+        """淘汰对象并归还名额(需持有锁,关闭对象在锁外进行)"""
+        self._sub_size_locked(1)
+        self._records.pop(id(obj), None)
+        self._evictions[reason] += 1
+        self._wake_waiters_locked()
+
+    @staticmethod
+    def _close_object(obj: PoolableObject) -> None:
+        """关闭被淘汰的对象,忽略关闭时的异常"""
+        try:
+            obj.close()
+        except Exception:
+            pass
+
+    def _put_idle(self, obj: PoolableObject) -> None:
+        """把对象放入空闲队列,有等待者时直接交给它"""
+        with self._lock:
+            self._put_idle_locked(obj)
+
+    def _put_idle_locked(self, obj: PoolableObject) -> None:
+        """_put_idle 的加锁版本(需持有锁),没有记录的对象(不属于本池)直接丢弃"""
+        record = self._records.get(id(obj))
+        if record is None:
+            return
+        record.idle_since = time.monotonic()
+        self._idle.append(obj)
+        self._wake_waiters_locked()
+
+    def _pop_idle_locked(self) -> PoolableObject:
+        """
+        按策略取出一个空闲对象(需持有锁)
+
+        空闲队列按进入空闲的时间排列,队首最冷;FIFO 取队首,LIFO 取队尾
+        """
+        return self._idle.pop() if self._lifo else self._idle.popleft()
+
+    def _unpop_idle_locked(self, objs: List[PoolableObject]) -> None:
+        """把刚取出但未交给调用方的对象按原顺序放回(需持有锁)"""
+        put_back = self._idle.append if self._lifo else self._idle.appendleft
+        for obj in reversed(objs):
+            self._records[id(obj)].uses -= 1
+            put_back(obj)
+
+    def _has_waiters_locked(self) -> bool:
+        """是否有仍在排队的等待者(需持有锁),顺带清理堆顶已离开的条目"""
+        while self._waiters and not self._waiters[0][-1].active:
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
+
+    def _wake_waiters_locked(self) -> None:
+        """
+        按优先级把空闲对象和空余名额交给等待者(需持有锁)
+
+        已离开的等待者直接丢弃;已过截止时间的等待者被唤醒并以 DeadlineExceeded 失败,
+        不会再占用对象。队首等待者的需求凑不齐时停止分配,
+        对象留在空闲队列中攒给它,后面的等待者不能插队
+        """
+        now = None
+        while self._waiters:
+            waiter = self._waiters[0][-1]
+            if not waiter.active:
+                heapq.heappop(self._waiters)
+                continue
+            if waiter.expires is not None:
+                now = time.monotonic() if now is None else now
+                if waiter.expires <= now:
+                    heapq.heappop(self._waiters)
+                    waiter.active = False
+                    waiter.cond.notify()
+                    continue
+            # 空闲对象不足的部分转交创建名额,由等待者在锁外创建;
+            # 有预热中的对象时等它们建好,不另外创建
+            short = max(waiter.need - len(self._idle), 0)
+            if short and self._warming:
+                return
+            if short > max(self.target_size - self.size, 0):
+                return
+            if not self._add_size_locked(short):
+                return
+
+            heapq.heappop(self._waiters)
+            waiter.active = False
+            while len(waiter.objs) < waiter.need - short:
+                obj = self._pop_idle_locked()
+                self._records[id(obj)].uses += 1
+                waiter.objs.append(obj)
+            self._creating += short
+            waiter.reserved = short
+            waiter.cond.notify()
+
+    @staticmethod
+    def _is_valid(obj: PoolableObject) -> bool:
+        """调用 validate(),抛出异常视为不可用"""
+        try:
+            return bool(obj.validate())
+        except Exception:
+            return False
+
+    def _discard(self, obj: PoolableObject, reason: str) -> None:
+        """淘汰对象并在锁外关闭"""
+        obj.in_use = False
+        with self._lock:
+            self._retire_locked(obj, reason)
+        self._close_object(obj)
+
+    def _thread_cache(self) -> _ThreadCache:
+        """获取当前线程的缓存,首次调用时创建并登记"""
+        try:
+            return self._local.cache
+        except AttributeError:
+            cache = _ThreadCache()
+            self._local.cache = cache
+            with self._lock:
+                self._caches.add(cache)
+            cache.spill = weakref.finalize(
+                cache, _spill_thread_cache, weakref.ref(self), cache.items
+            )
+            return cache
+
+    def _take_cached(self) -> Optional[PoolableObject]:
+        """快速路径: 从当前线程的缓存取对象,不经过全局锁"""
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            return None
+
+        while True:
+            try:
+                obj = cache.items.pop()
+            except IndexError:
+                return None
+            record = self._records.get(id(obj))
+            if record is None:
+                continue
+            if self._lifetime_expired(record, time.monotonic()):
+                with self._lock:
+                    self._retire_locked(obj, "lifetime")
+                self._close_object(obj)
+                continue
+            record.uses += 1
+            return obj
+
+    def _steal_expired_locked(self, now: float) -> None:
+        """
+        把线程缓存中已超过空闲时长或生命周期的对象移回全局空闲队列(需持有锁)
+
+        缓存的属主从右端存取,左端是最冷的对象;从左端窃取,遇到未过期的对象就放回并停止。
+        移回的对象放在空闲队列队首(最冷的一端),随后由 evict_expired 统一分拣
+        """
+        if self.max_idle_time is None and self.max_lifetime is None:
+            return
+        for cache in list(self._caches):
+            while True:
+                try:
+                    obj = cache.items.popleft()
+                except IndexError:
+                    break
+                record = self._records.get(id(obj))
+                if record is None:
+                    continue
+                if not self._lifetime_expired(record, now) and (
+                    self.max_idle_time is None
+                    or now - record.idle_since < self.max_idle_time
+                ):
+                    cache.items.appendleft(obj)
+                    break
+                self._idle.appendleft(obj)
+
+    def _steal_locked(self) -> bool:
+        """从其他线程的缓存窃取一个对象放入全局空闲队列(需持有锁)"""
+        for cache in list(self._caches):
+            try:
+                obj = cache.items.popleft()
+            except IndexError:
+                continue
+            self._idle.append(obj)
+            self._wake_waiters_locked()
+            return True
+        return False
+
+    def acquire(
+        self,
+        timeout: Optional[float] = None,
+        priority: int = Priority.NORMAL,
+        deadline: Optional[float] = None
+    ) -> PoolableObject:
+        """
+        从池中获取对象
+
+        启用线程缓存时先从当前线程的缓存取对象;
+        池为空且未达上限时,在锁内预留一个名额,然后在锁外调用工厂,
+        因此多个线程的冷启动创建可以并发进行。
+        池已满时按 (优先级, 截止时间) 排队,释放的对象直接交给队首的等待者
+
+        Args:
+            timeout: 等待超时时间(秒)
+            priority: 优先级,数值越小越先被服务(见 Priority)
+            deadline: 请求的截止时间(time.monotonic() 时刻),已过期的请求立即失败
+
+        Returns:
+            池中的对象
+
+        Raises:
+            DeadlineExceeded: 调用时已过截止时间,或等待到截止时间仍未获取到对象
+            queue.Empty: 超时未能获取对象
+            FactoryUnavailable: 需要创建对象但工厂处于熔断或共享的创建尝试失败
+        """
+        wait_until = self._wait_until(timeout, deadline)
+        return self._checkout(wait_until, create=True, block=True,
+                              priority=priority, request_deadline=deadline)
+
+    def _wait_until(
+        self, timeout: Optional[float], deadline: Optional[float]
+    ) -> Optional[float]:
+        """
+        计算等待的截止时刻(超时与请求截止时间中较早的一个)
+
+        Raises:
+            DeadlineExceeded: 请求已过截止时间
+        """
+        now = time.monotonic()
+        if deadline is not None and deadline <= now:
+            if self.metrics is not None:
+                self.metrics.on_timeout()
+            raise DeadlineExceeded
+        wait_until = None if timeout is None else now + timeout
+        if deadline is not None and (wait_until is None or deadline < wait_until):
+            wait_until = deadline
+        return wait_until
+
+    def try_acquire(self, create: bool = True) -> Optional[PoolableObject]:
+        """
+        非阻塞地获取对象
+
+        Args:
+            create: 没有空闲对象时是否允许在容量内创建新对象
+
+        Returns:
+            池中的对象,没有可用对象时返回 None
+        """
+        try:
+            return self._checkout(None, create=create, block=False)
+        except queue.Empty:
+            return None
+
+    def _checkout(
+        self,
+        deadline: Optional[float],
+        create: bool,
+        block: bool,
+        priority: int = Priority.NORMAL,
+        request_deadline: Optional[float] = None
+    ) -> PoolableObject:
+        """
+        acquire/try_acquire 的公共实现,没有可用对象时抛出 queue.Empty
+
+        deadline 是等待的截止时刻(超时与请求截止时间中较早的一个),
+        request_deadline 是请求本身的截止时间,用于排队和区分异常类型
+        """
+        metrics = self.metrics
+        autosizer = self.autosizer
+        if metrics is None and autosizer is None:
+            return self._checkout_validated(
+                deadline, create, block, priority, request_deadline
+            )
+
+        start = time.perf_counter()
+        try:
+            obj = self._checkout_validated(
+                deadline, create, block, priority, request_deadline
+            )
+        except queue.Empty:
+            if block and metrics is not None:
+                metrics.on_timeout()
+            if autosizer is not None:
+                autosizer.record_wait(time.perf_counter() - start)
+            raise
+        wait = time.perf_counter() - start
+        if metrics is not None:
+            metrics.on_acquire(obj, wait, self.size)
+        if autosizer is not None:
+            autosizer.record_wait(wait)
+        return obj
+
+    def _checkout_validated(
+        self,
+        deadline: Optional[float],
+        create: bool,
+        block: bool,
+        priority: int,
+        request_deadline: Optional[float]
+    ) -> PoolableObject:
+        """
+        取出对象并标记为使用中
+
+        启用 validate_on_borrow 时,校验失败的复用对象被丢弃并重新获取,调用方无感知
+        """
+        while True:
+            obj, created = self._checkout_once(
+                deadline, create, block, priority, request_deadline
+            )
+            if created or not self.validate_on_borrow or self._is_valid(obj):
+                obj.in_use = True
+                if (
+                    self.spare and len(self._idle) + self._warming < self.spare
+                    and self.size < self.target_size
+                ):
+                    self._start_fill()
+                return obj
+            self._discard(obj, "invalid")
+
+    def _checkout_once(
+        self,
+        deadline: Optional[float],
+        create: bool,
+        block: bool,
+        priority: int,
+        request_deadline: Optional[float]
+    ) -> Tuple[PoolableObject, bool]:
+        """取出一个复用对象或新建对象,返回 (对象, 是否新建)"""
+        if self.thread_cache_size:
+            obj = self._take_cached()
+            if obj is not None:
+                return obj, False
+
+        obj = None
+        retired: List[PoolableObject] = []
+
+        try:
+            with self._lock:
+                while True:
+                    # 有人排队时新请求不插队,对象和名额只经由 _wake_waiters_locked 分配
+                    queued = self._has_waiters_locked()
+                    if self._idle and not queued:
+                        candidate = self._pop_idle_locked()
+                        record = self._records[id(candidate)]
+                        if self._lifetime_expired(record, time.monotonic()):
+                            self._retire_locked(candidate, "lifetime")
+                            retired.append(candidate)
+                            continue
+                        record.uses += 1
+                        obj = candidate
+                        break
+                    if (
+                        create and self.size < self.target_size and not queued
+                        and not self._warming and self._add_size_locked(1)
+                    ):
+                        # 预留名额,稍后在锁外创建
+                        self._creating += 1
+                        break
+                    if not block:
+                        if self._steal_locked():
+                            continue
+                        raise queue.Empty
+
+                    # 已达最大容量: 先登记为等待者,再从其他线程的缓存窃取,
+                    # 都没有时排队等待对象或名额被直接交过来
+                    self._waiting += 1
+                    try:
+                        if self._steal_locked():
+                            continue
+                        objs, reserved = self._wait_for_handoff(
+                            1, deadline, priority, request_deadline
+                        )
+                    finally:
+                        self._waiting -= 1
+                    if objs:
+                        obj = objs[0]
+                    break
+        finally:
+            for candidate in retired:
+                self._close_object(candidate)
+
+        if obj is None:
+            return self._create_reserved(1, deadline, request_deadline), True
+        return obj, False
+
+    def _wait_for_handoff(
+        self,
+        need: int,
+        deadline: Optional[float],
+        priority: int,
+        request_deadline: Optional[float]
+    ) -> Tuple[List[PoolableObject], int]:
+        """
+        登记到等待堆中,直到被一次性交付 need 份对象或创建名额(需持有锁)
+
+        同一优先级内截止时间早的先被服务,再按到达顺序
+
+        Returns:
+            (交付的对象, 分到的创建名额数),二者合计为 need;超时抛出异常
+        """
+        waiter = _Waiter(self._lock, need, deadline)
+        sort_deadline = math.inf if request_deadline is None else request_deadline
+        heapq.heappush(
+            self._waiters, (priority, sort_deadline, next(self._waiter_seq), waiter)
+        )
+        try:
+            while not waiter.granted:
+                remaining = None
+                if deadline is not None:
+                    now = time.monotonic()
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        if request_deadline is not None and request_deadline <= now:
+                            raise DeadlineExceeded
+                        raise queue.Empty
+                if self.capacity is None:
+                    waiter.cond.wait(remaining)
+                    continue
+                # 其他进程归还令牌时不会通知本进程,定期重试分配
+                poll = self.capacity.poll_interval
+                waiter.cond.wait(poll if remaining is None else min(remaining, poll))
+                if not waiter.granted:
+                    self._wake_waiters_locked()
+        except BaseException:
+            waiter.active = False
+            if len(self._waiters) > 2 * self._waiting + 16:
+                # 超时离开的等待者堆积过多时压缩堆
+                self._waiters = [entry for entry in self._waiters if entry[-1].active]
+                heapq.heapify(self._waiters)
+            # 已交付但调用方因异常离开: 把对象和名额转交给后面的等待者;
+            # 离开的若是队首,为它攒下的空闲对象也要重新分配
+            self._unpop_idle_locked(waiter.objs)
+            self._sub_size_locked(waiter.reserved)
+            self._creating -= waiter.reserved
+            waiter.objs, waiter.reserved = [], 0
+            self._wake_waiters_locked()
+            raise
+        return waiter.objs, waiter.reserved
+
+    def acquire_many(
+        self,
+        n: int,
+        timeout: Optional[float] = None,
+        priority: int = Priority.NORMAL,
+        deadline: Optional[float] = None
+    ) -> List[PoolableObject]:
+        """
+        原子地获取 n 个对象: 要么全部拿到,要么一个也不拿
+
+        整批只加一次池锁;凑不齐时作为一个整体排队,期间不持有任何对象,
+        因此两个各需要大半个池的批任务不会互相占住一半而死锁。
+        队首的批量请求凑齐之前,后来的请求不能插队取走空闲对象
+
+        Args:
+            n: 对象数量,不能超过 max_size
+            timeout: 等待超时时间(秒)
+            priority: 优先级,数值越小越先被服务(见 Priority)
+            deadline: 请求的截止时间(time.monotonic() 时刻)
 
-# 具体的可池化对象 - 数据库连接
-class DatabaseConnection(PoolableObject):
-    """数据库连接(模拟)"""
+        Returns:
+            n 个对象
 
-    _id_counter = 0
-    _lock = threading.Lock()
+        Raises:
+            ValueError: n 超过 max_size
+            DeadlineExceeded: 已过截止时间,或等待到截止时间仍未凑齐
+            queue.Empty: 超时未能凑齐
+        """
+        if n <= 0:
+            return []
+        if n > self.max_size:
+            raise ValueError("请求的对象数超过池的最大容量")
+        wait_until = self._wait_until(timeout, deadline)
+        start = time.perf_counter()
 
-    def __init__(self, host: str = "localhost", port: int = 5432):
+        objs: List[PoolableObject] = []
+        slots = 0
+        retired: List[PoolableObject] = []
+        try:
+            with self._lock:
+                # 与 acquire 相同: 先登记为等待者再窃取线程缓存
+                self._waiting += 1
+                try:
+                    while (
+                        len(self._idle) + max(self.target_size - self.size, 0) < n
+                        and self._steal_locked()
+                    ):
+                        pass
+                    granted = False
+                    if (
+                        not self._has_waiters_locked()
+                        and len(self._idle) + max(self.target_size - self.size, 0) >= n
+                    ):
+                        now = time.monotonic()
+                        while len(objs) < n and self._idle:
+                            candidate = self._pop_idle_locked()
+                            record = self._records[id(candidate)]
+                            if self._lifetime_expired(record, now):
+                                # 淘汰让出的名额正好补上这个空缺
+                                self._retire_locked(candidate, "lifetime")
+                                retired.append(candidate)
+                                continue
+                            record.uses += 1
+                            objs.append(candidate)
+                        slots = n - len(objs)
+                        granted = self._add_size_locked(slots)
+                        if granted:
+                            self._creating += slots
+                        else:
+                            # 跨进程令牌不足,放回对象后排队
+                            self._unpop_idle_locked(objs)
+                            objs, slots = [], 0
+                    if not granted:
+                        objs, slots = self._wait_for_handoff(
+                            n, wait_until, priority, deadline
+                        )
+                finally:
+                    self._waiting -= 1
+        except queue.Empty:
+            if self.metrics is not None:
+                self.metrics.on_timeout()
+            if self.autosizer is not None:
+                self.autosizer.record_wait(time.perf_counter() - start)
+            raise
+        finally:
+            for candidate in retired:
+                self._close_object(candidate)
+
+        try:
+            objs = self._fill_batch(objs, slots, wait_until, deadline)
+        except queue.Empty:
+            # 等待共享的创建尝试超时,名额已归还
+            if self.metrics is not None:
+                self.metrics.on_timeout()
+            if self.autosizer is not None:
+                self.autosizer.record_wait(time.perf_counter() - start)
+            raise
+        wait = time.perf_counter() - start
+        for obj in objs:
+            obj.in_use = True
+        if self.metrics is not None:
+            self.metrics.on_acquire_many(objs, wait, self.size)
+        if self.autosizer is not None:
+            self.autosizer.record_wait(wait)
+        return objs
+
+    def _fill_batch(
+        self,
+        objs: List[PoolableObject],
+        slots: int,
+        deadline: Optional[float] = None,
+        request_deadline: Optional[float] = None
+    ) -> List[PoolableObject]:
         """
-        初始化数据库连接
+        校验批量取出的复用对象,并为预留名额创建新对象(在锁外调用)
+
+        校验失败的对象就地换成新对象,名额不经过等待队列;
+        任何一次创建失败(或等待共享的创建尝试超时)时整批回滚:
+        已取得的对象放回空闲队列,剩余名额归还
+        """
+        try:
+            if self.validate_on_borrow:
+                kept = []
+                for obj in objs:
+                    if self._is_valid(obj):
+                        kept.append(obj)
+                        continue
+                    with self._lock:
+                        self._records.pop(id(obj), None)
+                        self._evictions["invalid"] += 1
+                        self._creating += 1
+                    self._close_object(obj)
+                    slots += 1
+                objs = kept
+            while slots:
+                slots -= 1
+                objs.append(self._create_reserved(1, deadline, request_deadline))
+        except BaseException:
+            with self._lock:
+                self._sub_size_locked(slots)
+                self._creating -= slots
+                for obj in objs:
+                    self._records[id(obj)].uses -= 1
+                    self._put_idle_locked(obj)
+                self._wake_waiters_locked()
+            raise
+        return objs
+
+    def release(self, obj: PoolableObject) -> None:
+        """
+        将对象释放回池中
+
+        达到 max_uses 或超过 max_lifetime 的对象不再放回,直接淘汰;
+        启用后台重置时对象交给后台线程,release 立即返回;
+        启用线程缓存时优先放入当前线程的缓存,缓存已满或有线程在等待时溢出到全局池
+
+        Args:
+            obj: 要释放的对象
+        """
+        record = self._records.get(id(obj))
+        if record is None:
+            raise ValueError("对象不属于该池")
+        if self.metrics is not None:
+            self.metrics.on_release(obj, self.size)
+
+        reason = None
+        if self.max_uses is not None and record.uses >= self.max_uses:
+            reason = "uses"
+        elif self._lifetime_expired(record, time.monotonic()):
+            reason = "lifetime"
+        elif self.size > self.target_size:
+            # 有效容量已被调小,多出的对象归还时直接淘汰
+            reason = "autosize"
+
+        if reason is not None:
+            self._discard(obj, reason)
+            return
+
+        if self._reset_tasks is not None:
+            with self._lock:
+                self._resetting += 1
+            self._reset_tasks.put(obj)
+            return
+
+        obj.reset()
+
+        if self.thread_cache_size:
+            cache = self._thread_cache()
+            if len(cache.items) < self.thread_cache_size:
+                record.idle_since = time.monotonic()
+                cache.items.append(obj)
+                # 等待者先登记再窃取,因此这里读到 0 时等待者一定能看到刚缓存的对象
+                if not self._waiting:
+                    return
+                try:
+                    obj = cache.items.pop()
+                except IndexError:
+                    return
+
+        self._put_idle(obj)
+
+    def release_many(self, objs: Sequence[PoolableObject]) -> None:
+        """
+        批量释放对象,整批只加一次池锁
+
+        淘汰规则与 release 相同;批量归还的对象不进入线程缓存,直接回到共享空闲队列,
+        并按优先级一次性分配给等待者
+
+        Args:
+            objs: 要释放的对象
+
+        Raises:
+            ValueError: 任一对象不属于该池(此时不释放任何对象)
+        """
+        objs = list(objs)
+        records = [self._records.get(id(obj)) for obj in objs]
+        if any(record is None for record in records):
+            raise ValueError("对象不属于该池")
+        if self.metrics is not None:
+            self.metrics.on_release_many(objs, self.size)
+
+        now = time.monotonic()
+        excess = self.size - self.target_size
+        kept: List[PoolableObject] = []
+        retired: List[Tuple[PoolableObject, str]] = []
+        for obj, record in zip(objs, records):
+            if self.max_uses is not None and record.uses >= self.max_uses:
+                retired.append((obj, "uses"))
+            elif self._lifetime_expired(record, now):
+                retired.append((obj, "lifetime"))
+            elif excess > 0:
+                excess -= 1
+                retired.append((obj, "autosize"))
+            else:
+                kept.append(obj)
+
+        background = self._reset_tasks is not None
+        if not background:
+            for obj in kept:
+                obj.reset()
+
+        with self._lock:
+            for obj, reason in retired:
+                obj.in_use = False
+                self._retire_locked(obj, reason)
+            if background:
+                self._resetting += len(kept)
+            else:
+                now = time.monotonic()
+                for obj in kept:
+                    self._records[id(obj)].idle_since = now
+                    self._idle.append(obj)
+                self._wake_waiters_locked()
+
+        if background:
+            for obj in kept:
+                self._reset_tasks.put(obj)
+        for obj, _ in retired:
+            self._close_object(obj)
+
+    def _finish_reset(self, obj: PoolableObject) -> None:
+        """后台线程: 重置并校验对象,通过后才放回空闲队列"""
+        try:
+            obj.reset()
+            valid = self._is_valid(obj)
+        except Exception:
+            valid = False
+
+        with self._lock:
+            self._resetting -= 1
+            if valid:
+                self._put_idle_locked(obj)
+                return
+            obj.in_use = False
+            self._retire_locked(obj, "invalid")
+        self._close_object(obj)
+
+    def evict_expired(self) -> int:
+        """
+        扫描一遍空闲对象,回收超过空闲时长或生命周期的对象
+
+        线程缓存中过期的对象先被窃取回空闲队列,一并参与扫描。
+        复杂度为 O(空闲对象数);锁内只做分拣,
+        关闭对象和补足 min_size 都在锁外进行
+
+        Returns:
+            本次回收的对象数
+        """
+        now = time.monotonic()
+        evicted: List[PoolableObject] = []
+
+        with self._lock:
+            self._steal_expired_locked(now)
+            kept: Deque[PoolableObject] = collections.deque()
+            for obj in self._idle:
+                record = self._records[id(obj)]
+                if self._lifetime_expired(record, now):
+                    reason = "lifetime"
+                elif (
+                    self.max_idle_time is not None
+                    and now - record.idle_since >= self.max_idle_time
+                    and self.size > self.min_size
+                ):
+                    reason = "idle"
+                else:
+                    kept.append(obj)
+                    continue
+                self._retire_locked(obj, reason)
+                evicted.append(obj)
+            self._idle = kept
+
+        for obj in evicted:
+            self._close_object(obj)
+        if self.validate_while_idle:
+            self._validate_idle()
+        self._replenish()
+        return len(evicted)
+
+    def _validate_idle(self) -> None:
+        """
+        校验所有空闲对象
+
+        校验期间对象从空闲队列中取出,不会被同时借出;
+        通过校验的对象按原顺序放回队首,空闲时间不变
+        """
+        with self._lock:
+            batch = list(self._idle)
+            self._idle.clear()
+            self._validating += len(batch)
+
+        valid: List[PoolableObject] = []
+        invalid: List[PoolableObject] = []
+        for obj in batch:
+            (valid if self._is_valid(obj) else invalid).append(obj)
+
+        with self._lock:
+            self._validating -= len(batch)
+            self._idle.extendleft(reversed(valid))
+            for obj in invalid:
+                self._retire_locked(obj, "invalid")
+            self._wake_waiters_locked()
+        for obj in invalid:
+            self._close_object(obj)
+
+    def set_target_size(self, target: int) -> None:
+        """设置有效容量(限制在 [min_size, max_size] 内),扩大时把新名额交给等待者"""
+        with self._lock:
+            self.target_size = max(self.min_size, min(self.max_size, target))
+            self._wake_waiters_locked()
+
+    def shrink_idle(self, target: int) -> int:
+        """
+        淘汰空闲对象,直到总数不超过 target(借出中的对象在归还时淘汰)
+
+        Returns:
+            本次淘汰的对象数
+        """
+        evicted: List[PoolableObject] = []
+        with self._lock:
+            while self._idle and self.size > target:
+                obj = self._idle.popleft()
+                self._retire_locked(obj, "autosize")
+                evicted.append(obj)
+        for obj in evicted:
+            self._close_object(obj)
+        return len(evicted)
+
+    def _replenish(self, target: Optional[int] = None) -> None:
+        """补足到 target(默认 min_size),工厂失败时留待下一轮"""
+        goal = self.min_size if target is None else target
+        while True:
+            with self._lock:
+                if self.size >= goal or not self._add_size_locked(1):
+                    return
+                self._creating += 1
+            try:
+                obj = self._create_reserved(uses=0)
+            except Exception:
+                return
+            self._put_idle(obj)
+
+    def close(self) -> None:
+        """停止后台线程并关闭所有空闲对象(包括线程缓存中的对象)"""
+        self._reaper_stop.set()
+        if self.autosizer is not None:
+            self.autosizer.stop()
+        if self._filler is not None:
+            self._filler.shutdown(wait=True)
+        if self._reset_tasks is not None:
+            # 等待已归还的对象处理完毕,再让重置线程退出
+            self._reset_tasks.join()
+            self._reset_tasks.put(_STOP)
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            for cache in list(self._caches):
+                while cache.items:
+                    try:
+                        idle.append(cache.items.popleft())
+                    except IndexError:
+                        break
+            self._sub_size_locked(len(idle))
+            for obj in idle:
+                self._records.pop(id(obj), None)
+        for obj in idle:
+            self._close_object(obj)
+
+    def get_stats(self) -> dict:
+        """获取池状态统计"""
+        with self._lock:
+            available = len(self._idle)
+            cached = sum(len(cache.items) for cache in list(self._caches))
+            stats = {
+                "total": self.size,
+                "available": available,
+                "in_use": (
+                    self.size - available - cached - self._creating
+                    - self._resetting - self._validating
+                ),
+                "creating": self._creating,
+                "cached": cached,
+                "resetting": self._resetting,
+                "evicted_idle": self._evictions["idle"],
+                "evicted_lifetime": self._evictions["lifetime"],
+                "evicted_uses": self._evictions["uses"],
+                "evicted_invalid": self._evictions["invalid"],
+                "evicted_autosize": self._evictions["autosize"],
+                "waiting": self._waiting,
+                "warming": self._warming,
+                "target_size": self.target_size,
+            }
+        stats["breaker"] = self.breaker.to_dict()
+        if self.capacity is not None:
+            stats["capacity"] = self.capacity.to_dict()
+        if self.autosizer is not None:
+            stats["autosize"] = self.autosizer.to_dict()
+        return stats
+
+
+# 连接池(特���版本)
+class ConnectionPool(ObjectPool):
+    """数据库连接池"""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 5432,
+        min_connections: int = 2,
+        max_connections: int = 10,
+        **options: Any
+    ):
+        """
+        初始化连接池
 
         Args:
             host: 数据库主机
             port: 数据库端口
+            min_connections: 最小连接数
+            max_connections: 最大连接数
+            **options: 其余参数透传给 ObjectPool(如 max_idle_time)
         """
-        with DatabaseConnection._lock:
-            DatabaseConnection._id_counter += 1
-            self.id = DatabaseConnection._id_counter
-
         self.host = host
         self.port = port
-        self.in_use = False
-        self.query_count = 0
 
-        # 模拟创建连接的开销
-        print(f"  创建连接 #{self.id} (耗时操作...)")
-        time.sleep(0.1)  # 模拟连接时间
+        def factory():
+            return DatabaseConnection(host, port)
 
-    def execute(self, query: str) -> str:
+        super().__init__(factory, min_connections, max_connections, **options)
+
+
+# 按键分组的对象池
+class _KeyState:
+    """单个键的空闲对象和容量计数"""
+
+    __slots__ = ("idle", "size", "waiting", "available")
+
+    def __init__(self, lock: threading.Lock):
+        self.idle: Deque[PoolableObject] = collections.deque()
+        self.size = 0
+        self.waiting = 0
+        self.available = threading.Condition(lock)
+
+
+class KeyedObjectPool:
+    """
+    按键分组的对象池
+
+    每个键在首次使用时才创建自己的空闲队列,不做预分配;
+    对象数同时受单键上限 max_per_key 和全局上限 max_total 约束。
+    达到全局上限时,从最久未使用(LRU)的键中淘汰空闲对象腾出名额,
+    因此键的数量增长时总内存占用仍然有界
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Hashable], PoolableObject],
+        max_per_key: int = 4,
+        max_total: int = 32
+    ):
         """
-        执行查询
+        初始化按键分组的对象池
 
         Args:
-            query: SQL 查询
+            factory: 对象工厂函数,参数为键
+            max_per_key: 单个键的最大对象数
+            max_total: 所有键合计的最大对象数
+        """
+        self.factory = factory
+        self.max_per_key = max_per_key
+        self.max_total = max_total
+        self.size = 0  # 所有键已创建的对象数 + 已预留的名额
+        self._keys: "collections.OrderedDict[Hashable, _KeyState]" = (
+            collections.OrderedDict()
+        )
+        self._owners: Dict[int, Hashable] = {}
+        self._creating = 0
+        self._evicted = 0
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition(self._lock)
+
+    def _state_locked(self, key: Hashable) -> _KeyState:
+        """取得键的状态(懒创建),并标记为最近使用"""
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState(self._lock)
+        else:
+            self._keys.move_to_end(key)
+        return state
+
+    def _evict_lru_locked(self, exclude: Hashable) -> Optional[PoolableObject]:
+        """从最久未使用的键中淘汰一个空闲对象(需持有锁)"""
+        for key, state in self._keys.items():
+            if key == exclude or not state.idle:
+                continue
+            obj = state.idle.popleft()
+            state.size -= 1
+            self.size -= 1
+            self._evicted += 1
+            if state.size == 0 and state.waiting == 0:
+                del self._keys[key]
+            return obj
+        return None
+
+    def acquire(self, key: Hashable, timeout: Optional[float] = None) -> PoolableObject:
+        """
+        获取指定键的对象
+
+        Args:
+            key: 对象分组的键
+            timeout: 等待超时时间(秒)
 
         Returns:
-            查询结果
+            该键下的对象
+
+        Raises:
+            queue.Empty: 超时未能获取对象
         """
-        self.query_count += 1
-        return f"连接 #{self.id} 执行: {query}"
+        deadline = None if timeout is None else time.monotonic() + timeout
+        obj: Optional[PoolableObject] = None
+        evicted: List[PoolableObject] = []
 
-    def reset(self) -> None:
-        """重置连接状态"""
-        self.in_use = False
-        self.query_count = 0
+        try:
+            with self._lock:
+                while True:
+                    state = self._state_locked(key)
+                    if state.idle:
+                        obj = state.idle.popleft()
+                        break
+                    if state.size < self.max_per_key:
+                        if self.size >= self.max_total:
+                            victim = self._evict_lru_locked(exclude=key)
+                            if victim is not None:
+                                evicted.append(victim)
+                        if self.size < self.max_total:
+                            # 预留名额,稍后在锁外创建
+                            state.size += 1
+                            self.size += 1
+                            self._creating += 1
+                            break
+                        # 全局已满且没有可淘汰的空闲对象,等待任意键释放
+                        condition = self._capacity
+                    else:
+                        # 单键已满,等待本键释放
+                        condition = state.available
 
-    def __str__(self) -> str:
-        status = "使用中" if self.in_use else "空闲"
-        return f"Connection #{self.id} [{status}] (查询数: {self.query_count})"
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise queue.Empty
+                    state.waiting += 1
+                    try:
+                        condition.wait(remaining)
+                    finally:
+                        state.waiting -= 1
+        finally:
+            for victim in evicted:
+                ObjectPool._close_object(victim)
 
+        if obj is None:
+            obj = self._create_reserved(key)
 
-# 对象池
-class ObjectPool:
-    """通用对象池"""
+        self._owners[id(obj)] = key
+        obj.in_use = True
+        return obj
+
+    def _create_reserved(self, key: Hashable) -> PoolableObject:
+        """为已预留的名额创建对象,失败时归还名额"""
+        try:
+            return self.factory(key)
+        except BaseException:
+            with self._lock:
+                state = self._keys[key]
+                state.size -= 1
+                self.size -= 1
+                state.available.notify()
+                self._capacity.notify()
+            raise
+        finally:
+            with self._lock:
+                self._creating -= 1
+
+    def release(self, obj: PoolableObject) -> None:
+        """
+        将对象释放回所属键的空闲队列
+
+        Args:
+            obj: 要释放的对象
+        """
+        key = self._owners.pop(id(obj), None)
+        if key is None:
+            raise ValueError("对象不属于该池")
+
+        obj.reset()
+        with self._lock:
+            state = self._state_locked(key)
+            state.idle.append(obj)
+            state.available.notify()
+            # 空闲对象可被淘汰,全局上限下的等待者也可以继续
+            self._capacity.notify()
+
+    def close(self) -> None:
+        """关闭所有空闲对象"""
+        with self._lock:
+            idle = []
+            for state in self._keys.values():
+                idle.extend(state.idle)
+                self.size -= len(state.idle)
+                state.size -= len(state.idle)
+                state.idle.clear()
+        for obj in idle:
+            ObjectPool._close_object(obj)
+
+    def get_stats(self) -> dict:
+        """获取池状态统计(per_key 为每个键的明细)"""
+        with self._lock:
+            available = sum(len(state.idle) for state in self._keys.values())
+            return {
+                "total": self.size,
+                "available": available,
+                "in_use": self.size - available - self._creating,
+                "creating": self._creating,
+                "keys": len(self._keys),
+                "evicted_lru": self._evicted,
+                "per_key": {
+                    key: {"total": state.size, "available": len(state.idle)}
+                    for key, state in self._keys.items()
+                },
+            }
+
+
+class KeyedConnectionPool(KeyedObjectPool):
+    """按 (host, port) 分组的数据库连接池"""
+
+    def __init__(self, max_per_host: int = 4, max_connections: int = 32):
+        """
+        初始化分组连接池
+
+        Args:
+            max_per_host: 单个 (host, port) 的最大连接数
+            max_connections: 所有目标合计的最大连接数
+        """
+        def factory(target: Tuple[str, int]) -> DatabaseConnection:
+            host, port = target
+            return DatabaseConnection(host, port)
+
+        super().__init__(factory, max_per_host, max_connections)
+
+
+# 异步对象池
+_RESERVED = object()  # 交给等待者的"已预留名额"标记,持有者负责创建对象
+
+
+class AsyncObjectPool:
+    """
+    asyncio 原生对象池
+
+    所有状态只在事件循环线程中修改,因此不需要线程锁;
+    等待者按 FIFO 顺序排队,释放的对象或名额直接交给队首等待者
+    """
 
     def __init__(
         self,
-        factory: Callable[[], PoolableObject],
+        factory: Callable[[], Union[PoolableObject, Awaitable[PoolableObject]]],
         min_size: int = 2,
         max_size: int = 10
     ):
         """
-        初始化对象池
+        初始化异步对象池(不创建对象,预热见 start)
 
         Args:
-            factory: 对象工厂函数
+            factory: 对象工厂函数,可以是普通函数或协程函数
             min_size: 最小池大小
             max_size: 最大池大小
         """
         self.factory = factory
         self.min_size = min_size
         self.max_size = max_size
-        self.pool: queue.Queue = queue.Queue(maxsize=max_size)
-        self.size = 0
-        self._lock = threading.Lock()
+        self.size = 0  # 已创建的对象数 + 已预留但仍在创建中的名额
+        self._idle: Deque[PoolableObject] = collections.deque()
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._creating = 0
+        self._leased: Set[int] = set()  # 已借出对象的 id
+        self._closed = False
 
-        # 预创建最小数量的对象
-        print(f"初始化对象池 (min={min_size}, max={max_size})")
-        for _ in range(min_size):
-            self._create_object()
+    async def start(self) -> None:
+        """使用 asyncio.gather 并发预热 min_size 个对象"""
+        missing = self.min_size - self.size
+        if missing <= 0:
+            return
 
-    def _create_object(self) -> PoolableObject:
-        """创建新对象并加入池中"""
-        obj = self.factory()
-        self.size += 1
-        self.pool.put(obj)
+        self.size += missing
+        self._creating += missing
+        results = await asyncio.gather(
+            *(self._create_reserved() for _ in range(missing)),
+            return_exceptions=True
+        )
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for obj in results:
+            if not isinstance(obj, BaseException):
+                self._put_back(obj)
+        if errors:
+            raise errors[0]
+
+    async def __aenter__(self) -> "AsyncObjectPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        关闭池: 取消排队中的等待者并关闭所有空闲对象
+
+        之后归还或创建完成的对象直接关闭,acquire 抛出 RuntimeError
+        """
+        self._closed = True
+        while self._waiters:
+            self._waiters.popleft().cancel()
+        idle = list(self._idle)
+        self._idle.clear()
+        self.size -= len(idle)
+        for obj in idle:
+            ObjectPool._close_object(obj)
+
+    async def _create_reserved(self) -> PoolableObject:
+        """为已预留的名额创建对象,失败或被取消时转交名额"""
+        try:
+            obj = self.factory()
+            if inspect.isawaitable(obj):
+                obj = await obj
+        except BaseException:
+            self._creating -= 1
+            self._give_slot()
+            raise
+
+        self._creating -= 1
         return obj
 
-    def acquire(self, timeout: Optional[float] = None) -> PoolableObject:
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """取出队首仍在等待的 future(跳过已取消或已超时的)"""
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                return fut
+        return None
+
+    def _put_back(self, obj: PoolableObject) -> None:
+        """把对象交给队首等待者,没有等待者时放回空闲队列;池已关闭时关闭对象"""
+        if self._closed:
+            self.size -= 1
+            ObjectPool._close_object(obj)
+            return
+        fut = self._next_waiter()
+        if fut is not None:
+            fut.set_result(obj)
+        else:
+            self._idle.append(obj)
+
+    def _give_slot(self) -> None:
+        """把空出的名额交给队首等待者,没有等待者时缩小 size"""
+        fut = self._next_waiter()
+        if fut is not None:
+            self._creating += 1
+            fut.set_result(_RESERVED)
+        else:
+            self.size -= 1
+
+    async def _wait(self, timeout: Optional[float]) -> Any:
+        """排队等待对象或名额"""
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            if timeout is None:
+                return await fut
+            return await asyncio.wait_for(fut, timeout)
+        except BaseException:
+            if fut.done() and not fut.cancelled():
+                # 已交接给本等待者,但调用方被取消或超时,原样归还
+                item = fut.result()
+                if item is _RESERVED:
+                    self._creating -= 1
+                    self._give_slot()
+                else:
+                    self._put_back(item)
+            else:
+                fut.cancel()
+            raise
+
+    async def acquire(self, timeout: Optional[float] = None) -> PoolableObject:
         """
         从池中获取对象
 
@@ -131,70 +2404,99 @@ class ObjectPool:
             池中的对象
 
         Raises:
-            queue.Empty: 超时未能获取对象
+            asyncio.TimeoutError: 超时未能获取对象
+            RuntimeError: 池已关闭
+            asyncio.CancelledError: 等待期间池被关闭
         """
-        try:
-            # 尝试从池中获取
-            obj = self.pool.get(block=False)
-        except queue.Empty:
-            # 池为空,尝试创建新对象
-            with self._lock:
-                if self.size < self.max_size:
-                    obj = self.factory()
-                    self.size += 1
-                else:
-                    # 已达最大容量,等待
-                    obj = self.pool.get(block=True, timeout=timeout)
+        if self._closed:
+            raise RuntimeError("池已关闭")
+        if self._idle:
+            item: Any = self._idle.popleft()
+        elif self.size < self.max_size:
+            self.size += 1
+            self._creating += 1
+            item = _RESERVED
+        else:
+            item = await self._wait(timeout)
 
-        obj.in_use = True
-        return obj
+        if item is _RESERVED:
+            item = await self._create_reserved()
+
+        item.in_use = True
+        self._leased.add(id(item))
+        return item
 
     def release(self, obj: PoolableObject) -> None:
         """
         将对象释放回池中
 
+        同步方法,中间没有 await,因此不会被任务取消打断
+
         Args:
             obj: 要释放的对象
+
+        Raises:
+            ValueError: 对象不是从该池借出的(或已经释放过)
         """
+        if id(obj) not in self._leased:
+            raise ValueError("对象不属于该池")
+        self._leased.discard(id(obj))
         obj.reset()
-        self.pool.put(obj)
+        self._put_back(obj)
+
+    @contextlib.asynccontextmanager
+    async def lease(
+        self, timeout: Optional[float] = None
+    ) -> AsyncIterator[PoolableObject]:
+        """
+        以异步上下文管理器的方式租用对象,退出时自动释放
+
+        Args:
+            timeout: 等待超时时间(秒)
+        """
+        obj = await self.acquire(timeout)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
 
     def get_stats(self) -> dict:
         """获取池状态统计"""
+        available = len(self._idle)
         return {
             "total": self.size,
-            "available": self.pool.qsize(),
-            "in_use": self.size - self.pool.qsize()
+            "available": available,
+            "in_use": self.size - available - self._creating,
+            "creating": self._creating,
+            "waiting": sum(1 for fut in self._waiters if not fut.done()),
         }
 
 
-# 连接池(特���版本)
-class ConnectionPool(ObjectPool):
-    """数据库连接池"""
+async def open_connection_async(
+    host: str = "localhost", port: int = 5432
+) -> DatabaseConnection:
+    """在线程池中建立连接,避免阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, DatabaseConnection, host, port)
 
-    def __init__(
-        self,
-        host: str = "localhost",
-        port: int = 5432,
-        min_connections: int = 2,
-        max_connections: int = 10
-    ):
-        """
-        初始化连接池
 
-        Args:
-            host: 数据库主机
-            port: 数据库端口
-            min_connections: 最小连接数
-            max_connections: 最大连接数
-        """
-        self.host = host
-        self.port = port
+async def _async_pool_demo() -> None:
+    """异步对象池示例"""
+    pool = AsyncObjectPool(open_connection_async, min_size=3, max_size=5)
+    start = time.perf_counter()
+    await pool.start()
+    print(f"并发预热 3 个连接耗时: {time.perf_counter() - start:.2f}s")
+    print(f"池状态: {pool.get_stats()}")
 
-        def factory():
-            return DatabaseConnection(host, port)
+    async def handle(request_id: int) -> str:
+        async with pool.lease(timeout=1) as conn:
+            await asyncio.sleep(0.01)
+            return conn.execute(f"SELECT {request_id}")
 
-        super().__init__(factory, min_connections, max_connections)
+    results = await asyncio.gather(*(handle(i) for i in range(6)))
+    for result in results:
+        print(f"  {result}")
+    print(f"池状态: {pool.get_stats()}")
 
 
 def main():
@@ -241,7 +2543,7 @@ def main():
     print("\n5. 测试池扩展")
     print("-" * 60)
     connections = []
-    for i in range(4):
+    for i in range(3):
         conn = pool.acquire()
         connections.append(conn)
         print(f"获取连接 {i+1}: #{conn.id}")
@@ -258,6 +2560,38 @@ def main():
 
     print(f"最终池状态: {pool.get_stats()}")
 
+    # 异步对象池
+    print("\n7. 异步对象池(asyncio)")
+    print("-" * 60)
+    asyncio.run(_async_pool_demo())
+
+    # 空闲回收
+    print("\n8. 空闲回收 - 流量高峰后收缩到最小容量")
+    print("-" * 60)
+    elastic = ConnectionPool(min_connections=1, max_connections=4, max_idle_time=0.2)
+    burst = [elastic.acquire() for _ in range(3)]
+    for conn in burst:
+        elastic.release(conn)
+    print(f"高峰后池状态: {elastic.get_stats()}")
+    time.sleep(0.5)
+    print(f"空闲回收后池状态: {elastic.get_stats()}")
+    elastic.close()
+
+    # 按键分组
+    print("\n9. 按键分组 - 多个分片共享全局连接上限")
+    print("-" * 60)
+    keyed = KeyedConnectionPool(max_per_host=2, max_connections=3)
+    for port in (5432, 5433, 5434):
+        conn = keyed.acquire(("db-shard", port))
+        keyed.release(conn)
+    print(f"池状态: 共 {keyed.get_stats()['total']} 个连接, {keyed.get_stats()['keys']} 个分片")
+    conn = keyed.acquire(("db-shard", 5435))
+    print(f"新分片获取连接 #{conn.id}, 淘汰最久未使用分片的空闲连接")
+    keyed.release(conn)
+    stats = keyed.get_stats()
+    print(f"池状态: 共 {stats['total']} 个连接, LRU 淘汰 {stats['evicted_lru']} 次")
+    keyed.close()
+
     print("\n" + "=" * 60)
     print("结论: 对象池通过复用对象减少创建开销")
     print("=" * 60)
@@ -10,40 +10,464 @@
     - 需要延迟初始化的全局对象
 
 Python 实现说明:
-    在 Python 中,使用 __new__ 方法实现单例模式
+    使用元类 SingletonMeta 拦截类的调用,每个类有自己的实例槽和锁
+    首次调用单飞初始化: 并发的首次调用方等待同一个初始化,初始化抛出异常时由下一个调用方重试
+    初始化完成后读取实例不加锁
+    通过类关键字 scope 选择实例的作用域:
+        global   整个解释器一个实例(默认),fork 出的子进程继承父进程的实例
+        process  每个进程一个实例,fork 后子进程自动丢弃继承的实例
+        thread   每个线程一个实例(threading.local)
+        context  每个 contextvars 上下文一个实例(如每个 asyncio 任务/请求)
+    异步获取: await Cls.instance() 在线程池中构造,不阻塞事件循环,
+    并发等待的协程共享同一个初始化;Cls.preload() 在启动时提前开始初始化
+    启动预热: 类关键字 depends_on 声明依赖,warm_up_singletons() 按拓扑顺序
+    在线程池中并行初始化互不依赖的单例,并报告每个单例的初始化耗时
 """
+import asyncio
+import contextvars
+import functools
+import os
 import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
 
+# 实例槽的空值(实例本身可能是 None 以外的任何对象)
+_EMPTY = object()
+# thread/context 作用域中正在初始化的标记,用于发现 __init__ 中的递归调用
+_CREATING = object()
 
-class Singleton:
+SCOPES = ("global", "process", "thread", "context")
+
+
+def _thread_slot(name: str):
+    """thread 作用域的实例槽: 每个线程各自保存在 threading.local 中"""
+    local = threading.local()
+    return (
+        functools.partial(getattr, local, "instance", _EMPTY),
+        functools.partial(setattr, local, "instance"),
+    )
+
+
+def _context_slot(name: str):
+    """context 作用域的实例槽: 保存在 ContextVar 中"""
+    var = contextvars.ContextVar(f"{name}_singleton", default=_EMPTY)
+    return var.get, var.set
+
+
+# 读写函数都是 C 实现的可调用对象,读取路径上没有额外的 Python 调用
+_LOCAL_SLOTS = {"thread": _thread_slot, "context": _context_slot}
+
+
+class SingletonMeta(type):
     """
-    单例类实现
+    单例元类
+
+    每个使用该元类的类(包括子类)都有独立的实例槽和锁,
+    并登记到 SingletonMeta.registry 中。作用域由类关键字 scope 指定,
+    依赖的其他单例由类关键字 depends_on 声明(供 warm_up_singletons 排序),
+    未指定时都继承基类的设置:
+
+        class RequestCache(metaclass=SingletonMeta, scope="context"):
+            ...
 
-    使用 __new__ 方法确保只创建一个实例
-    使用锁保证线程安全
+        class Search(metaclass=SingletonMeta, depends_on=(Config, Index)):
+            ...
     """
 
-    _instance = None
-    _lock = threading.Lock()
+    registry: "weakref.WeakSet[SingletonMeta]" = weakref.WeakSet()
+
+    def __new__(mcs, name, bases, namespace, scope=None, depends_on=None, **kwargs):
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+    def __init__(
+        cls, name, bases, namespace, scope=None, depends_on=None, **kwargs
+    ):
+        super().__init__(name, bases, namespace, **kwargs)
+        if scope is None:
+            scope = getattr(cls, "_singleton_scope", "global")
+        if scope not in SCOPES:
+            raise ValueError(f"scope 必须是 {SCOPES} 之一,得到 {scope!r}")
+        if depends_on is None:
+            depends_on = getattr(cls, "_singleton_depends_on", ())
+        for dep in depends_on:
+            if not isinstance(dep, SingletonMeta):
+                raise TypeError(f"depends_on 只能包含单例类,得到 {dep!r}")
+        cls._singleton_scope = scope
+        cls._singleton_depends_on = tuple(depends_on)
+        # global/process 作用域的实例直接放在类属性上;
+        # thread/context 作用域通过 _singleton_get/_singleton_set 读写,类属性始终为空
+        cls._singleton_instance = _EMPTY
+        cls._singleton_get = cls._singleton_set = None
+        if scope in _LOCAL_SLOTS:
+            cls._singleton_get, cls._singleton_set = _LOCAL_SLOTS[scope](name)
+        cls._singleton_lock = threading.Lock()
+        cls._singleton_owner = None  # 正在初始化的线程
+        cls._singleton_future = None  # 异步初始化共享的 future
+        SingletonMeta.registry.add(cls)
+
+    def __call__(cls, *args, **kwargs):
+        """
+        返回当前作用域中的唯一实例
+
+        快速路径只读一次实例槽,不加锁;只有首次调用才进入初始化。
+        实例建好之后再传入的参数被忽略
+        """
+        instance = cls._singleton_instance
+        if instance is not _EMPTY:
+            return instance
+        get = cls._singleton_get
+        if get is not None:
+            instance = get()
+            if instance is not _EMPTY and instance is not _CREATING:
+                return instance
+        return cls._create_instance(args, kwargs)
+
+    def _create_instance(cls, args, kwargs):
+        """单飞初始化: 持有类自己的锁构造实例,失败时实例槽保持为空,下一个调用方重试"""
+        if cls._singleton_get is not None:
+            return cls._create_local_instance(args, kwargs)
+        if cls._singleton_owner == threading.get_ident():
+            raise RuntimeError(f"{cls.__name__} 在自身的初始化过程中被再次调用")
+        with cls._singleton_lock:
+            instance = cls._singleton_instance
+            if instance is _EMPTY:
+                cls._singleton_owner = threading.get_ident()
+                try:
+                    instance = super().__call__(*args, **kwargs)
+                finally:
+                    cls._singleton_owner = None
+                cls._singleton_instance = instance
+        return instance
+
+    def _create_local_instance(cls, args, kwargs):
+        """
+        thread/context 作用域: 读取或创建当前线程(上下文)的实例
+
+        同一个槽只会被一个线程访问(一个 Context 同一时刻只能在一个线程中运行),
+        因此不需要加锁
+        """
+        instance = cls._singleton_get()
+        if instance is _CREATING:
+            raise RuntimeError(f"{cls.__name__} 在自身的初始化过程中被再次调用")
+        if instance is not _EMPTY:
+            return instance
+        set_instance = cls._singleton_set
+        set_instance(_CREATING)
+        try:
+            instance = super().__call__(*args, **kwargs)
+        except BaseException:
+            set_instance(_EMPTY)
+            raise
+        set_instance(instance)
+        return instance
+
+    async def instance(cls, *args, **kwargs):
+        """
+        异步获取唯一实例
 
-    def __new__(cls, *args, **kwargs):
+        global/process 作用域: 构造在事件循环的默认线程池中执行,不阻塞事件循环;
+        并发等待的协程共享同一个初始化,某个等待者被取消不影响初始化和其他等待者;
+        初始化失败时所有等待者收到同一个异常,下一次调用重新初始化。
+        thread/context 作用域的实例属于调用方自己的线程(上下文),直接在当前线程构造
+
+        Returns:
+            唯一实例
         """
-        重写 __new__ 方法实现单例
+        instance = cls._singleton_instance
+        if instance is not _EMPTY:
+            return instance
+        if cls._singleton_get is not None:
+            return cls(*args, **kwargs)
+        return await asyncio.shield(cls._init_future(args, kwargs))
 
-        使用双重检查锁定模式确保线程安全
+    def preload(cls, *args, **kwargs) -> "asyncio.Future":
         """
-        if cls._instance is None:
-            with cls._lock:
-                # 双重检查锁定
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
+        在后台开始初始化并立即返回(需要在运行中的事件循环里调用)
+
+        之后的 await Cls.instance() 等待同一个初始化,不会重复构造
+
+        Returns:
+            初始化完成时得到实例的 future
+
+        Raises:
+            TypeError: thread/context 作用域的实例不能在后台创建
+        """
+        if cls._singleton_get is not None:
+            raise TypeError(f"{cls._singleton_scope} 作用域的单例不支持 preload")
+        return cls._init_future(args, kwargs)
+
+    def _init_future(cls, args, kwargs) -> "asyncio.Future":
+        """返回当前事件循环中共享的初始化 future,没有或上一次失败时新建"""
+        loop = asyncio.get_running_loop()
+        future = cls._singleton_future
+        if (
+            future is None
+            or future.get_loop() is not loop
+            or (future.done() and (future.cancelled() or future.exception()))
+        ):
+            instance = cls._singleton_instance
+            if instance is not _EMPTY:
+                future = loop.create_future()
+                future.set_result(instance)
+                return future
+            # 构造仍走同步的单飞初始化: 与线程中的 Cls() 调用共用同一把锁
+            future = loop.run_in_executor(
+                None, functools.partial(cls._create_instance, args, kwargs)
+            )
+            cls._singleton_future = future
+        return future
+
+    @property
+    def singleton_scope(cls) -> str:
+        """实例的作用域"""
+        return cls._singleton_scope
+
+    @property
+    def singleton_depends_on(cls) -> tuple:
+        """声明依赖的单例类"""
+        return cls._singleton_depends_on
+
+    @property
+    def initialized(cls) -> bool:
+        """当前作用域中实例是否已经建好"""
+        get = cls._singleton_get
+        if get is None:
+            return cls._singleton_instance is not _EMPTY
+        instance = get()
+        return instance is not _EMPTY and instance is not _CREATING
+
+    def reset_instance(cls) -> None:
+        """
+        丢弃当前作用域中的实例,下次调用重新初始化(用于测试)
+
+        thread/context 作用域只影响当前线程(上下文)
+        """
+        if cls._singleton_set is not None:
+            cls._singleton_set(_EMPTY)
+            return
+        with cls._singleton_lock:
+            cls._singleton_instance = _EMPTY
+            cls._singleton_future = None
+
+
+def _reinit_after_fork() -> None:
+    """
+    fork 后的子进程: 重建所有单例类的锁,丢弃 process 作用域的实例
+
+    fork 时其他线程可能正持有某个类的锁,不重建的话子进程首次调用会死锁
+    """
+    for cls in list(SingletonMeta.registry):
+        cls._singleton_lock = threading.Lock()
+        cls._singleton_owner = None
+        cls._singleton_future = None
+        if cls._singleton_scope == "process":
+            cls._singleton_instance = _EMPTY
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+# 启动预热
+class WarmUpResult:
+    """单个单例的预热结果"""
+
+    __slots__ = ("cls", "status", "started", "elapsed", "error")
+
+    def __init__(self, cls: SingletonMeta):
+        self.cls = cls
+        self.status = "pending"  # ok / cached / failed / skipped
+        self.started = 0.0  # 相对预热开始的时间(秒)
+        self.elapsed = 0.0  # 初始化耗时(秒)
+        self.error: Optional[BaseException] = None
+
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        return {
+            "name": self.cls.__qualname__,
+            "status": self.status,
+            "started": self.started,
+            "elapsed": self.elapsed,
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+
+class WarmUpReport:
+    """预热报告: 按完成顺序记录每个单例的结果"""
+
+    def __init__(self, results: List[WarmUpResult], wall: float):
+        self.results = results
+        self.wall = wall  # 预热总耗时(秒)
+
+    @property
+    def ok(self) -> bool:
+        """是否全部初始化成功"""
+        return all(r.status in ("ok", "cached") for r in self.results)
+
+    @property
+    def failed(self) -> List[WarmUpResult]:
+        """初始化失败或因依赖失败而跳过的单例"""
+        return [r for r in self.results if r.status in ("failed", "skipped")]
+
+    def slowest(self, n: int = 5) -> List[WarmUpResult]:
+        """初始化耗时最长的 n 个单例"""
+        return sorted(self.results, key=lambda r: r.elapsed, reverse=True)[:n]
+
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        return {
+            "wall": self.wall,
+            "serial": sum(r.elapsed for r in self.results),
+            "singletons": [r.to_dict() for r in self.results],
+        }
+
+    def format(self) -> str:
+        """按耗时从高到低格式化为文本表格"""
+        lines = [f"{'singleton':<32}{'status':>9}{'start(ms)':>11}{'init(ms)':>10}"]
+        for r in self.slowest(len(self.results)):
+            lines.append(
+                f"{r.cls.__qualname__:<32}{r.status:>9}"
+                f"{r.started * 1000:>11.1f}{r.elapsed * 1000:>10.1f}"
+            )
+        lines.append(f"总耗时 {self.wall * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+def _warm_up_order(classes: Iterable[SingletonMeta]) -> Dict[SingletonMeta, list]:
+    """
+    收集要预热的单例(包括间接依赖)并检查依赖关系
+
+    Returns:
+        单例类 -> 依赖它的单例类列表
+
+    Raises:
+        ValueError: 依赖成环,或依赖了 thread/context 作用域的单例
+    """
+    dependents: Dict[SingletonMeta, list] = {}
+    stack = list(classes)
+    while stack:
+        cls = stack.pop()
+        if cls in dependents:
+            continue
+        if cls._singleton_get is not None:
+            raise ValueError(
+                f"{cls.__qualname__} 是 {cls._singleton_scope} 作用域,不能在启动时预热"
+            )
+        dependents[cls] = []
+        stack.extend(cls._singleton_depends_on)
+    for cls in dependents:
+        for dep in cls._singleton_depends_on:
+            dependents[dep].append(cls)
+
+    # 深度优先检查环,报告环上的类
+    state: Dict[SingletonMeta, int] = {}  # 1: 访问中, 2: 已完成
+
+    def visit(cls, path):
+        state[cls] = 1
+        for dep in cls._singleton_depends_on:
+            if state.get(dep) == 1:
+                cycle = path[path.index(dep):] + [dep]
+                names = " -> ".join(c.__qualname__ for c in cycle)
+                raise ValueError(f"单例依赖成环: {names}")
+            if dep not in state:
+                visit(dep, path + [dep])
+        state[cls] = 2
+
+    for cls in dependents:
+        if cls not in state:
+            visit(cls, [cls])
+    return dependents
+
+
+def warm_up_singletons(
+    classes: Optional[Iterable[SingletonMeta]] = None,
+    max_workers: Optional[int] = None,
+) -> WarmUpReport:
+    """
+    启动时并行预热单例
+
+    按 depends_on 声明的依赖做拓扑排序: 一个单例的依赖全部初始化完成后才提交它,
+    互不依赖的单例在线程池中并行初始化。初始化失败不会中断预热,
+    依赖它的单例被跳过,结果记录在报告中
+
+    Args:
+        classes: 要预热的单例类(其依赖会一并预热),默认是注册表中所有
+                 global/process 作用域的单例
+        max_workers: 线程池大小,默认同 ThreadPoolExecutor
+
+    Returns:
+        预热报告
+
+    Raises:
+        ValueError: 依赖成环,或显式传入/依赖了 thread/context 作用域的单例
+    """
+    if classes is None:
+        classes = [
+            cls for cls in list(SingletonMeta.registry)
+            if cls._singleton_get is None
+        ]
+    dependents = _warm_up_order(classes)
+    remaining = {cls: len(cls._singleton_depends_on) for cls in dependents}
+    results = {cls: WarmUpResult(cls) for cls in dependents}
+    done: List[WarmUpResult] = []
+    begin = time.perf_counter()
+
+    def init(cls):
+        result = results[cls]
+        result.started = time.perf_counter() - begin
+        cached = cls.initialized
+        try:
+            cls()
+        except Exception as exc:
+            result.status, result.error = "failed", exc
+        else:
+            result.status = "cached" if cached else "ok"
+        result.elapsed = time.perf_counter() - begin - result.started
+        return cls
+
+    def skip(cls, cause):
+        """依赖失败: 跳过 cls 以及所有依赖它的单例"""
+        result = results[cls]
+        if result.status != "pending":
+            return
+        result.status = "skipped"
+        result.error = RuntimeError(f"依赖 {cause.__qualname__} 初始化失败")
+        done.append(result)
+        for child in dependents[cls]:
+            skip(child, cause)
+
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="singleton-warmup") as ex:
+        running = {ex.submit(init, cls) for cls, n in remaining.items() if n == 0}
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                cls = future.result()
+                result = results[cls]
+                done.append(result)
+                for child in dependents[cls]:
+                    if result.status == "failed":
+                        skip(child, cls)
+                        continue
+                    remaining[child] -= 1
+                    if remaining[child] == 0 and results[child].status == "pending":
+                        running.add(ex.submit(init, child))
+
+    return WarmUpReport(done, time.perf_counter() - begin)
+
+
+class Singleton(metaclass=SingletonMeta):
+    """
+    单例类实现
+
+    由 SingletonMeta 保证只创建一个实例且 __init__ 只执行一次;
+    子类各自拥有独立的实例
+    """
 
     def __init__(self):
         """初始化实例(只会执行一次)"""
-        if not hasattr(self, '_initialized'):
-            self.value = None
-            self._initialized = True
+        self.value = None
 
 
 def main():
@@ -34,6 +34,712 @@ def test_lazy_property_correct_values():
     assert summary["min"] == 10
 
 
+def test_lazy_property_caches_under_own_name():
+    """测试 LazyProperty 把结果写入实例字典的同名键,之后不再经过描述符"""
+    from patterns.creational.lazy_evaluation import LazyProperty, invalidate
+
+    calls = []
+
+    class Report:
+        @LazyProperty
+        def total(self):
+            """合计"""
+            calls.append(1)
+            return 42
+
+    report = Report()
+    assert report.total == 42
+    assert vars(report) == {"total": 42}
+    assert report.total == 42
+    assert len(calls) == 1
+    assert Report.total.__doc__ == "合计"
+
+    invalidate(report, "total")
+    assert vars(report) == {}
+    assert report.total == 42
+    assert len(calls) == 2
+
+
+def test_slot_lazy_property():
+    """测试 SlotLazyProperty 在 __slots__ 类上缓存到预留的槽中"""
+    from patterns.creational.lazy_evaluation import SlotLazyProperty, invalidate
+
+    calls = []
+
+    class Point:
+        __slots__ = ("x", "y", "_norm")
+
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+        @SlotLazyProperty
+        def norm(self):
+            calls.append(1)
+            return (self.x ** 2 + self.y ** 2) ** 0.5
+
+    point = Point(3, 4)
+    assert not hasattr(point, "__dict__")
+    assert point.norm == 5.0
+    assert point.norm == 5.0
+    assert point._norm == 5.0
+    assert len(calls) == 1
+
+    invalidate(point, "norm")
+    invalidate(point, "norm")
+    point.x = 6
+    point.y = 8
+    assert point.norm == 10.0
+    assert len(calls) == 2
+
+
+def test_slot_lazy_property_custom_slot_and_missing_slot():
+    """测试 SlotLazyProperty 可以指定槽名,缺少预留槽时在类定义时报错"""
+    from patterns.creational.lazy_evaluation import SlotLazyProperty
+    import functools
+
+    class Vector:
+        __slots__ = ("items", "_cache")
+
+        def __init__(self, items):
+            self.items = items
+
+        @functools.partial(SlotLazyProperty, slot="_cache")
+        def total(self):
+            return sum(self.items)
+
+    assert Vector([1, 2, 3]).total == 6
+
+    # Python 3.12 之前 __set_name__ 中的异常会被包装成 RuntimeError
+    with pytest.raises((TypeError, RuntimeError)):
+        class Broken:
+            __slots__ = ("value",)
+
+            @SlotLazyProperty
+            def doubled(self):
+                return self.value * 2
+
+
+def test_thread_safe_lazy_property_computes_once_concurrently():
+    """测试并发的首次访问只计算一次,不同实例互不阻塞"""
+    from patterns.creational.lazy_evaluation import ThreadSafeLazyProperty
+    import threading
+    import time
+
+    calls = []
+    both_running = threading.Barrier(2, timeout=2)
+
+    class Report:
+        def __init__(self, name):
+            self.name = name
+
+        @ThreadSafeLazyProperty
+        def summary(self):
+            calls.append(self.name)
+            both_running.wait()  # 两个实例的计算同时进行才能通过
+            time.sleep(0.01)
+            return {"name": self.name}
+
+    reports = [Report("a"), Report("b")]
+    barrier = threading.Barrier(16)
+    results = []
+
+    def read(report):
+        barrier.wait()
+        results.append(report.summary)
+
+    threads = [
+        threading.Thread(target=read, args=(reports[i % 2],)) for i in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ["a", "b"], "每个实例只计算一次"
+    assert all(r is reports[0].summary or r is reports[1].summary for r in results)
+    # 缓存在实例字典中与属性同名的键下,读取不再经过描述符
+    assert reports[0].__dict__["summary"] is reports[0].summary
+    assert not Report.summary._computing
+
+
+def test_thread_safe_lazy_property_retries_and_invalidates():
+    """测试计算失败时下次重新计算,invalidate 之后重新计算"""
+    from patterns.creational.lazy_evaluation import ThreadSafeLazyProperty, invalidate
+
+    attempts = []
+
+    class Report:
+        def __init__(self):
+            self.data = [1, 2, 3]
+
+        @ThreadSafeLazyProperty
+        def total(self):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+            return sum(self.data)
+
+    report = Report()
+    with pytest.raises(ValueError):
+        report.total
+    assert report.total == 6
+    assert len(attempts) == 2
+
+    report.data.append(4)
+    assert report.total == 6, "缓存未失效前仍是旧值"
+    invalidate(report, "total")
+    assert report.total == 10
+    assert len(attempts) == 3
+
+    invalidate(report, "total")
+    invalidate(report, "total")  # 没有缓存时什么也不做
+    with pytest.raises(AttributeError):
+        invalidate(report, "data")
+
+
+def test_invalidate_during_computation_discards_result():
+    """测试计算期间被 invalidate 时,这次的结果不写入缓存"""
+    from patterns.creational.lazy_evaluation import ThreadSafeLazyProperty, invalidate
+    import threading
+
+    started = threading.Event()
+    proceed = threading.Event()
+
+    class Report:
+        def __init__(self):
+            self.version = 1
+
+        @ThreadSafeLazyProperty
+        def snapshot(self):
+            version = self.version
+            if version == 1:
+                started.set()
+                proceed.wait(2)
+            return version
+
+    report = Report()
+    worker = threading.Thread(target=lambda: report.snapshot)
+    worker.start()
+    assert started.wait(2)
+    report.version = 2
+    invalidate(report, "snapshot")
+    proceed.set()
+    worker.join()
+
+    assert "snapshot" not in report.__dict__
+    assert report.snapshot == 2
+
+
+def test_waiting_reader_caches_after_invalidate_during_computation():
+    """测试计算期间被 invalidate 后,之前在等待的读取者重新计算并写入缓存"""
+    from patterns.creational.lazy_evaluation import ThreadSafeLazyProperty, invalidate
+    import threading
+    import time
+
+    started = threading.Event()
+    proceed = threading.Event()
+    calls = []
+
+    class Report:
+        def __init__(self):
+            self.version = 1
+
+        @ThreadSafeLazyProperty
+        def snapshot(self):
+            version = self.version
+            calls.append(version)
+            if version == 1:
+                started.set()
+                proceed.wait(2)
+            return version
+
+    report = Report()
+    descriptor = Report.__dict__["snapshot"]
+    results = []
+    first = threading.Thread(target=lambda: results.append(report.snapshot))
+    first.start()
+    assert started.wait(2)
+    second = threading.Thread(target=lambda: results.append(report.snapshot))
+    second.start()
+    deadline = time.monotonic() + 2
+    while descriptor._computing[id(report)].waiters < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+    report.version = 2
+    invalidate(report, "snapshot")
+    proceed.set()
+    first.join()
+    second.join()
+
+    assert calls == [1, 2]
+    assert sorted(results) == [1, 2]
+    assert report.__dict__["snapshot"] == 2
+    assert report.snapshot == 2
+    assert calls == [1, 2]
+
+
+def test_dependency_tracking_reassignment_invalidates_only_dependents():
+    """测试重新赋值被依赖的属性时,只有依赖它的惰性属性重新计算"""
+    from patterns.creational.lazy_evaluation import (
+        DependencyTrackingMixin, LazyProperty, ThreadSafeLazyProperty,
+    )
+
+    calls = []
+
+    class Report(DependencyTrackingMixin):
+        def __init__(self, data, title):
+            self.data = data
+            self.title = title
+
+        @ThreadSafeLazyProperty(depends_on=("data",))
+        def total(self):
+            calls.append("total")
+            return sum(self.data)
+
+        @LazyProperty(depends_on=("title",))
+        def heading(self):
+            calls.append("heading")
+            return self.title.upper()
+
+    report = Report([1, 2, 3], "q1")
+    assert (report.total, report.heading) == (6, "Q1")
+
+    report.data = [10, 20]
+    assert report.total == 30
+    assert report.heading == "Q1"
+    assert calls == ["total", "heading", "total"]
+
+    report.unrelated = 1
+    del report.title
+    assert "heading" not in vars(report)
+    assert "total" in vars(report)
+
+
+def test_dependency_tracking_in_place_mutation():
+    """测试原地修改被依赖的 list/dict 时惰性属性失效"""
+    from patterns.creational.lazy_evaluation import (
+        DependencyTrackingMixin, LazyProperty, ObservableList,
+    )
+
+    class Report(DependencyTrackingMixin):
+        def __init__(self, data, options):
+            self.data = data
+            self.options = options
+
+        @LazyProperty(depends_on=("data",))
+        def total(self):
+            return sum(self.data)
+
+        @LazyProperty(depends_on=("options",))
+        def scale(self):
+            return self.options.get("scale", 1)
+
+    source = [1, 2, 3]
+    report = Report(source, {})
+    assert isinstance(report.data, ObservableList)
+    assert report.data == source and report.data is not source
+
+    mutations = [
+        lambda d: d.append(4),
+        lambda d: d.extend([5]),
+        lambda d: d.__setitem__(0, 100),
+        lambda d: d.pop(),
+        lambda d: d.remove(100),
+    ]
+    for mutate in mutations:
+        before = report.total
+        mutate(report.data)
+        assert report.total == sum(report.data) != before
+
+    report.data += [7]
+    assert report.total == sum(report.data)
+
+    assert report.scale == 1
+    report.options["scale"] = 3
+    assert report.scale == 3
+    report.options.update(scale=5)
+    assert report.scale == 5
+    report.options.setdefault("scale", 9)
+    assert "scale" in vars(report), "setdefault 未修改时不失效"
+
+    # 重新赋值后,旧列表的修改与报告无关
+    old = report.data
+    report.data = [1]
+    assert report.total == 1
+    old.append(1000)
+    assert "total" in vars(report)
+
+
+def test_dependency_tracking_transitive():
+    """测试间接依赖: 依赖另一个惰性属性的属性随之失效,invalidate 也会级联"""
+    from patterns.creational.lazy_evaluation import (
+        DependencyTrackingMixin, LazyProperty, invalidate,
+    )
+
+    calls = []
+
+    class Report(DependencyTrackingMixin):
+        def __init__(self, data):
+            self.data = data
+
+        @LazyProperty(depends_on=("data",))
+        def total(self):
+            calls.append("total")
+            return sum(self.data)
+
+        @LazyProperty(depends_on=("total",))
+        def headline(self):
+            calls.append("headline")
+            return f"total={self.total}"
+
+        @LazyProperty
+        def created(self):
+            calls.append("created")
+            return "now"
+
+    report = Report([1, 2])
+    assert report.headline == "total=3"
+    report.created
+    report.data.append(3)
+    assert report.headline == "total=6"
+    assert calls == ["headline", "total", "created", "headline", "total"]
+
+    invalidate(report, "total")
+    assert "headline" not in vars(report)
+    assert "created" in vars(report)
+
+
+def test_observable_container_reassignment_keeps_one_watcher():
+    """测试反复把同一个容器赋给同一属性时观察者不会累积,传入可观察容器时不复制"""
+    from patterns.creational.lazy_evaluation import (
+        DependencyTrackingMixin, LazyProperty, ObservableList,
+    )
+
+    class Report(DependencyTrackingMixin):
+        def __init__(self, data):
+            self.data = data
+
+        @LazyProperty(depends_on=("data",))
+        def total(self):
+            return sum(self.data)
+
+    report = Report([1])
+    for _ in range(2000):
+        report.data += [1]
+        report.data = report.data
+    assert len(report.data._watchers) == 1
+    assert report.total == 2001
+
+    shared = ObservableList([1, 2])
+    other = Report(shared)
+    assert other.data is shared
+    shared.append(3)
+    assert other.total == 6
+    assert len(shared._watchers) == 1
+
+
+def test_observable_containers_copy_and_pickle():
+    """测试可观察容器复制和序列化时不带观察者"""
+    from patterns.creational.lazy_evaluation import DataReport, ObservableList
+    import copy
+    import pickle
+
+    report = DataReport([3, 1, 2])
+    clone = copy.copy(report.data)
+    restored = pickle.loads(pickle.dumps(report.data))
+
+    assert clone == restored == [3, 1, 2]
+    assert isinstance(restored, ObservableList)
+    assert clone._watchers == [] and restored._watchers == []
+
+
+def test_data_report_summary_follows_data():
+    """测试 DataReport 的 summary 和 visualization 随 data 更新"""
+    from patterns.creational.lazy_evaluation import DataReport
+
+    report = DataReport([1, 2, 3])
+    assert report.summary["sum"] == 6
+    chart = report.visualization
+
+    report.data.append(4)
+    assert report.summary["sum"] == 10
+    assert report.visualization != chart
+
+    report.data = [5]
+    summary = report.summary
+    assert (summary["total"], summary["sum"], summary["avg"]) == (1, 5, 5)
+    assert (summary["max"], summary["min"], summary["variance"]) == (5, 5, 0)
+    assert report.quantiles["p50"] == 5
+
+
+def test_streaming_stats_matches_exact_statistics():
+    """测试单遍统计与精确计算一致"""
+    from patterns.creational.lazy_evaluation import StreamingStats
+    import random
+    import statistics
+
+    rng = random.Random(7)
+    values = [rng.gauss(100, 15) for _ in range(5000)] + [-3.5, 0, 1e6]
+    stats = StreamingStats.of(iter(values))
+
+    assert stats.count == len(values)
+    assert stats.sum == pytest.approx(sum(values))
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.variance == pytest.approx(statistics.pvariance(values))
+    assert stats.min == -3.5 and stats.max == 1e6
+    assert stats.quantile(0) == -3.5 and stats.quantile(1) == 1e6
+
+    ordered = sorted(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert stats.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_streaming_stats_merge_equals_single_pass():
+    """测试分块统计后合并的结果与整体单遍统计一致"""
+    from patterns.creational.lazy_evaluation import StreamingStats
+    import functools
+
+    values = [(i * 37) % 101 - 50 for i in range(1000)]
+    whole = StreamingStats.of(values)
+    chunks = [values[i:i + 128] for i in range(0, len(values), 128)]
+    parts = [StreamingStats.of(chunk) for chunk in chunks] + [StreamingStats()]
+    merged = functools.reduce(StreamingStats.merge, parts, StreamingStats())
+
+    assert merged.count == whole.count
+    assert merged.sum == whole.sum
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.mean == pytest.approx(whole.mean)
+    assert merged.variance == pytest.approx(whole.variance)
+    for q in (0.25, 0.5, 0.75):
+        assert merged.quantile(q) == whole.quantile(q)
+
+    with pytest.raises(ValueError):
+        StreamingStats().merge(StreamingStats(relative_accuracy=0.05))
+
+
+def test_streaming_stats_empty_and_without_sketch():
+    """测试没有数据时的统计量,以及关闭分位数估计"""
+    from patterns.creational.lazy_evaluation import StreamingStats
+
+    empty = StreamingStats()
+    assert (empty.count, empty.sum, empty.variance) == (0, 0, 0.0)
+    assert empty.min is None and empty.quantile(0.5) is None
+
+    plain = StreamingStats.of([1, 2, 3], relative_accuracy=None)
+    assert plain.to_dict() == {
+        "count": 3, "sum": 6, "mean": 2.0, "min": 1, "max": 3,
+        "variance": pytest.approx(2 / 3),
+    }
+    with pytest.raises(ValueError):
+        plain.quantile(0.5)
+
+
+def test_data_report_from_generator_single_pass():
+    """测试 DataReport 从生成器构建: 只遍历一次,不保留全部数据"""
+    from patterns.creational.lazy_evaluation import DataReport
+
+    consumed = []
+
+    def generate():
+        for i in range(1, 1001):
+            consumed.append(i)
+            yield i
+
+    report = DataReport.from_iterable(generate())
+    assert len(consumed) == 1000
+    assert report.data is None
+
+    summary = report.summary
+    assert (summary["total"], summary["sum"]) == (1000, 500500)
+    assert (summary["min"], summary["max"], summary["avg"]) == (1, 1000, 500.5)
+    assert report.quantiles["p50"] == pytest.approx(500, rel=0.011)
+    assert len(consumed) == 1000, "summary 不应再次遍历数据"
+    assert report.visualization.count("\n") == 9
+
+    report.data = [1, 2, 3]
+    assert report.summary["sum"] == 6
+
+
+def test_streamed_report_survives_invalidate():
+    """测试流式构建的报告在 stats 失效后沿用构建时的统计结果"""
+    from patterns.creational.lazy_evaluation import DataReport, invalidate
+
+    report = DataReport.from_iterable(iter(range(1, 101)))
+    before = report.summary
+
+    invalidate(report, "stats")
+    assert "summary" not in vars(report)
+    assert report.summary == before
+    assert report.quantiles["p50"] == pytest.approx(50, rel=0.011)
+    assert report.stats.count == 100
+
+
+def test_streaming_stats_sequences_defer_sketch():
+    """测试内存中的序列用内建函数统计,分位数草图推迟到需要时建立"""
+    from patterns.creational.lazy_evaluation import StreamingStats
+    import random
+    import statistics
+
+    rng = random.Random(11)
+    values = [rng.gauss(1e6, 3) for _ in range(5000)]
+    stats = StreamingStats.of(values)
+
+    assert stats._unsketched[0][0] is values
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.variance == pytest.approx(statistics.pvariance(values), rel=1e-9)
+    assert len(stats._unsketched) == 1, "统计量不需要草图"
+
+    streamed = StreamingStats.of(iter(values))
+    assert stats.quantile(0.5) == streamed.quantile(0.5)
+    assert stats._unsketched == []
+    assert stats.sketch.count == len(values)
+
+    chunked = StreamingStats()
+    chunked.SEQUENCE_CHUNK = 777
+    chunked.add_all(tuple(values))
+    assert chunked.variance == pytest.approx(stats.variance, rel=1e-9)
+
+    merged = StreamingStats.of(values[:100]).merge(StreamingStats.of(values[100:]))
+    assert merged.sketch.count == len(values)
+    assert merged.variance == pytest.approx(stats.variance, rel=1e-9)
+
+
+def test_streaming_stats_detects_sequence_modified_before_sketch():
+    """测试序列在建立分位数草图之前被修改时报错,而不是给出错误的分位数"""
+    from patterns.creational.lazy_evaluation import DataReport
+
+    report = DataReport([float(i) for i in range(100)])
+    stats = report.stats
+    report.data.extend([1000.0] * 500)
+
+    with pytest.raises(ValueError):
+        stats.quantile(0.5)
+    assert stats.count == 100
+    # 报告自身的 stats 已随 data 失效,重新统计
+    assert report.stats.count == 600
+    assert report.quantiles["p50"] == pytest.approx(1000, rel=0.011)
+
+
+def test_streaming_stats_numeric_buffers_match_pure_python():
+    """测试 array.array 等数值缓冲区的结果与纯 Python 路径一致(NumPy 可选)"""
+    from patterns.creational.lazy_evaluation import StreamingStats
+    import array
+
+    values = [((i * 7919) % 1000 - 300) / 7 for i in range(5000)]
+    buffer = array.array("d", values)
+
+    fast = StreamingStats.of(buffer)
+    slow = StreamingStats.of(buffer, vectorize=False)
+
+    assert fast.count == slow.count == 5000
+    assert fast.sum == pytest.approx(slow.sum)
+    assert fast.mean == pytest.approx(slow.mean)
+    assert fast.variance == pytest.approx(slow.variance)
+    assert (fast.min, fast.max) == (slow.min, slow.max)
+    assert fast.sketch.positive == slow.sketch.positive
+    assert fast.sketch.negative == slow.sketch.negative
+    assert fast.sketch.zero == slow.sketch.zero
+
+    ints = StreamingStats.of(array.array("i", range(-5, 100)))
+    assert ints.sum == sum(range(-5, 100)) and isinstance(ints.sum, int)
+
+
+def test_numeric_dispatch_without_numpy(monkeypatch):
+    """测试分派规则: 普通 list 从不走向量化路径,没有 NumPy 时数值缓冲区退回纯 Python"""
+    from patterns.creational import lazy_evaluation
+    from patterns.creational.lazy_evaluation import StreamingStats, histogram
+    import array
+
+    values = [float(i % 37) - 5 for i in range(1000)]
+    buffer = array.array("d", values)
+    vectorized = []
+    monkeypatch.setattr(
+        StreamingStats, "_add_array", lambda self, chunk: vectorized.append(chunk)
+    )
+
+    assert lazy_evaluation._numeric_buffer(values) is None
+    StreamingStats.of(values)
+    assert vectorized == []
+
+    monkeypatch.setattr(lazy_evaluation, "np", None)
+    assert lazy_evaluation._numeric_buffer(buffer) is None
+    fallback = StreamingStats.of(buffer)
+    expected = StreamingStats.of(values)
+    assert vectorized == []
+    assert (fallback.count, fallback.sum) == (expected.count, expected.sum)
+    assert fallback.variance == pytest.approx(expected.variance)
+    assert fallback.quantile(0.5) == expected.quantile(0.5)
+    assert histogram(buffer, 5) == histogram(values, 5)
+
+
+def test_streaming_stats_vectorized_chunks_and_zero_copy():
+    """测试 NumPy 路径分块计算的结果与整体一致,且不复制输入"""
+    np = pytest.importorskip("numpy")
+    from patterns.creational import lazy_evaluation
+    from patterns.creational.lazy_evaluation import StreamingStats
+    import array
+
+    buffer = array.array("d", range(1000))
+    view = lazy_evaluation._numeric_buffer(buffer)
+    assert np.shares_memory(view, np.frombuffer(buffer, dtype=np.float64))
+
+    data = np.random.default_rng(3).normal(50, 10, 10000)
+    chunked = StreamingStats()
+    chunked.CHUNK = 777
+    chunked.add_all(data)
+    whole = StreamingStats.of(data.tolist())
+
+    assert chunked.count == whole.count
+    assert chunked.mean == pytest.approx(whole.mean)
+    assert chunked.variance == pytest.approx(whole.variance)
+    assert chunked.quantile(0.5) == pytest.approx(whole.quantile(0.5))
+    assert StreamingStats.of(np.full(1000, 100, dtype=np.int8)).sum == 100000
+
+
+def test_histogram_exact_and_from_sketch():
+    """测试等宽直方图: 列表、缓冲区与草图估计的结果"""
+    from patterns.creational.lazy_evaluation import StreamingStats, histogram
+    import array
+
+    values = list(range(100))
+    expected = [(i * 9.9, (i + 1) * 9.9, 10) for i in range(10)]
+
+    for data in (values, array.array("l", values)):
+        buckets = histogram(data, bins=10)
+        assert [c for _, _, c in buckets] == [10] * 10
+        assert buckets[0][:2] == expected[0][:2]
+        assert buckets[-1][1] == 99
+
+    assert [c for _, _, c in histogram([5, 5, 5], bins=3)] == [3, 0, 0]
+    assert [c for _, _, c in histogram(values, bins=2, lo=0, hi=9)] == [5, 5]
+    assert histogram([], bins=4) == []
+
+    approx = StreamingStats.of(range(1, 1001)).histogram(10)
+    counts = [c for _, _, c in approx]
+    assert sum(counts) == 1000
+    assert all(abs(c - 100) <= 15 for c in counts)
+
+
+def test_data_report_accepts_numeric_buffers():
+    """测试 DataReport 直接使用 array.array,histogram 随 data 更新"""
+    from patterns.creational.lazy_evaluation import DataReport
+    import array
+
+    report = DataReport(array.array("d", [1.0, 2.0, 3.0, 4.0]))
+    assert report.summary["sum"] == 10.0
+    assert sum(c for _, _, c in report.histogram) == 4
+    assert report.histogram[0][0] == 1.0 and report.histogram[-1][1] == 4.0
+
+    report.data = [1, 1, 1]
+    assert [c for _, _, c in report.histogram][0] == 3
+
+    streamed = DataReport.from_iterable(x / 10 for x in range(1, 101))
+    assert sum(c for _, _, c in streamed.histogram) == 100
+
+
 def test_fibonacci_generator():
     """测试斐波那契生成器"""
     from patterns.creational.lazy_evaluation import LazySequence
@@ -70,7 +776,8 @@ def test_heavy_resource_lazy_init():
     from patterns.creational.lazy_evaluation import HeavyResource
 
     # 重置单例
-    HeavyResource._instance = None
+    HeavyResource.reset_instance()
+    assert not HeavyResource.initialized
 
     # 首次获取
     resource1 = HeavyResource.get_instance()
@@ -78,7 +785,22 @@ def test_heavy_resource_lazy_init():
     resource2 = HeavyResource.get_instance()
 
     assert resource1 is resource2
+    assert resource1 is HeavyResource()
     assert resource1.data == "重要数据"
+    assert "_instance" not in vars(HeavyResource)
+
+
+def test_heavy_resource_warm_up():
+    """测试重量级资源可以在启动时预热,之后的获取直接复用"""
+    from patterns.creational.lazy_evaluation import HeavyResource
+    from patterns.creational.singleton import warm_up_singletons
+
+    report = warm_up_singletons([HeavyResource])
+
+    assert report.ok
+    assert report.results[0].cls is HeavyResource
+    assert HeavyResource.initialized
+    assert HeavyResource.get_instance() is HeavyResource()
 
 
 def test_main_function():
@@ -1,8 +1,32 @@
 """
 对象池模式测试
 """
+import asyncio
+import os
+import queue
+import threading
+import time
+
 import pytest
 
+from patterns.creational.pool import PoolableObject
+
+
+class FakeResource(PoolableObject):
+    """创建开销可控的假资源,用于快速测试"""
+
+    def __init__(self, cost: float = 0.0):
+        self.in_use = False
+        self.closed = False
+        if cost:
+            time.sleep(cost)
+
+    def reset(self) -> None:
+        self.in_use = False
+
+    def close(self) -> None:
+        self.closed = True
+
 
 def test_pool_creates_min_objects():
     """测试对象池创建最小数量对象"""
@@ -61,6 +85,1381 @@ def test_pool_expands_when_needed():
     pool.release(conn3)
 
 
+def test_pool_creates_objects_concurrently():
+    """测试冷启动时多个线程并发创建对象,而不是在锁内串行创建"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(lambda: FakeResource(0.2), min_size=0, max_size=5)
+    barrier = threading.Barrier(5)
+    acquired = []
+
+    def worker():
+        barrier.wait()
+        acquired.append(pool.acquire())
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    assert len(acquired) == 5
+    assert pool.get_stats()["total"] == 5
+    # 串行创建需要 1.0 秒
+    assert elapsed < 0.6
+
+
+def test_pool_factory_failure_returns_slot():
+    """测试工厂失败时归还预留的名额"""
+    from patterns.creational.pool import ObjectPool
+
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("连接失败")
+        return FakeResource()
+
+    pool = ObjectPool(factory, min_size=0, max_size=1)
+
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert pool.get_stats()["total"] == 0
+
+    obj = pool.acquire()
+    assert obj.in_use is True
+    assert pool.get_stats()["total"] == 1
+
+
+def test_pool_waiter_wakes_when_creation_fails():
+    """测试名额被失败的创建归还后,等待者能够接手创建"""
+    from patterns.creational.pool import ObjectPool
+
+    proceed = threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            proceed.wait()
+            raise ConnectionError("连接失败")
+        return FakeResource()
+
+    pool = ObjectPool(factory, min_size=0, max_size=1)
+    errors = []
+    results = []
+
+    def first():
+        try:
+            pool.acquire()
+        except ConnectionError as e:
+            errors.append(e)
+
+    def second():
+        results.append(pool.acquire(timeout=2))
+
+    t1 = threading.Thread(target=first)
+    t1.start()
+    while pool.get_stats()["creating"] == 0:
+        time.sleep(0.01)
+
+    t2 = threading.Thread(target=second)
+    t2.start()
+    time.sleep(0.05)
+    proceed.set()
+    t1.join()
+    t2.join()
+
+    assert len(errors) == 1
+    assert len(results) == 1
+    assert pool.get_stats()["total"] == 1
+
+
+def test_pool_acquire_timeout_when_exhausted():
+    """测试池耗尽时获取超时"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+    pool.acquire()
+
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0.05)
+
+
+def test_pool_retires_object_after_max_uses():
+    """测试对象借出 max_uses 次后被淘汰"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, max_uses=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+
+    second = pool.acquire()
+    stats = pool.get_stats()
+
+    assert second is not first
+    assert first.closed is True
+    assert stats["evicted_uses"] == 1
+    assert stats["total"] == 1
+
+
+def test_pool_skips_objects_past_max_lifetime():
+    """测试获取时跳过超过最大生命周期的对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        FakeResource, min_size=1, max_size=2, max_lifetime=0.05, reap_interval=60
+    )
+    old = pool.acquire()
+    pool.release(old)
+    time.sleep(0.1)
+
+    fresh = pool.acquire()
+
+    assert fresh is not old
+    assert old.closed is True
+    assert pool.get_stats()["evicted_lifetime"] == 1
+    pool.close()
+
+
+def test_pool_reaper_shrinks_to_min_size():
+    """测试后台回收线程把空闲对象收缩到 min_size"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        FakeResource, min_size=1, max_size=4, max_idle_time=0.05, reap_interval=0.02
+    )
+    objs = [pool.acquire() for _ in range(4)]
+    for obj in objs:
+        pool.release(obj)
+    assert pool.get_stats()["total"] == 4
+
+    time.sleep(0.3)
+    stats = pool.get_stats()
+
+    assert stats["total"] == 1
+    assert stats["available"] == 1
+    assert stats["evicted_idle"] == 3
+    pool.close()
+
+
+def test_pool_lifetime_sweep_replenishes_min_size():
+    """测试生命周期回收后补足到 min_size"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=2, max_size=4)
+    originals = [pool.acquire() for _ in range(2)]
+    for obj in originals:
+        pool.release(obj)
+
+    pool.max_lifetime = 0.0
+    evicted = pool.evict_expired()
+    pool.max_lifetime = None
+    stats = pool.get_stats()
+
+    assert evicted == 2
+    assert stats["total"] == 2
+    assert stats["available"] == 2
+    assert stats["evicted_lifetime"] == 2
+    assert all(obj.closed for obj in originals)
+
+
+def test_pool_release_rejects_foreign_object():
+    """测试释放不属于该池的对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=1)
+
+    with pytest.raises(ValueError):
+        pool.release(FakeResource())
+
+
+def test_thread_cache_reuses_last_released_object():
+    """测试线程缓存让同一线程复用刚释放的对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=2, max_size=2, thread_cache_size=1)
+    obj = pool.acquire()
+    pool.release(obj)
+
+    stats = pool.get_stats()
+    assert stats["cached"] == 1
+    assert stats["available"] == 1
+    assert pool.acquire() is obj
+
+
+def test_thread_cache_spills_when_full():
+    """测试线程缓存超过上限时溢出到全局池"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=2, max_size=2, thread_cache_size=1)
+    objs = [pool.acquire() for _ in range(2)]
+    for obj in objs:
+        pool.release(obj)
+
+    stats = pool.get_stats()
+    assert stats["cached"] == 1
+    assert stats["available"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_thread_cache_spills_on_thread_exit():
+    """测试线程退出时缓存的对象归还全局池"""
+    import gc
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, thread_cache_size=4)
+
+    def worker():
+        pool.release(pool.acquire())
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    gc.collect()
+
+    stats = pool.get_stats()
+    assert stats["cached"] == 0
+    assert stats["available"] == 1
+
+
+def test_thread_cache_objects_can_be_stolen():
+    """测试池耗尽时可以从其他线程的缓存窃取对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, thread_cache_size=1)
+    cached = threading.Event()
+    done = threading.Event()
+
+    def worker():
+        pool.release(pool.acquire())
+        cached.set()
+        done.wait()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    cached.wait()
+
+    obj = pool.acquire(timeout=1)
+    done.set()
+    t.join()
+
+    assert obj is not None
+    assert pool.get_stats()["cached"] == 0
+
+
+def test_reaper_evicts_expired_thread_cache_objects():
+    """测试回收线程也回收线程缓存中空闲超时的对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        FakeResource, min_size=1, max_size=4, max_idle_time=0.05,
+        reap_interval=0.02, thread_cache_size=4
+    )
+    objs = [pool.acquire() for _ in range(4)]
+    for obj in objs:
+        pool.release(obj)
+    assert pool.get_stats()["cached"] == 4
+
+    time.sleep(0.3)
+    stats = pool.get_stats()
+
+    assert stats["total"] == 1
+    assert stats["cached"] + stats["available"] == 1
+    assert stats["evicted_idle"] == 3
+    pool.close()
+
+
+def test_thread_cache_release_hands_off_to_waiter():
+    """测试有线程等待时,释放的对象溢出到全局池而不是留在缓存"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, thread_cache_size=1)
+    holder = pool.acquire()
+    results = []
+
+    def waiter():
+        results.append(pool.acquire(timeout=2))
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    pool.release(holder)
+    t.join()
+
+    assert results == [holder]
+
+
+def test_try_acquire_does_not_block():
+    """测试 try_acquire 在池耗尽时立即返回 None"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=1)
+
+    assert pool.try_acquire(create=False) is None
+    obj = pool.try_acquire()
+    assert obj is not None
+    assert pool.try_acquire() is None
+
+
+def test_keyed_pool_creates_lazily_per_key():
+    """测试按键分组的池在首次使用某个键时才创建对象"""
+    from patterns.creational.pool import KeyedObjectPool
+
+    pool = KeyedObjectPool(lambda key: FakeResource(), max_per_key=2, max_total=4)
+    assert pool.get_stats()["total"] == 0
+
+    obj = pool.acquire(("db", 1))
+    pool.release(obj)
+    stats = pool.get_stats()
+
+    assert stats["total"] == 1
+    assert stats["keys"] == 1
+    assert pool.acquire(("db", 1)) is obj
+
+
+def test_keyed_pool_enforces_per_key_limit():
+    """测试单键上限不影响其他键"""
+    from patterns.creational.pool import KeyedObjectPool
+
+    pool = KeyedObjectPool(lambda key: FakeResource(), max_per_key=1, max_total=4)
+    pool.acquire("a")
+
+    with pytest.raises(queue.Empty):
+        pool.acquire("a", timeout=0.05)
+    assert pool.acquire("b", timeout=0.05) is not None
+
+
+def test_keyed_pool_evicts_least_recently_used_key():
+    """测试达到全局上限时淘汰最久未使用键的空闲对象"""
+    from patterns.creational.pool import KeyedObjectPool
+
+    pool = KeyedObjectPool(lambda key: FakeResource(), max_per_key=2, max_total=2)
+    first = pool.acquire("a")
+    second = pool.acquire("b")
+    pool.release(first)
+    pool.release(second)
+
+    pool.acquire("c")
+    stats = pool.get_stats()
+
+    assert first.closed is True
+    assert second.closed is False
+    assert stats["total"] == 2
+    assert stats["evicted_lru"] == 1
+    assert "a" not in stats["per_key"]
+
+
+def test_keyed_pool_global_waiter_wakes_on_release():
+    """测试全局上限下的等待者在其他键释放后获得名额"""
+    from patterns.creational.pool import KeyedObjectPool
+
+    pool = KeyedObjectPool(lambda key: FakeResource(), max_per_key=1, max_total=1)
+    held = pool.acquire("a")
+    results = []
+
+    def waiter():
+        results.append(pool.acquire("b", timeout=2))
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    pool.release(held)
+    t.join()
+
+    assert len(results) == 1
+    assert held.closed is True
+    assert pool.get_stats()["total"] == 1
+
+
+class SlowResetResource(FakeResource):
+    """重置耗时、可以被标记为损坏的假资源"""
+
+    def __init__(self, reset_cost: float = 0.0):
+        super().__init__()
+        self.reset_cost = reset_cost
+        self.broken = False
+        self.reset_count = 0
+
+    def reset(self) -> None:
+        time.sleep(self.reset_cost)
+        self.reset_count += 1
+        self.in_use = False
+
+    def validate(self) -> bool:
+        return not self.broken
+
+
+def test_background_reset_returns_immediately():
+    """测试后台重置时 release 立即返回,重置完成后对象才可借出"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        lambda: SlowResetResource(0.2), min_size=1, max_size=1, background_reset=True
+    )
+    obj = pool.acquire()
+
+    start = time.monotonic()
+    pool.release(obj)
+    assert time.monotonic() - start < 0.1
+    assert pool.get_stats()["resetting"] == 1
+
+    again = pool.acquire(timeout=1)
+    assert again is obj
+    assert obj.reset_count == 1
+    pool.close()
+
+
+def test_background_reset_drops_invalid_object():
+    """测试后台校验失败的对象被丢弃,不会再被借出"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(SlowResetResource, min_size=1, max_size=1, background_reset=True)
+    obj = pool.acquire()
+    obj.broken = True
+    pool.release(obj)
+    pool.close()
+
+    stats = pool.get_stats()
+    assert obj.closed is True
+    assert stats["evicted_invalid"] == 1
+    assert stats["total"] == 0
+
+
+def test_validate_on_borrow_replaces_broken_object():
+    """测试借出前校验失败的对象被透明替换"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        SlowResetResource, min_size=2, max_size=2, validate_on_borrow=True
+    )
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.broken = True
+
+    objs = [pool.acquire(), pool.acquire()]
+
+    assert broken not in objs
+    assert broken.closed is True
+    assert pool.get_stats()["evicted_invalid"] == 1
+
+
+def test_validate_while_idle_drops_broken_objects():
+    """测试空闲校验丢弃损坏的对象并补足 min_size"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(
+        SlowResetResource, min_size=2, max_size=2, validate_while_idle=True
+    )
+    objs = [pool.acquire(), pool.acquire()]
+    for obj in objs:
+        pool.release(obj)
+    objs[0].broken = True
+
+    pool.evict_expired()
+    stats = pool.get_stats()
+
+    assert stats["evicted_invalid"] == 1
+    assert stats["total"] == 2
+    assert stats["available"] == 2
+    assert pool.acquire() is objs[1]
+    pool.close()
+
+
+def test_latency_histogram_percentiles():
+    """测试直方图分位数估算落在正确的桶内"""
+    from patterns.creational.pool import LatencyHistogram
+
+    hist = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(98):
+        hist.observe(0.005)
+    hist.observe(0.5)
+    hist.observe(0.8)
+
+    assert hist.count == 100
+    assert 0 < hist.percentile(0.5) <= 0.01
+    assert 0.1 < hist.percentile(0.99) <= 0.8
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+def test_pool_metrics_records_acquire_hold_and_create():
+    """测试启用指标后记录等待、持有、创建耗时和峰值"""
+    from patterns.creational.pool import ObjectPool, PoolMetrics
+
+    metrics = PoolMetrics(sample_interval=0)
+    pool = ObjectPool(FakeResource, min_size=1, max_size=2, metrics=metrics)
+    objs = [pool.acquire(), pool.acquire()]
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0.01)
+    for obj in objs:
+        pool.release(obj)
+
+    data = metrics.to_dict()
+    assert data["acquire_wait"]["count"] == 2
+    assert data["hold"]["count"] == 2
+    assert data["create"]["count"] == 2
+    assert data["timeouts"] == 1
+    assert data["in_use"] == 0
+    assert data["peak_in_use"] == 2
+    assert [point["in_use"] for point in data["timeline"]] == [1, 2, 1, 0]
+
+
+def test_pool_metrics_timeline_is_bounded():
+    """测试利用率时间线是固定大小的环形缓冲区"""
+    from patterns.creational.pool import ObjectPool, PoolMetrics
+
+    metrics = PoolMetrics(timeline_size=3, sample_interval=0)
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, metrics=metrics)
+    for _ in range(5):
+        pool.release(pool.acquire())
+
+    assert len(metrics.to_dict()["timeline"]) == 3
+
+
+def test_pool_metrics_prometheus_export():
+    """测试导出 Prometheus 文本格式"""
+    from patterns.creational.pool import ObjectPool, PoolMetrics
+
+    metrics = PoolMetrics()
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1, metrics=metrics)
+    pool.release(pool.acquire())
+
+    text = metrics.to_prometheus(prefix="db_pool")
+
+    assert "# TYPE db_pool_acquire_wait_seconds histogram" in text
+    assert 'db_pool_acquire_wait_seconds_bucket{le="+Inf"} 1' in text
+    assert "db_pool_hold_seconds_count 1" in text
+    assert "db_pool_timeouts_total 0" in text
+    assert "db_pool_peak_in_use 1" in text
+    assert text.endswith("\n")
+
+
+def test_autosizer_grows_capacity_under_pressure():
+    """测试出现等待时控制器加性增大有效容量"""
+    from patterns.creational.pool import ObjectPool, PoolAutoSizer
+
+    sizer = PoolAutoSizer(interval=None, initial_size=1)
+    pool = ObjectPool(FakeResource, min_size=1, max_size=4, autosizer=sizer)
+    holder = pool.acquire()
+    results = []
+
+    def waiter():
+        results.append(pool.acquire(timeout=2))
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    sizer.tick()
+    t.join()
+
+    stats = pool.get_stats()
+    assert stats["target_size"] == 2
+    assert stats["autosize"]["last_decision"] == "increase"
+    assert results and results[0] is not holder
+
+
+def test_autosizer_drains_idle_objects():
+    """测试空闲比例过高时控制器乘性缩小容量并淘汰空闲对象"""
+    from patterns.creational.pool import ObjectPool, PoolAutoSizer
+
+    sizer = PoolAutoSizer(interval=None)
+    pool = ObjectPool(FakeResource, min_size=1, max_size=8, autosizer=sizer)
+    objs = [pool.acquire() for _ in range(8)]
+    for obj in objs:
+        pool.release(obj)
+
+    sizer.tick()
+    stats = pool.get_stats()
+    assert stats["autosize"]["last_decision"] == "decrease"
+    assert stats["target_size"] == 6
+    assert stats["total"] == 6
+    assert stats["evicted_autosize"] == 2
+
+    for _ in range(10):
+        sizer.tick()
+    assert pool.get_stats()["total"] == 1
+
+
+def test_autosizer_precreates_for_predicted_demand():
+    """测试控制器按预测需求提前创建空闲对象"""
+    from patterns.creational.pool import ObjectPool, PoolAutoSizer
+
+    sizer = PoolAutoSizer(interval=None, smoothing=0.5, headroom=0.5)
+    pool = ObjectPool(FakeResource, min_size=0, max_size=10, autosizer=sizer)
+    held = [pool.acquire() for _ in range(4)]
+
+    for _ in range(6):
+        sizer.tick()
+    stats = pool.get_stats()
+
+    assert stats["in_use"] == 4
+    assert stats["available"] >= 1
+    assert sizer.predicted_demand > 3
+    for obj in held:
+        pool.release(obj)
+
+
+def _start_waiters(pool, requests, results):
+    """按顺序启动等待线程,确保每个都已进入等待队列"""
+    threads = []
+    for name, kwargs in requests:
+        def run(name=name, kwargs=kwargs):
+            try:
+                results.append((name, pool.acquire(**kwargs)))
+            except queue.Empty as exc:
+                results.append((name, exc))
+
+        t = threading.Thread(target=run)
+        t.start()
+        threads.append(t)
+        deadline = time.monotonic() + 2
+        while (
+            pool.get_stats()["waiting"] < len(threads) and time.monotonic() < deadline
+        ):
+            time.sleep(0.005)
+    return threads
+
+
+def test_priority_waiter_served_first():
+    """测试释放的对象交给优先级最高的等待者,而不是最早到达的"""
+    from patterns.creational.pool import ObjectPool, Priority
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+    held = pool.acquire()
+    results = []
+    threads = _start_waiters(pool, [
+        ("batch", {"timeout": 2, "priority": Priority.BATCH}),
+        ("critical", {"timeout": 2, "priority": Priority.CRITICAL}),
+    ], results)
+
+    pool.release(held)
+    time.sleep(0.05)
+    assert [name for name, _ in results] == ["critical"]
+    pool.release(results[0][1])
+    for t in threads:
+        t.join()
+
+    assert [name for name, _ in results] == ["critical", "batch"]
+
+
+def test_earlier_deadline_served_first_within_priority():
+    """测试同一优先级内截止时间早的等待者先被服务"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+    held = pool.acquire()
+    now = time.monotonic()
+    results = []
+    threads = _start_waiters(pool, [
+        ("late", {"deadline": now + 3}),
+        ("early", {"deadline": now + 2}),
+    ], results)
+
+    pool.release(held)
+    time.sleep(0.05)
+    pool.release(results[0][1])
+    for t in threads:
+        t.join()
+
+    assert [name for name, _ in results] == ["early", "late"]
+
+
+def test_missed_deadline_fails_immediately():
+    """测试已过截止时间的请求立即失败,即使池中有空闲对象"""
+    from patterns.creational.pool import DeadlineExceeded, ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+
+    with pytest.raises(DeadlineExceeded):
+        pool.acquire(deadline=time.monotonic() - 0.01)
+    assert pool.get_stats()["available"] == 1
+
+
+def test_expired_waiter_does_not_take_object():
+    """测试等待期间错过截止时间的请求以 DeadlineExceeded 失败,对象交给下一个等待者"""
+    from patterns.creational.pool import DeadlineExceeded, ObjectPool, Priority
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+    held = pool.acquire()
+    results = []
+    threads = _start_waiters(pool, [
+        ("expiring", {
+            "priority": Priority.CRITICAL, "deadline": time.monotonic() + 0.05
+        }),
+        ("normal", {"timeout": 2}),
+    ], results)
+
+    time.sleep(0.1)
+    pool.release(held)
+    for t in threads:
+        t.join()
+
+    assert isinstance(dict(results)["expiring"], DeadlineExceeded)
+    assert dict(results)["normal"] is held
+
+
+def test_timeout_is_not_deadline_exceeded():
+    """测试只设置 timeout 时超时仍抛出普通的 queue.Empty"""
+    from patterns.creational.pool import DeadlineExceeded, ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=1, max_size=1)
+    pool.acquire()
+
+    with pytest.raises(queue.Empty) as exc_info:
+        pool.acquire(timeout=0.05)
+    assert not isinstance(exc_info.value, DeadlineExceeded)
+    assert pool.get_stats()["waiting"] == 0
+
+
+def test_acquire_many_is_all_or_none():
+    """测试批量获取凑不齐时一个对象也不拿"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=2, max_size=4)
+    held = pool.acquire_many(2)
+
+    with pytest.raises(queue.Empty):
+        pool.acquire_many(3, timeout=0.05)
+    stats = pool.get_stats()
+    assert stats["in_use"] == 2
+    assert stats["available"] == 0
+    assert stats["total"] == 2
+    assert stats["waiting"] == 0
+
+    batch = pool.acquire_many(2)
+    assert len(set(map(id, held + batch))) == 4
+    assert all(obj.in_use for obj in batch)
+    with pytest.raises(ValueError):
+        pool.acquire_many(5)
+
+
+def test_release_many_returns_all_objects():
+    """测试批量释放后对象全部回到空闲队列并被重置"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=4)
+    batch = pool.acquire_many(4)
+    pool.release_many(batch)
+
+    assert pool.get_stats()["available"] == 4
+    assert not any(obj.in_use for obj in batch)
+    with pytest.raises(ValueError):
+        pool.release_many([pool.acquire(), FakeResource()])
+
+
+def test_batch_waiter_is_not_starved_by_single_acquires():
+    """测试排队中的批量请求凑齐之前,后来的单个请求不能插队"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=3, max_size=3)
+    held = pool.acquire_many(3)
+    results = []
+
+    def batch():
+        results.append(pool.acquire_many(3, timeout=2))
+
+    t = threading.Thread(target=batch)
+    t.start()
+    deadline = time.monotonic() + 2
+    while pool.get_stats()["waiting"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    pool.release(held[0])
+    assert pool.try_acquire() is None
+    pool.release_many(held[1:])
+    t.join()
+
+    assert sorted(map(id, results[0])) == sorted(map(id, held))
+
+
+def test_concurrent_batch_jobs_do_not_deadlock():
+    """测试两个各需要大半个池的批任务交替运行而不会死锁"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=4)
+    errors = []
+
+    def job():
+        try:
+            for _ in range(50):
+                batch = pool.acquire_many(3, timeout=2)
+                pool.release_many(batch)
+        except queue.Empty as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=job) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert pool.get_stats()["in_use"] == 0
+
+
+def test_acquire_many_rolls_back_on_factory_failure():
+    """测试批量获取中途创建失败时,已取得的对象和名额全部归还"""
+    from patterns.creational.pool import ObjectPool
+
+    created = []
+
+    def flaky_factory():
+        if len(created) == 3:
+            raise ConnectionError("boom")
+        created.append(FakeResource())
+        return created[-1]
+
+    pool = ObjectPool(flaky_factory, min_size=2, max_size=4)
+    with pytest.raises(ConnectionError):
+        pool.acquire_many(4)
+
+    stats = pool.get_stats()
+    assert stats["in_use"] == 0
+    assert stats["creating"] == 0
+    assert stats["total"] == stats["available"] == 3
+
+
+def test_lifo_reuses_most_recently_released():
+    """测试 LIFO 复用最近释放的对象,FIFO 轮流使用最早释放的对象"""
+    from patterns.creational.pool import ObjectPool
+
+    for strategy, expected in (("lifo", 2), ("fifo", 0)):
+        pool = ObjectPool(FakeResource, min_size=0, max_size=3, strategy=strategy)
+        objs = pool.acquire_many(3)
+        for obj in objs:
+            pool.release(obj)
+
+        assert pool.acquire() is objs[expected]
+
+    with pytest.raises(ValueError):
+        ObjectPool(FakeResource, strategy="random")
+
+
+def test_lifo_lets_cold_objects_age_out():
+    """测试低负载下 LIFO 只使用少数对象,其余对象可被空闲回收;FIFO 让所有对象都保持活跃"""
+    from patterns.creational.pool import ObjectPool
+
+    evicted = {}
+    for strategy in ("lifo", "fifo"):
+        pool = ObjectPool(
+            FakeResource, min_size=1, max_size=4, max_idle_time=0.1, reap_interval=60,
+            strategy=strategy
+        )
+        pool.release_many(pool.acquire_many(4))
+        end = time.monotonic() + 0.25
+        while time.monotonic() < end:
+            pool.release(pool.acquire())
+            time.sleep(0.01)
+        evicted[strategy] = pool.evict_expired()
+        pool.close()
+
+    assert evicted == {"lifo": 3, "fifo": 0}
+
+
+class FlakyFactory:
+    """可切换故障状态的工厂,记录调用次数"""
+
+    def __init__(self, cost: float = 0.0):
+        self.cost = cost
+        self.failing = False
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> FakeResource:
+        with self._lock:
+            self.calls += 1
+        if self.cost:
+            time.sleep(self.cost)
+        if self.failing:
+            raise ConnectionError("database down")
+        return FakeResource()
+
+
+def test_failing_factory_is_single_flight():
+    """测试工厂失败后并发的创建共享同一次尝试,而不是各自重试"""
+    from patterns.creational.pool import CreationBreaker, FactoryUnavailable, ObjectPool
+
+    factory = FlakyFactory(cost=0.1)
+    factory.failing = True
+    breaker = CreationBreaker(failure_threshold=5)
+    pool = ObjectPool(factory, min_size=0, max_size=4, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    factory.calls = 0
+
+    errors = []
+
+    def worker():
+        try:
+            pool.acquire(timeout=2)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    shared = [e for e in errors if isinstance(e, FactoryUnavailable)]
+    assert len(errors) == 4
+    assert len(shared) == 3
+    assert all(isinstance(e.__cause__, ConnectionError) for e in shared)
+    assert factory.calls == 1
+    assert pool.get_stats()["total"] == 0
+
+
+def test_single_flight_follower_respects_timeout():
+    """测试共享创建尝试的调用方按自己的超时和截止时间离开,不等工厂结束"""
+    from patterns.creational.pool import CreationBreaker, DeadlineExceeded, ObjectPool
+
+    factory = FlakyFactory()
+    factory.failing = True
+    breaker = CreationBreaker(failure_threshold=5)
+    pool = ObjectPool(factory, min_size=0, max_size=4, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    factory.failing = False
+    factory.cost = 0.5
+
+    leader = threading.Thread(target=pool.acquire)
+    leader.start()
+    while factory.calls < 2:
+        time.sleep(0.005)
+
+    start = time.monotonic()
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0.1)
+    with pytest.raises(DeadlineExceeded):
+        pool.acquire(deadline=time.monotonic() + 0.1)
+    elapsed = time.monotonic() - start
+    leader.join()
+
+    assert elapsed < 0.45
+    assert factory.calls == 2
+    stats = pool.get_stats()
+    assert stats["total"] == 1
+    assert stats["creating"] == 0
+
+
+def test_creation_breaker_stays_closed_below_threshold():
+    """测试连续失败未达阈值时熔断器仍为 closed,只是改为单飞"""
+    from patterns.creational.pool import CreationBreaker, ObjectPool
+
+    factory = FlakyFactory()
+    factory.failing = True
+    breaker = CreationBreaker(failure_threshold=3, backoff_base=0.05)
+    pool = ObjectPool(factory, min_size=0, max_size=2, breaker=breaker)
+
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert breaker.state == "closed"
+    assert breaker.single_flight
+    stats = pool.get_stats()["breaker"]
+    assert stats["state"] == "closed"
+    assert stats["single_flight"] is True
+    assert stats["consecutive_failures"] == 1
+    assert stats["retry_in"] == 0.0
+
+    factory.failing = False
+    pool.release(pool.acquire())
+    assert breaker.state == "closed"
+    assert not breaker.single_flight
+
+
+def test_creation_breaker_opens_and_recovers():
+    """测试连续失败后熔断器打开并快速失败,退避结束后探测成功即恢复"""
+    from patterns.creational.pool import CreationBreaker, FactoryUnavailable, ObjectPool
+
+    factory = FlakyFactory()
+    factory.failing = True
+    breaker = CreationBreaker(failure_threshold=2, backoff_base=0.05, backoff_max=1.0)
+    pool = ObjectPool(factory, min_size=0, max_size=2, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+    stats = pool.get_stats()["breaker"]
+    assert stats["state"] == "open"
+    assert stats["consecutive_failures"] == 2
+    assert "database down" in stats["last_error"]
+
+    with pytest.raises(FactoryUnavailable):
+        pool.acquire()
+    assert factory.calls == 2
+    assert pool.get_stats()["breaker"]["rejected"] == 1
+
+    # 探测失败,退避时间翻倍
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert 0.05 < pool.get_stats()["breaker"]["retry_in"] <= 0.1
+
+    time.sleep(0.11)
+    factory.failing = False
+    obj = pool.acquire()
+    assert isinstance(obj, FakeResource)
+    assert pool.get_stats()["breaker"]["state"] == "closed"
+    assert pool.get_stats()["in_use"] == 1
+
+
+def test_process_capacity_bounds_total_across_pools():
+    """测试共享容量令牌的多个池合计不超过上限,令牌归还后等待者能拿到"""
+    from patterns.creational.pool import ObjectPool, ProcessCapacity
+
+    capacity = ProcessCapacity(3, poll_interval=0.01)
+    pool_a = ObjectPool(FakeResource, min_size=2, max_size=4, capacity=capacity)
+    pool_b = ObjectPool(FakeResource, min_size=2, max_size=4, capacity=capacity)
+
+    assert pool_a.get_stats()["total"] == 2
+    assert pool_b.get_stats()["total"] == 1
+    assert pool_b.get_stats()["capacity"] == {"max_total": 3, "held": 3, "available": 0}
+
+    held = pool_b.acquire()
+    with pytest.raises(queue.Empty):
+        pool_b.acquire(timeout=0.05)
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(pool_b.acquire(timeout=2)))
+    t.start()
+    time.sleep(0.05)
+    pool_a.close()
+    t.join()
+
+    assert len(results) == 1 and results[0] is not held
+    assert pool_b.get_stats()["total"] == 2
+    assert capacity.available() == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+def test_pool_rebuilds_in_forked_child():
+    """测试 fork 后子进程不沿用父进程的对象,且全局容量在父子进程间共享"""
+    from patterns.creational.pool import ObjectPool, ProcessCapacity
+
+    capacity = ProcessCapacity(3, poll_interval=0.01)
+    pool = ObjectPool(FakeResource, min_size=2, max_size=4, capacity=capacity)
+    inherited = [pool.acquire(), pool.acquire()]
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            stats = pool.get_stats()
+            assert stats["total"] == 0 and stats["in_use"] == 0
+            assert capacity.held == 0
+            obj = pool.acquire(timeout=1)
+            assert all(obj is not old for old in inherited)
+            try:
+                pool.acquire(timeout=0.05)
+            except queue.Empty:
+                pool.release(obj)
+                pool.close()
+                code = 0
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert pool.get_stats()["in_use"] == 2
+    assert capacity.available() == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+def test_forked_child_ignores_inherited_thread_cache():
+    """测试 fork 后父进程线程缓存中的对象不会溢出到子进程的池中"""
+    import gc
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=2, thread_cache_size=1)
+    inherited = pool.acquire()
+    pool.release(inherited)
+    assert pool.get_stats()["cached"] == 1
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            gc.collect()
+            stats = pool.get_stats()
+            assert stats["available"] == 0 and stats["in_use"] == 0
+            assert stats["cached"] == 0
+            obj = pool.acquire(timeout=1)
+            assert obj is not inherited
+            pool.release(obj)
+            assert pool.acquire(timeout=1) is obj
+            code = 0
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert pool.acquire(timeout=1) is inherited
+
+
+def test_pools_share_one_fork_hook():
+    """测试池只登记在弱引用集合中,被回收后不再参与 fork 后的重建"""
+    import gc
+    from patterns.creational import pool as pool_module
+
+    gc.collect()
+    before = len(pool_module._FORK_AWARE)
+    pools = [pool_module.ObjectPool(FakeResource, min_size=0) for _ in range(5)]
+    assert len(pool_module._FORK_AWARE) == before + 5
+
+    del pools
+    gc.collect()
+    assert len(pool_module._FORK_AWARE) == before
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    """轮询等待条件成立"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_lazy_warmup_returns_immediately():
+    """测试延迟预热时构造函数立即返回,获取拿到最先建好的对象而不是另建"""
+    from patterns.creational.pool import ObjectPool
+
+    factory = FlakyFactory(cost=0.1)
+    begin = time.perf_counter()
+    pool = ObjectPool(factory, min_size=4, max_size=8, lazy_warmup=True)
+    assert time.perf_counter() - begin < 0.05
+    assert pool.get_stats()["warming"] == 4
+
+    obj = pool.acquire(timeout=1)
+    elapsed = time.perf_counter() - begin
+
+    assert isinstance(obj, FakeResource)
+    assert elapsed < 0.3  # 并发创建,不是 4 × 0.1 秒
+    assert _wait_for(lambda: pool.get_stats()["warming"] == 0)
+    stats = pool.get_stats()
+    assert stats["total"] == 4
+    assert stats["available"] == 3
+    assert factory.calls == 4
+    pool.close()
+
+
+def test_spare_objects_are_replenished_ahead_of_demand():
+    """测试借出后在后台补足空闲备用对象"""
+    from patterns.creational.pool import ObjectPool
+
+    pool = ObjectPool(FakeResource, min_size=0, max_size=10, spare=2)
+    assert _wait_for(lambda: pool.get_stats()["available"] == 2)
+
+    held = [pool.acquire(), pool.acquire(), pool.acquire()]
+    assert _wait_for(lambda: pool.get_stats()["available"] == 2)
+
+    stats = pool.get_stats()
+    assert stats["in_use"] == 3
+    assert stats["total"] == 5
+    for obj in held:
+        pool.release(obj)
+    pool.close()
+
+
+async def _async_fake_factory(cost: float = 0.0) -> FakeResource:
+    await asyncio.sleep(cost)
+    return FakeResource()
+
+
+def test_async_pool_warms_up_concurrently():
+    """测试异步池并发预热 min_size 个对象"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(lambda: _async_fake_factory(0.1), min_size=5, max_size=5)
+        start = time.monotonic()
+        await pool.start()
+        return time.monotonic() - start, pool.get_stats()
+
+    elapsed, stats = asyncio.run(scenario())
+
+    assert stats["total"] == 5
+    assert stats["available"] == 5
+    # 逐个创建需要 0.5 秒
+    assert elapsed < 0.3
+
+
+def test_async_pool_lease_releases_object():
+    """测试 lease 上下文退出时自动释放对象(支持同步工厂)"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(FakeResource, min_size=0, max_size=2)
+        async with pool.lease() as obj:
+            assert obj.in_use is True
+            assert pool.get_stats()["in_use"] == 1
+        return obj, pool.get_stats()
+
+    obj, stats = asyncio.run(scenario())
+
+    assert obj.in_use is False
+    assert stats["available"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_async_pool_waiters_are_fifo():
+    """测试等待者按 FIFO 顺序获得释放的对象"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(FakeResource, min_size=1, max_size=1)
+        holder = await pool.acquire()
+        order = []
+
+        async def waiter(name):
+            obj = await pool.acquire()
+            order.append(name)
+            await asyncio.sleep(0)
+            pool.release(obj)
+
+        tasks = []
+        for name in ("a", "b", "c"):
+            tasks.append(asyncio.ensure_future(waiter(name)))
+            await asyncio.sleep(0)
+
+        assert pool.get_stats()["waiting"] == 3
+        pool.release(holder)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_async_pool_cancelled_waiter_does_not_leak():
+    """测试被取消的等待者不会吞掉释放的对象"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(FakeResource, min_size=1, max_size=1)
+        holder = await pool.acquire()
+
+        task = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        # 对象已交给等待者,但任务在恢复执行前被取消
+        pool.release(holder)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        obj = await pool.acquire(timeout=0.1)
+        return obj is holder, pool.get_stats()
+
+    same, stats = asyncio.run(scenario())
+
+    assert same
+    assert stats["total"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_async_pool_acquire_timeout():
+    """测试异步池耗尽时获取超时"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(FakeResource, min_size=1, max_size=1)
+        await pool.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.acquire(timeout=0.05)
+        return pool.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["waiting"] == 0
+
+
+def test_async_pool_factory_failure_hands_slot_to_waiter():
+    """测试异步工厂失败时名额转交给等待者"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        if len(calls) == 1:
+            raise ConnectionError("连接失败")
+        return FakeResource()
+
+    async def scenario():
+        pool = AsyncObjectPool(factory, min_size=0, max_size=1)
+        first = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(pool.acquire(timeout=1))
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        return results, pool.get_stats()
+
+    (first, second), stats = asyncio.run(scenario())
+
+    assert isinstance(first, ConnectionError)
+    assert isinstance(second, FakeResource)
+    assert stats["total"] == 1
+
+
+def test_async_pool_release_rejects_foreign_object():
+    """测试异步池拒绝释放不是它借出的对象"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def scenario():
+        pool = AsyncObjectPool(FakeResource, min_size=0, max_size=1)
+        with pytest.raises(ValueError):
+            pool.release(FakeResource())
+        obj = await pool.acquire()
+        pool.release(obj)
+        with pytest.raises(ValueError):
+            pool.release(obj)
+        return pool.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["total"] == 1
+    assert stats["available"] == 1
+
+
+def test_async_pool_close_closes_idle_and_cancels_waiters():
+    """测试关闭异步池时关闭空闲对象、取消等待者,之后归还的对象直接关闭"""
+    from patterns.creational.pool import AsyncObjectPool
+
+    async def close_idle():
+        async with AsyncObjectPool(FakeResource, min_size=2, max_size=2) as pool:
+            leased = await pool.acquire()
+            idle = pool._idle[0]
+        assert idle.closed
+        assert not leased.closed
+        assert pool.get_stats()["total"] == 1
+
+        pool.release(leased)
+        assert leased.closed
+        with pytest.raises(RuntimeError):
+            await pool.acquire()
+        return pool.get_stats()
+
+    async def cancel_waiters():
+        pool = AsyncObjectPool(FakeResource, min_size=0, max_size=1)
+        await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert pool.get_stats()["waiting"] == 1
+        await pool.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return pool.get_stats()
+
+    stats = asyncio.run(close_idle())
+    assert stats["total"] == 0
+    assert stats["available"] == 0
+    assert asyncio.run(cancel_waiters())["waiting"] == 0
+
+
 def test_database_connection_execute():
     """测试数据库连接执行查询"""
     from patterns.creational.pool import DatabaseConnection
@@ -3,6 +3,8 @@
 
 测试单例模式的核心功能
 """
+import os
+
 import pytest
 
 
@@ -56,3 +58,442 @@ def test_singleton_main_function():
         main()
     except Exception as e:
         pytest.fail(f"main 函数执行失败: {e}")
+
+
+def test_singleton_meta_subclasses_have_own_instance():
+    """测试子类各自拥有独立的实例,并登记到注册表"""
+    from patterns.creational.singleton import SingletonMeta
+
+    class Base(metaclass=SingletonMeta):
+        pass
+
+    class Child(Base):
+        pass
+
+    assert Base() is Base()
+    assert Child() is Child()
+    assert Base() is not Child()
+    assert type(Child()) is Child
+    assert Base in SingletonMeta.registry
+    assert Child in SingletonMeta.registry
+
+
+def test_singleton_meta_single_flight_init():
+    """测试并发首次调用只执行一次 __init__"""
+    from patterns.creational.singleton import SingletonMeta
+    import threading
+    import time
+
+    calls = []
+
+    class Slow(metaclass=SingletonMeta):
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.05)
+
+    barrier = threading.Barrier(16)
+    instances = []
+
+    def create():
+        barrier.wait()
+        instances.append(Slow())
+
+    threads = [threading.Thread(target=create) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1, "__init__ 应该只执行一次"
+    assert len(instances) == 16
+    assert all(inst is instances[0] for inst in instances)
+
+
+def test_singleton_meta_retries_after_failed_init():
+    """测试初始化抛出异常后,下一次调用重新初始化"""
+    from patterns.creational.singleton import SingletonMeta
+
+    attempts = []
+
+    class Flaky(metaclass=SingletonMeta):
+        def __init__(self):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        Flaky()
+    assert not Flaky.initialized
+
+    instance = Flaky()
+    assert Flaky.initialized
+    assert Flaky() is instance
+    assert len(attempts) == 2
+
+
+def test_singleton_meta_reentrant_init_raises():
+    """测试在 __init__ 中再次调用自身会抛出 RuntimeError 而不是死锁"""
+    from patterns.creational.singleton import SingletonMeta
+
+    class Recursive(metaclass=SingletonMeta):
+        def __init__(self):
+            Recursive()
+
+    with pytest.raises(RuntimeError):
+        Recursive()
+    assert not Recursive.initialized
+
+
+def test_singleton_meta_reset_instance():
+    """测试 reset_instance 之后重新创建实例"""
+    from patterns.creational.singleton import SingletonMeta
+
+    class Config(metaclass=SingletonMeta):
+        def __init__(self, name="default"):
+            self.name = name
+
+    first = Config("a")
+    assert Config("b") is first, "实例建好之后参数被忽略"
+    assert first.name == "a"
+
+    Config.reset_instance()
+    assert not Config.initialized
+    second = Config("b")
+    assert second is not first
+    assert second.name == "b"
+
+
+def test_singleton_meta_scope_inherited_and_validated():
+    """测试子类继承基类的作用域,未知作用域抛出 ValueError"""
+    from patterns.creational.singleton import SingletonMeta
+
+    class Base(metaclass=SingletonMeta, scope="thread"):
+        pass
+
+    class Child(Base):
+        pass
+
+    assert Base.singleton_scope == "thread"
+    assert Child.singleton_scope == "thread"
+
+    with pytest.raises(ValueError):
+        class Bad(metaclass=SingletonMeta, scope="request"):
+            pass
+
+
+def test_singleton_meta_thread_scope():
+    """测试 thread 作用域: 同一线程内唯一,不同线程各有一个实例"""
+    from patterns.creational.singleton import SingletonMeta
+    import threading
+
+    class PerThread(metaclass=SingletonMeta, scope="thread"):
+        pass
+
+    main_instance = PerThread()
+    assert PerThread() is main_instance
+
+    others = []
+
+    def create():
+        first = PerThread()
+        assert PerThread() is first
+        others.append(first)
+
+    threads = [threading.Thread(target=create) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = {id(inst) for inst in others}
+    assert len(ids) == 4
+    assert id(main_instance) not in ids
+
+
+def test_singleton_meta_context_scope():
+    """测试 context 作用域: 每个 asyncio 任务有自己的实例,任务内唯一"""
+    from patterns.creational.singleton import SingletonMeta
+    import asyncio
+
+    class RequestCache(metaclass=SingletonMeta, scope="context"):
+        def __init__(self):
+            self.items = []
+
+    async def handle(n):
+        cache = RequestCache()
+        cache.items.append(n)
+        await asyncio.sleep(0)
+        assert RequestCache() is cache
+        return cache
+
+    async def run():
+        return await asyncio.gather(*(handle(n) for n in range(5)))
+
+    caches = asyncio.run(run())
+    assert len({id(c) for c in caches}) == 5
+    assert [c.items for c in caches] == [[n] for n in range(5)]
+
+
+def test_singleton_meta_local_scope_retry_and_reentrancy():
+    """测试 thread/context 作用域下初始化失败会重试,递归调用抛出 RuntimeError"""
+    from patterns.creational.singleton import SingletonMeta
+
+    attempts = []
+
+    class Flaky(metaclass=SingletonMeta, scope="context"):
+        def __init__(self):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+
+    class Recursive(metaclass=SingletonMeta, scope="thread"):
+        def __init__(self):
+            Recursive()
+
+    with pytest.raises(ValueError):
+        Flaky()
+    assert not Flaky.initialized
+    assert Flaky() is Flaky()
+    assert len(attempts) == 2
+
+    with pytest.raises(RuntimeError):
+        Recursive()
+    assert not Recursive.initialized
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+def test_singleton_meta_process_scope_resets_after_fork():
+    """测试 fork 后 process 作用域的实例在子进程中重新创建,global 作用域沿用"""
+    from patterns.creational.singleton import SingletonMeta
+
+    class PerProcess(metaclass=SingletonMeta, scope="process"):
+        def __init__(self):
+            self.pid = os.getpid()
+
+    class Shared(metaclass=SingletonMeta):
+        def __init__(self):
+            self.pid = os.getpid()
+
+    parent_instance = PerProcess()
+    shared = Shared()
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            child_instance = PerProcess()
+            assert child_instance is not parent_instance
+            assert child_instance.pid == os.getpid()
+            assert Shared() is shared
+            code = 0
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert PerProcess() is parent_instance
+
+
+def test_singleton_meta_async_instance_single_flight():
+    """测试 await Cls.instance(): 并发等待者共享一次初始化,构造期间事件循环不被阻塞"""
+    from patterns.creational.singleton import SingletonMeta
+    import asyncio
+    import time
+
+    calls = []
+
+    class Model(metaclass=SingletonMeta):
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while not Model.initialized:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        results = await asyncio.gather(
+            ticker(), *(Model.instance() for _ in range(10))
+        )
+        return ticks, results[1:]
+
+    ticks, instances = asyncio.run(run())
+    assert len(calls) == 1, "__init__ 应该只执行一次"
+    assert all(inst is instances[0] for inst in instances)
+    assert Model() is instances[0]
+    assert ticks > 5, "初始化期间事件循环应该继续运行"
+
+
+def test_singleton_meta_async_instance_cancel_and_retry():
+    """测试取消一个等待者不影响其他等待者;初始化失败后下一次调用重试"""
+    from patterns.creational.singleton import SingletonMeta
+    import asyncio
+    import time
+
+    attempts = []
+
+    class Flaky(metaclass=SingletonMeta):
+        def __init__(self):
+            attempts.append(1)
+            time.sleep(0.05)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+
+    async def run():
+        first = asyncio.ensure_future(Flaky.instance())
+        second = asyncio.ensure_future(Flaky.instance())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(ValueError):
+            await second
+        assert first.cancelled()
+
+        waiters = [asyncio.ensure_future(Flaky.instance()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters[1:])
+        return results
+
+    results = asyncio.run(run())
+    assert len(attempts) == 2
+    assert results[0] is results[1] is Flaky()
+
+
+def test_singleton_meta_preload():
+    """测试 preload 在后台开始初始化,之后的 instance() 等待同一个初始化"""
+    from patterns.creational.singleton import SingletonMeta
+    import asyncio
+    import time
+
+    calls = []
+
+    class Cache(metaclass=SingletonMeta):
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.05)
+
+    class PerTask(metaclass=SingletonMeta, scope="context"):
+        pass
+
+    async def run():
+        future = Cache.preload()
+        assert not future.done()
+        instance = await Cache.instance()
+        assert await future is instance
+        assert await Cache.preload() is instance
+        with pytest.raises(TypeError):
+            PerTask.preload()
+        assert await PerTask.instance() is PerTask()
+        return instance
+
+    instance = asyncio.run(run())
+    assert len(calls) == 1
+    assert Cache() is instance
+
+
+def test_warm_up_singletons_parallel_in_dependency_order():
+    """测试预热按依赖顺序进行,互不依赖的单例并行初始化"""
+    from patterns.creational.singleton import SingletonMeta, warm_up_singletons
+    import threading
+    import time
+
+    order = []
+    lock = threading.Lock()
+
+    def record(name):
+        with lock:
+            order.append(name)
+
+    class Config(metaclass=SingletonMeta):
+        def __init__(self):
+            time.sleep(0.05)
+            record("config")
+
+    class Cache(metaclass=SingletonMeta, depends_on=(Config,)):
+        def __init__(self):
+            time.sleep(0.1)
+            record("cache")
+
+    class Index(metaclass=SingletonMeta, depends_on=(Config,)):
+        def __init__(self):
+            time.sleep(0.1)
+            record("index")
+
+    class Search(metaclass=SingletonMeta, depends_on=(Cache, Index)):
+        def __init__(self):
+            record("search")
+
+    report = warm_up_singletons([Search], max_workers=4)
+
+    assert report.ok
+    assert order[0] == "config" and order[-1] == "search"
+    assert {r.cls for r in report.results} == {Config, Cache, Index, Search}
+    assert all(cls.initialized for cls in (Config, Cache, Index, Search))
+    # Cache 和 Index 并行: 总耗时明显小于串行耗时
+    assert report.wall < report.to_dict()["serial"] - 0.05
+    assert report.slowest(2)[0].cls in (Cache, Index)
+    assert "Search" in report.format()
+
+    again = warm_up_singletons([Search])
+    assert {r.status for r in again.results} == {"cached"}
+
+
+def test_warm_up_singletons_failure_skips_dependents():
+    """测试初始化失败时依赖它的单例被跳过,其他单例照常预热"""
+    from patterns.creational.singleton import SingletonMeta, warm_up_singletons
+
+    class Broken(metaclass=SingletonMeta):
+        def __init__(self):
+            raise OSError("model file missing")
+
+    class Model(metaclass=SingletonMeta, depends_on=(Broken,)):
+        pass
+
+    class Api(metaclass=SingletonMeta, depends_on=(Model,)):
+        pass
+
+    class Logger(metaclass=SingletonMeta):
+        pass
+
+    report = warm_up_singletons([Api, Logger])
+    status = {r.cls: r.status for r in report.results}
+
+    assert not report.ok
+    assert status == {
+        Broken: "failed", Model: "skipped", Api: "skipped", Logger: "ok"
+    }
+    errors = {r.cls: r.error for r in report.failed}
+    assert isinstance(errors[Broken], OSError)
+    assert not Model.initialized
+
+
+def test_warm_up_singletons_rejects_cycles_and_local_scopes():
+    """测试依赖成环或包含 thread/context 作用域的单例时抛出 ValueError"""
+    from patterns.creational.singleton import SingletonMeta, warm_up_singletons
+
+    class A(metaclass=SingletonMeta):
+        pass
+
+    class B(metaclass=SingletonMeta, depends_on=(A,)):
+        pass
+
+    A._singleton_depends_on = (B,)  # 类定义时无法直接写出环
+    with pytest.raises(ValueError, match="成环"):
+        warm_up_singletons([B])
+
+    class PerThread(metaclass=SingletonMeta, scope="thread"):
+        pass
+
+    class Uses(metaclass=SingletonMeta, depends_on=(PerThread,)):
+        pass
+
+    with pytest.raises(ValueError):
+        warm_up_singletons([Uses])
+
+    with pytest.raises(TypeError):
+        class Bad(metaclass=SingletonMeta, depends_on=(object,)):
+            pass